@@ -9,7 +9,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Import models
 from app.models.base import Base
-from app.models import stock, sector
+from app.models import stock, sector, index
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,199 @@
+"""timescale price hypertables and continuous aggregates
+
+Converts stock_prices to a TimescaleDB hypertable, adds the index_prices
+hypertable, enables compression on old chunks and creates 1-day / 1-week
+OHLCV continuous aggregates for both.
+
+TimescaleDB requires the time column in every unique index, so the
+surrogate stock_prices.id key is replaced by (stock_id, timestamp).
+
+Revision ID: cfe4551e7dd1
+Revises: 0e3abadee8d4
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cfe4551e7dd1'
+down_revision: Union[str, None] = '0e3abadee8d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Bars: daily volume is the sum of bar volumes
+STOCK_PRICES_1D = """
+CREATE MATERIALIZED VIEW stock_prices_1d
+WITH (timescaledb.continuous) AS
+SELECT stock_id,
+       time_bucket(INTERVAL '1 day', "timestamp") AS bucket,
+       first(open, "timestamp") AS open,
+       max(high) AS high,
+       min(low) AS low,
+       last(close, "timestamp") AS close,
+       sum(volume) AS volume
+FROM stock_prices
+GROUP BY stock_id, bucket
+WITH NO DATA
+"""
+
+# Snapshots: volume is cumulative per session, so the day's volume is the last one
+INDEX_PRICES_1D = """
+CREATE MATERIALIZED VIEW index_prices_1d
+WITH (timescaledb.continuous) AS
+SELECT symbol,
+       time_bucket(INTERVAL '1 day', "timestamp") AS bucket,
+       first(open, "timestamp") AS open,
+       max(high) AS high,
+       min(low) AS low,
+       last(close, "timestamp") AS close,
+       last(volume, "timestamp") AS volume
+FROM index_prices
+GROUP BY symbol, bucket
+WITH NO DATA
+"""
+
+# Weekly aggregates roll up the daily ones (hierarchical continuous aggregates)
+STOCK_PRICES_1W = """
+CREATE MATERIALIZED VIEW stock_prices_1w
+WITH (timescaledb.continuous) AS
+SELECT stock_id,
+       time_bucket(INTERVAL '1 week', bucket) AS bucket,
+       first(open, bucket) AS open,
+       max(high) AS high,
+       min(low) AS low,
+       last(close, bucket) AS close,
+       sum(volume) AS volume
+FROM stock_prices_1d
+GROUP BY stock_id, time_bucket(INTERVAL '1 week', bucket)
+WITH NO DATA
+"""
+
+INDEX_PRICES_1W = """
+CREATE MATERIALIZED VIEW index_prices_1w
+WITH (timescaledb.continuous) AS
+SELECT symbol,
+       time_bucket(INTERVAL '1 week', bucket) AS bucket,
+       first(open, bucket) AS open,
+       max(high) AS high,
+       min(low) AS low,
+       last(close, bucket) AS close,
+       sum(volume) AS volume
+FROM index_prices_1d
+GROUP BY symbol, time_bucket(INTERVAL '1 week', bucket)
+WITH NO DATA
+"""
+
+
+def upgrade() -> None:
+    # stock_prices: (stock_id, timestamp) primary key instead of the surrogate id
+    op.drop_index('ix_stock_prices_id', table_name='stock_prices')
+    op.drop_constraint('stock_prices_pkey', 'stock_prices', type_='primary')
+    op.drop_column('stock_prices', 'id')
+    op.create_primary_key('stock_prices_pkey', 'stock_prices', ['stock_id', 'timestamp'])
+
+    op.create_table('index_prices',
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('high', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('low', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('close', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('volume', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('symbol', 'timestamp')
+    )
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+
+    # Hypertables: weekly chunks for bars, monthly for the much sparser index snapshots
+    op.execute(
+        "SELECT create_hypertable('stock_prices', 'timestamp', "
+        "chunk_time_interval => INTERVAL '7 days', migrate_data => true)"
+    )
+    op.execute(
+        "SELECT create_hypertable('index_prices', 'timestamp', "
+        "chunk_time_interval => INTERVAL '30 days', migrate_data => true)"
+    )
+
+    # Compress chunks older than 30 days, segmented by series for fast per-symbol scans
+    op.execute(
+        "ALTER TABLE stock_prices SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'stock_id', "
+        "timescaledb.compress_orderby = '\"timestamp\" DESC')"
+    )
+    op.execute("SELECT add_compression_policy('stock_prices', INTERVAL '30 days')")
+    op.execute(
+        "ALTER TABLE index_prices SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'symbol', "
+        "timescaledb.compress_orderby = '\"timestamp\" DESC')"
+    )
+    op.execute("SELECT add_compression_policy('index_prices', INTERVAL '90 days')")
+
+    # Continuous aggregates cannot be created inside a transaction
+    with op.get_context().autocommit_block():
+        for ddl in (STOCK_PRICES_1D, INDEX_PRICES_1D, STOCK_PRICES_1W, INDEX_PRICES_1W):
+            op.execute(ddl)
+
+        # Daily views include not-yet-materialized recent rows (real-time aggregation)
+        op.execute("ALTER MATERIALIZED VIEW stock_prices_1d SET (timescaledb.materialized_only = false)")
+        op.execute("ALTER MATERIALIZED VIEW index_prices_1d SET (timescaledb.materialized_only = false)")
+
+        for view in ('stock_prices_1d', 'index_prices_1d'):
+            op.execute(
+                f"SELECT add_continuous_aggregate_policy('{view}', "
+                "start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour', "
+                "schedule_interval => INTERVAL '30 minutes')"
+            )
+        for view in ('stock_prices_1w', 'index_prices_1w'):
+            op.execute(
+                f"SELECT add_continuous_aggregate_policy('{view}', "
+                "start_offset => INTERVAL '1 month', end_offset => INTERVAL '1 day', "
+                "schedule_interval => INTERVAL '1 day')"
+            )
+
+        # Materialize whatever history already exists
+        for view in ('stock_prices_1d', 'index_prices_1d', 'stock_prices_1w', 'index_prices_1w'):
+            op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for view in ('stock_prices_1w', 'index_prices_1w', 'stock_prices_1d', 'index_prices_1d'):
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view}")
+
+    op.drop_table('index_prices')
+
+    # Copy stock_prices back into a plain table with the surrogate id key
+    op.execute("ALTER TABLE stock_prices RENAME TO stock_prices_hypertable")
+    # Free the stock_prices_pkey index name for the recreated table's key
+    op.execute(
+        "ALTER TABLE stock_prices_hypertable RENAME CONSTRAINT stock_prices_pkey TO stock_prices_hypertable_pkey"
+    )
+    op.create_table('stock_prices',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('high', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('low', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('close', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('volume', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        'INSERT INTO stock_prices (stock_id, "timestamp", open, high, low, close, volume, created_at) '
+        'SELECT stock_id, "timestamp", open, high, low, close, volume, created_at '
+        'FROM stock_prices_hypertable ORDER BY "timestamp"'
+    )
+    op.drop_table('stock_prices_hypertable')
+    op.create_index('idx_stock_prices_stock_timestamp', 'stock_prices', ['stock_id', 'timestamp'], unique=False)
+    op.create_index(op.f('ix_stock_prices_id'), 'stock_prices', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_prices_stock_id'), 'stock_prices', ['stock_id'], unique=False)
+    op.create_index(op.f('ix_stock_prices_timestamp'), 'stock_prices', ['timestamp'], unique=False)
@@ -0,0 +1,139 @@
+"""lean stock_prices: drop redundant indexes, store prices as integer paisa
+
+stock_prices kept four indexes besides the (stock_id, timestamp) primary key
+after it became a hypertable:
+  - idx_stock_prices_stock_timestamp: duplicate of the primary key
+  - ix_stock_prices_stock_id: prefix of the primary key
+  - ix_stock_prices_timestamp: replaced by a single "timestamp" DESC index
+Prices move from NUMERIC(10,2) to INTEGER paisa (ScaledPrice in the model)
+and the unused created_at column is dropped.
+
+Compressed chunks and the continuous aggregates block column type changes,
+so both are taken down and rebuilt around the ALTERs. Aggregates now carry
+paisa as well.
+
+Revision ID: 47e356142de0
+Revises: cfe4551e7dd1
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47e356142de0'
+down_revision: Union[str, None] = 'cfe4551e7dd1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+STOCK_PRICES_1D = """
+CREATE MATERIALIZED VIEW stock_prices_1d
+WITH (timescaledb.continuous) AS
+SELECT stock_id,
+       time_bucket(INTERVAL '1 day', "timestamp") AS bucket,
+       first(open, "timestamp") AS open,
+       max(high) AS high,
+       min(low) AS low,
+       last(close, "timestamp") AS close,
+       sum(volume) AS volume
+FROM stock_prices
+GROUP BY stock_id, bucket
+WITH NO DATA
+"""
+
+STOCK_PRICES_1W = """
+CREATE MATERIALIZED VIEW stock_prices_1w
+WITH (timescaledb.continuous) AS
+SELECT stock_id,
+       time_bucket(INTERVAL '1 week', bucket) AS bucket,
+       first(open, bucket) AS open,
+       max(high) AS high,
+       min(low) AS low,
+       last(close, bucket) AS close,
+       sum(volume) AS volume
+FROM stock_prices_1d
+GROUP BY stock_id, time_bucket(INTERVAL '1 week', bucket)
+WITH NO DATA
+"""
+
+
+def _drop_aggregates_and_compression() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP MATERIALIZED VIEW IF EXISTS stock_prices_1w")
+        op.execute("DROP MATERIALIZED VIEW IF EXISTS stock_prices_1d")
+    op.execute("SELECT remove_compression_policy('stock_prices', if_exists => true)")
+    op.execute(
+        "SELECT decompress_chunk(c, if_compressed => true) FROM show_chunks('stock_prices') c"
+    )
+    op.execute("ALTER TABLE stock_prices SET (timescaledb.compress = false)")
+
+
+def _create_aggregates_and_compression() -> None:
+    op.execute(
+        "ALTER TABLE stock_prices SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'stock_id', "
+        "timescaledb.compress_orderby = '\"timestamp\" DESC')"
+    )
+    op.execute("SELECT add_compression_policy('stock_prices', INTERVAL '30 days')")
+
+    with op.get_context().autocommit_block():
+        op.execute(STOCK_PRICES_1D)
+        op.execute(STOCK_PRICES_1W)
+        op.execute("ALTER MATERIALIZED VIEW stock_prices_1d SET (timescaledb.materialized_only = false)")
+        op.execute(
+            "SELECT add_continuous_aggregate_policy('stock_prices_1d', "
+            "start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour', "
+            "schedule_interval => INTERVAL '30 minutes')"
+        )
+        op.execute(
+            "SELECT add_continuous_aggregate_policy('stock_prices_1w', "
+            "start_offset => INTERVAL '1 month', end_offset => INTERVAL '1 day', "
+            "schedule_interval => INTERVAL '1 day')"
+        )
+        op.execute("CALL refresh_continuous_aggregate('stock_prices_1d', NULL, NULL)")
+        op.execute("CALL refresh_continuous_aggregate('stock_prices_1w', NULL, NULL)")
+
+
+def upgrade() -> None:
+    _drop_aggregates_and_compression()
+
+    op.drop_index('idx_stock_prices_stock_timestamp', table_name='stock_prices')
+    op.drop_index('ix_stock_prices_stock_id', table_name='stock_prices')
+    op.drop_index('ix_stock_prices_timestamp', table_name='stock_prices')
+    # Single time index for cross-symbol scans (normally already added by create_hypertable)
+    op.execute('CREATE INDEX IF NOT EXISTS stock_prices_timestamp_idx ON stock_prices ("timestamp" DESC)')
+
+    for column in PRICE_COLUMNS:
+        op.alter_column(
+            'stock_prices', column,
+            type_=sa.Integer(),
+            postgresql_using=f'round({column} * 100)::integer',
+        )
+    op.drop_column('stock_prices', 'created_at')
+
+    _create_aggregates_and_compression()
+
+
+def downgrade() -> None:
+    _drop_aggregates_and_compression()
+
+    op.add_column('stock_prices', sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    for column in PRICE_COLUMNS:
+        op.alter_column(
+            'stock_prices', column,
+            type_=sa.Numeric(precision=10, scale=2),
+            postgresql_using=f'({column} / 100.0)::numeric(10,2)',
+        )
+
+    # stock_prices_timestamp_idx stays: create_hypertable added it in the previous revision
+    op.create_index('ix_stock_prices_timestamp', 'stock_prices', ['timestamp'], unique=False)
+    op.create_index('ix_stock_prices_stock_id', 'stock_prices', ['stock_id'], unique=False)
+    op.create_index('idx_stock_prices_stock_timestamp', 'stock_prices', ['stock_id', 'timestamp'], unique=False)
+
+    _create_aggregates_and_compression()
@@ -0,0 +1,65 @@
+"""
+HTTP Caching Helpers
+Strong ETags, If-None-Match handling and per-route Cache-Control policies
+"""
+from fastapi import Request, Response
+from typing import Dict, Optional
+import hashlib
+
+# (max-age, stale-while-revalidate) seconds per route group
+CACHE_POLICIES = {
+    # Poller refreshes every 60s while trading; max-age + SWR spans the 300s index TTL
+    "index": (60, 240),
+    # Daily/weekly bars are cached server-side for 5 minutes
+    "index:historical": (300, 600),
+    # Company and sector lists move with poller quotes
+    "companies": (60, 240),
+    "sectors": (60, 240),
+}
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the data version (or body bytes) it identifies"""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\x00")
+    return '"' + digest.hexdigest() + '"'
+
+
+def cache_control(policy: str) -> str:
+    """Cache-Control header value for a route group"""
+    max_age, stale_while_revalidate = CACHE_POLICIES[policy]
+    return f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+
+
+def etag_matches(request: Optional[Request], etag: str) -> bool:
+    """True if the request's If-None-Match covers etag (weak comparison, RFC 9110)"""
+    if request is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def caching_headers(etag: str, policy: Optional[str]) -> Dict[str, str]:
+    """ETag (+ Cache-Control when a policy is given) for a response"""
+    if policy is None:
+        return {"ETag": etag}
+    return {"ETag": etag, "Cache-Control": cache_control(policy)}
+
+
+def not_modified(etag: str, policy: Optional[str]) -> Response:
+    """Empty 304 carrying the validators the client should keep"""
+    return Response(status_code=304, headers=caching_headers(etag, policy))
+
@@ -0,0 +1,74 @@
+"""
+Request Metrics
+ASGI middleware recording per-route latency and the /metrics exposition
+"""
+import time
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from app.services.metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """
+    Times every HTTP request and labels it with the matched route template
+    (e.g. /api/v1/index/{symbol}), never the raw path
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses (SSE)
+    pass through untouched. Event streams are recorded when their headers
+    go out (latency = time to first byte) and leave the in-flight gauge
+    then, so connections lasting hours do not skew either; the stream hub
+    reports connected clients itself. WebSocket connections are not timed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            recorded = True
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, template).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, template, str(status)).inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if _is_event_stream(message):
+                    record()
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record()
+
+
+def _is_event_stream(message) -> bool:
+    """True for an http.response.start carrying Content-Type: text/event-stream"""
+    for name, value in message.get("headers", ()):
+        if name.lower() == b"content-type":
+            return value.split(b";")[0].strip().lower() == b"text/event-stream"
+    return False
+
+
+def metrics_response() -> Response:
+    """Current registry in the Prometheus text format"""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
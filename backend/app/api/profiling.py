@@ -0,0 +1,179 @@
+"""
+Request Profiling Hooks
+Opt-in span breakdowns (Server-Timing) and sampled profiler dumps
+
+    PROFILE_MODE         off (default) | header | sample
+                         header: only requests sending "X-Profile: 1"
+                         sample: PROFILE_SAMPLE_RATE of requests, plus X-Profile
+    PROFILE_SAMPLE_RATE  fraction of requests profiled in sample mode (0.01)
+    PROFILE_DUMP_RATE    fraction of profiled requests that also run a full
+                         profiler and write its report to PROFILE_DUMP_DIR (0)
+    PROFILER             pyinstrument (if installed) | cprofile
+
+Span names come from app.services.profiling.span() calls in the hot path
+(redis, psx_fetch, parse, validate, ...) and from ProfiledRoute
+(endpoint, serialize).
+"""
+import asyncio
+import cProfile
+import functools
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+from app.services.profiling import current_profile, end_profile, span, start_profile
+
+try:
+    import pyinstrument
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_MODES = ("off", "header", "sample")
+
+
+class ProfiledRoute(APIRoute):
+    """
+    APIRoute that splits handler time into "endpoint" (the route function)
+    and "serialize" (everything else FastAPI does for the route: parameter
+    parsing, response_model validation and JSON rendering)
+
+    Use with APIRouter(route_class=ProfiledRoute). Unprofiled requests pay
+    one ContextVar lookup.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed_endpoint(*call_args, **call_kwargs):
+                with span("endpoint"):
+                    return await call(*call_args, **call_kwargs)
+
+            # The request handler looks up dependant.call on every request
+            self.dependant.call = timed_endpoint
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            profile = current_profile()
+            if profile is None:
+                return await handler(request)
+            endpoint_before = profile.spans.get("endpoint", (0.0,))[0]
+            started = time.perf_counter()
+            response = await handler(request)
+            endpoint = profile.spans.get("endpoint", (0.0,))[0] - endpoint_before
+            profile.add("serialize", max(time.perf_counter() - started - endpoint, 0.0))
+            return response
+
+        return profiled_handler
+
+
+class ProfilingMiddleware:
+    """
+    Attaches a RequestProfile to profiled requests and reports it in a
+    Server-Timing response header
+
+    At most one profiler dump runs at a time per worker: both cProfile and
+    pyinstrument profile the whole thread, so overlapping requests on the
+    event loop also show up in a dump.
+    """
+
+    def __init__(
+        self,
+        app,
+        mode: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        dump_rate: Optional[float] = None,
+        dump_dir: Optional[str] = None,
+        profiler: Optional[str] = None,
+    ):
+        self.app = app
+        self.mode = (mode or os.getenv("PROFILE_MODE", "off")).lower()
+        if self.mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown PROFILE_MODE: {self.mode} (expected one of {', '.join(PROFILE_MODES)})")
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+        self.dump_rate = dump_rate if dump_rate is not None else float(os.getenv("PROFILE_DUMP_RATE", "0"))
+        self.dump_dir = dump_dir or os.getenv("PROFILE_DUMP_DIR", "/tmp/stockgenie-profiles")
+        self.profiler = (profiler or os.getenv("PROFILER", "pyinstrument")).lower()
+        if self.profiler == "pyinstrument" and not PYINSTRUMENT_AVAILABLE:
+            self.profiler = "cprofile"
+        self._dumping = False
+
+    def _wants_profile(self, scope) -> bool:
+        if self.mode == "off":
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value not in (b"0", b"false", b"")
+        return self.mode == "sample" and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = start_profile()
+        profiler = None
+        if self.dump_rate and not self._dumping and random.random() < self.dump_rate:
+            profiler = self._start_profiler()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_profile(token)
+            if profiler is not None:
+                await self._dump(profiler, scope)
+
+    def _start_profiler(self):
+        self._dumping = True
+        if self.profiler == "pyinstrument":
+            profiler = pyinstrument.Profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    async def _dump(self, profiler, scope) -> None:
+        """Stop the profiler and write its report off the event loop"""
+        try:
+            if self.profiler == "pyinstrument":
+                profiler.stop()
+            else:
+                profiler.disable()
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{uuid.uuid4().hex[:6]}"
+            path = os.path.join(self.dump_dir, name + (".html" if self.profiler == "pyinstrument" else ".prof"))
+            await asyncio.to_thread(self._write, profiler, path)
+            logger.info(f"🔬 Profile written: {path}")
+        except Exception as e:
+            logger.warning(f"Profile dump failed: {e}")
+        finally:
+            self._dumping = False
+
+    def _write(self, profiler, path: str) -> None:
+        os.makedirs(self.dump_dir, exist_ok=True)
+        if self.profiler == "pyinstrument":
+            with open(path, "w") as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.dump_stats(path)
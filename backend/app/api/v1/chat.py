@@ -0,0 +1,73 @@
+"""
+Chat API Endpoints
+Questions about company financials, answered from statement tables or the local report index
+"""
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import logging
+
+from app.api.profiling import ProfiledRoute
+from app.rag.chat import IndexNotReady, get_chat_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/chat", tags=["Chat"], route_class=ProfiledRoute)
+
+
+class ChatRequest(BaseModel):
+    """Chat question"""
+    query: str = Field(..., min_length=1, max_length=2000, description="Question about a company's reports")
+    session_id: Optional[str] = Field(None, description="Client session identifier")
+    company_symbol: Optional[str] = Field(None, description="Restrict retrieval to one company (e.g. FCCL)")
+    limit: int = Field(5, ge=1, le=20, description="Report chunks to retrieve")
+
+
+class ChatSource(BaseModel):
+    """Report chunk or statement cell an answer was drawn from"""
+    symbol: Optional[str] = None
+    period_end: Optional[str] = None
+    # Report chunks
+    doc_id: Optional[str] = None
+    chunk_index: Optional[int] = None
+    page: Optional[int] = None
+    score: Optional[float] = None
+    # Statement cells
+    statement: Optional[str] = Field(None, description="income_statement, balance_sheet, cash_flow or ratios")
+    field: Optional[str] = Field(None, description="Statement line item (e.g. revenue)")
+
+
+class ChatResponse(BaseModel):
+    """Chat answer"""
+    answer: str
+    sources: List[ChatSource]
+    confidence: float = Field(..., description="Best retrieval score behind the answer (1.0 for statement lookups)")
+    tokens_used: int = Field(..., description="LLM tokens spent (0 for statement lookups and cached answers)")
+    answered_by: str = Field(..., description="statements, cache or retrieval")
+    cached: bool = Field(..., description="Served from the semantic cache")
+    similarity: Optional[float] = Field(None, description="Similarity to the cached question, if cached")
+
+
+@router.post("", response_model=ChatResponse, summary="Ask About Company Reports")
+async def chat(request: ChatRequest):
+    """
+    Answer a question from the financial statements or the ingested
+    annual/quarterly reports.
+
+    Figure lookups ("FCCL revenue 2023", "FCCL ROE") are answered directly
+    from the statement tables. Other questions go through hybrid (BM25 +
+    vector) retrieval and answer generation; near-duplicate questions (same
+    company scope, companies and years named, limit and index build) are
+    served from the semantic cache.
+
+    **Example:**
+    ```bash
+    curl -X POST http://localhost:8000/api/v1/chat \\
+      -H "Content-Type: application/json" \\
+      -d '{"query":"What was FCCL revenue in 2023?","company_symbol":"FCCL"}' | jq
+    ```
+    """
+    try:
+        return await get_chat_service().answer(request.query, symbol=request.company_symbol, limit=request.limit)
+    except IndexNotReady as e:
+        logger.warning(f"⚠️  Chat unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Report index not built yet")
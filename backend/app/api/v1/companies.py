@@ -2,17 +2,14 @@
 Company API Endpoints  
 Provides top companies and detailed company data
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from enum import Enum
 import logging
 
-# Import mock data
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-from mocks.sectors import get_mock_top_companies
+from app.services.company_universe import get_company_universe
+from app.services.response_cache import get_response_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/companies", tags=["Companies"])
@@ -56,6 +53,7 @@ class CompanyResponse(BaseModel):
 
 @router.get("/top", response_model=List[CompanyResponse], summary="Get Top Companies")
 async def get_top_companies(
+    request: Request,
     limit: int = Query(30, ge=1, le=100, description="Number of companies to return"),
     sort_by: SortField = Query(SortField.rank, description="Field to sort by"),
     sort_order: SortOrder = Query(SortOrder.asc, description="Sort order (asc/desc)"),
@@ -80,19 +78,27 @@ async def get_top_companies(
     # Banks only
     curl "http://localhost:8000/api/v1/companies/top?sector=Commercial%20Banks" | jq
     ```
+    
+    **Caching:** ETag + `Cache-Control: max-age=60, stale-while-revalidate=240`;
+    send `If-None-Match` to get `304 Not Modified` while prices are unchanged.
     """
     try:
-        companies = get_mock_top_companies(limit=limit)
-        
-        # Filter by sector if provided
-        if sector:
-            companies = [c for c in companies if c["sector"] == sector]
-        
-        # Sort
-        reverse = (sort_order == SortOrder.desc)
-        companies = sorted(companies, key=lambda x: x[sort_by.value], reverse=reverse)
-        
-        return [CompanyResponse(**c) for c in companies]
+        universe = get_company_universe()
+
+        def build():
+            # Pre-sorted view of the full universe, so limit applies after filter + sort
+            companies = universe.top(
+                limit,
+                sort_by=sort_by.value,
+                descending=(sort_order == SortOrder.desc),
+                sector=sector,
+            )
+            return [CompanyResponse(**c).model_dump() for c in companies]
+
+        params = {"limit": limit, "sort_by": sort_by.value, "sort_order": sort_order.value, "sector": sector}
+        return get_response_cache().respond(
+            "companies:top", params, universe.version, build, request=request, policy="companies"
+        )
         
     except Exception as e:
         logger.error(f"Error fetching top companies: {e}", exc_info=True)
@@ -1,29 +1,42 @@
 """
 KSE100 Index API Endpoints
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, List, Union
+from enum import Enum
 import os
 import logging
 
+import orjson
+
 # Import mock data (fallback)
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from mocks.stocks import get_mock_index
 
 # Import real data services
-from app.services.psx_scraper import get_psx_scraper
-from app.services.cache_service import get_cache_service
+from app.services.market_poller import get_kse100_snapshot, get_index_snapshot
+from app.services.market_history import get_index_history
+from app.services.cache_service import get_cache_service, symbol_tag
+from app.api.http_cache import caching_headers, etag_matches, make_etag, not_modified
+from app.api.profiling import ProfiledRoute
+from app.services.profiling import span
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/index", tags=["Index"])
+router = APIRouter(prefix="/index", tags=["Index"], route_class=ProfiledRoute)
+
+
+class HistoryInterval(str, Enum):
+    """Historical bar sizes"""
+    daily = "1d"
+    weekly = "1w"
 
 
 class IndexResponse(BaseModel):
-    """KSE100 Index Response Model"""
-    symbol: str = Field(..., description="Index symbol (KSE100)")
+    """Index Response Model (KSE100 and other PSX indices)"""
+    symbol: str = Field(..., description="Index symbol (e.g. KSE100, KMI30)")
     name: str = Field(..., description="Index full name")
     value: float = Field(..., description="Current index value in points")
     change: float = Field(..., description="Absolute change from previous close")
@@ -43,8 +56,19 @@ class IndexResponse(BaseModel):
     average_volume_30d: Optional[int] = Field(None, description="30-day average volume")
 
 
+def _index_response(data: Dict, request: Request, response: Response) -> Union[IndexResponse, Response]:
+    """IndexResponse with ETag/Cache-Control, or 304 if the client has this snapshot"""
+    # Snapshots are immutable per (symbol, timestamp), so that pair is the version
+    etag = make_etag("index", data.get("symbol"), data.get("timestamp"))
+    if etag_matches(request, etag):
+        return not_modified(etag, "index")
+    response.headers.update(caching_headers(etag, "index"))
+    with span("validate"):
+        return IndexResponse(**data)
+
+
 @router.get("/", response_model=IndexResponse, summary="Get KSE100 Index Data")
-async def get_index():
+async def get_index(request: Request, response: Response):
     """
     Get current KSE100 index data including:
     - Current value and daily change
@@ -54,8 +78,10 @@ async def get_index():
     - Trading status and constituent count
     
     **Data Source:** PSX Data Portal (dps.psx.com.pk)  
-    **Cache:** 5 minutes  
-    **Fallback:** Mock data if PSX unavailable
+    **Cache:** Refreshed by the background poller (1 min while trading, 15 min when closed)  
+    **Fallback:** Mock data if PSX unavailable  
+    **HTTP caching:** ETag per snapshot, `max-age=60, stale-while-revalidate=240`;
+    `If-None-Match` returns `304 Not Modified` until the next snapshot
     
     **Example:**
     ```bash
@@ -63,49 +89,24 @@ async def get_index():
     ```
     """
     try:
-        cache = get_cache_service()
-        scraper = get_psx_scraper()
-        
-        # Try to get from cache first
-        cache_key = "kse100:current"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            logger.info("✅ Returning cached KSE100 data")
-            return IndexResponse(**cached_data)
-        
-        # Fetch from PSX
-        logger.info("📊 Fetching fresh KSE100 data from PSX...")
-        real_data = scraper.fetch_kse100_data()
+        # Served from the poller's cache snapshot; never waits on PSX when the poller runs
+        with span("snapshot"):
+            real_data = await get_kse100_snapshot()
         
         if real_data:
-            # Ensure all required fields are present
-            # Add missing fields with sensible defaults
-            if 'open' not in real_data:
-                real_data['open'] = real_data.get('previous_close', real_data['value'])
-            if 'market_cap' not in real_data:
-                real_data['market_cap'] = 8547000000000  # Approximate
-            if 'constituent_count' not in real_data:
-                real_data['constituent_count'] = 100
-            if 'average_volume_30d' not in real_data:
-                real_data['average_volume_30d'] = real_data.get('volume')
-            
-            # Cache for 5 minutes (300 seconds)
-            cache.set(cache_key, real_data, ttl_seconds=300)
-            logger.info(f"✅ Fetched real KSE100 data: {real_data['value']}")
-            return IndexResponse(**real_data)
+            return _index_response(real_data, request, response)
         
         # Fallback to mock data if PSX fetch fails
         logger.warning("⚠️ PSX data unavailable, using mock data")
         mock_data = get_mock_index()
-        return IndexResponse(**mock_data)
+        return _index_response(mock_data, request, response)
         
     except Exception as e:
         logger.error(f"Error in get_index: {e}", exc_info=True)
         # Last resort: return mock data
         try:
             mock_data = get_mock_index()
-            return IndexResponse(**mock_data)
+            return _index_response(mock_data, request, response)
         except:
             raise HTTPException(
                 status_code=500,
@@ -113,17 +114,101 @@ async def get_index():
             )
 
 
-@router.get("/historical", summary="Get Historical Index Data")
+class HistoricalBar(BaseModel):
+    """One OHLCV bar"""
+    date: str = Field(..., description="Bucket start date (ISO 8601)")
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+
+
+class HistoricalIndexResponse(BaseModel):
+    """Historical index data"""
+    symbol: str
+    interval: HistoryInterval
+    days: int
+    data: List[HistoricalBar]
+
+
+@router.get("/historical", response_model=HistoricalIndexResponse, summary="Get Historical Index Data")
 async def get_historical_index(
-    days: int = Query(30, ge=1, le=365, description="Number of days of historical data")
+    request: Request,
+    response: Response,
+    days: int = Query(30, ge=1, le=365, description="Number of days of historical data"),
+    interval: HistoryInterval = Query(HistoryInterval.daily, description="Bar size (1d/1w)"),
+    symbol: str = Query("KSE100", description="Index symbol"),
 ):
     """
-    Get historical KSE100 index data
+    Get historical index OHLCV bars.
+    
+    Served from TimescaleDB continuous aggregates (pre-rolled daily/weekly
+    bars), so a 365-day request reads ~365 rows rather than raw snapshots.
     
-    **Note:** This endpoint will be implemented in a future update
+    **Cache:** 5 minutes (server), `max-age=300, stale-while-revalidate=600` (HTTP)
+    
+    **Example:**
+    ```bash
+    curl "http://localhost:8000/api/v1/index/historical?days=365&interval=1w" | jq
+    ```
     """
-    raise HTTPException(
-        status_code=501,
-        detail="Historical data endpoint not yet implemented. Coming in Phase 2."
-    )
+    symbol = symbol.upper()
+    try:
+        cache = await get_cache_service()
+        bars = await cache.get_or_load(
+            f"index:{symbol}:historical:{interval.value}:{days}",
+            lambda: get_index_history(symbol, days, interval.value),
+            ttl_seconds=300,
+            stale_ttl_seconds=300,
+            tags=[symbol_tag(symbol)],
+        )
+    except Exception as e:
+        logger.error(f"Error fetching index history: {e}", exc_info=True)
+        bars = None
+    
+    if bars is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Historical data is temporarily unavailable"
+        )
+    
+    etag = make_etag("index:historical", symbol, interval.value, days, orjson.dumps(bars))
+    if etag_matches(request, etag):
+        return not_modified(etag, "index:historical")
+    response.headers.update(caching_headers(etag, "index:historical"))
+    return HistoricalIndexResponse(symbol=symbol, interval=interval, days=days, data=bars)
 
+
+@router.get("/{symbol}", response_model=IndexResponse, summary="Get Index Data by Symbol")
+async def get_index_by_symbol(symbol: str, request: Request, response: Response):
+    """
+    Get current data for any index on the PSX Market Watch page
+    (KSE100, KSE30, KMI30, ALLSHR, KMIALLSHR, BKTI, OGTI, ...).
+    
+    All indices come from the same page fetch, so each one is a cache lookup.
+    
+    **Example:**
+    ```bash
+    curl http://localhost:8000/api/v1/index/KMI30 | jq
+    ```
+    """
+    symbol = symbol.upper()
+    if symbol == "KSE100":
+        return await get_index(request, response)
+    
+    try:
+        index_data = await get_index_snapshot(symbol)
+    except Exception as e:
+        logger.error(f"Error fetching index {symbol}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch index data: {str(e)}"
+        )
+    
+    if not index_data:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No data found for index: {symbol}"
+        )
+    return _index_response(index_data, request, response)
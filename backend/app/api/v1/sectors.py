@@ -2,16 +2,21 @@
 Sector API Endpoints
 Provides KSE100 sector composition and analysis
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import logging
 
+import orjson
+
 # Import mock data
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-from mocks.sectors import get_mock_sectors, get_mock_sector_companies
+from mocks.sectors import get_mock_sectors
+from app.api.http_cache import make_etag
+from app.services.company_universe import get_company_universe
+from app.services.response_cache import get_response_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/sectors", tags=["Sectors"])
@@ -48,7 +53,7 @@ class CompanyResponse(BaseModel):
 
 
 @router.get("/", response_model=List[SectorResponse], summary="Get KSE100 Sector Composition")
-async def get_sectors():
+async def get_sectors(request: Request):
     """
     Get KSE100 sector composition and weights.
     
@@ -65,8 +70,15 @@ async def get_sectors():
     ```
     """
     try:
+        # Versioned by the sector data the body is built from (a few small
+        # dicts), so every replica serving the same data sends the same ETag
         sectors = get_mock_sectors()
-        return [SectorResponse(**s) for s in sectors]
+        version = make_etag(orjson.dumps(sectors))
+        return get_response_cache().respond(
+            "sectors", None, version,
+            lambda: [SectorResponse(**s).model_dump() for s in sectors],
+            request=request, policy="sectors",
+        )
     except Exception as e:
         logger.error(f"Error fetching sectors: {e}", exc_info=True)
         raise HTTPException(
@@ -77,7 +89,7 @@ async def get_sectors():
 
 @router.get("/{sector_name}/companies", response_model=List[CompanyResponse], 
             summary="Get Companies in Sector")
-async def get_sector_companies(sector_name: str):
+async def get_sector_companies(sector_name: str, request: Request):
     """
     Get all companies within a specific sector.
     
@@ -87,13 +99,18 @@ async def get_sector_companies(sector_name: str):
     ```
     """
     try:
-        companies = get_mock_sector_companies(sector_name)
+        universe = get_company_universe()
+        companies = universe.sector(sector_name)
         if not companies:
             raise HTTPException(
                 status_code=404,
                 detail=f"No companies found for sector: {sector_name}"
             )
-        return [CompanyResponse(**c) for c in companies]
+        return get_response_cache().respond(
+            "sectors:companies", {"sector": sector_name}, universe.version,
+            lambda: [CompanyResponse(**c).model_dump() for c in companies],
+            request=request, policy="sectors",
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,106 @@
+"""
+Live Market Stream Endpoints
+Server-Sent Events and WebSocket push of index/quote deltas
+"""
+from fastapi import APIRouter, HTTPException, Request, WebSocket
+from fastapi.responses import StreamingResponse
+import asyncio
+import logging
+
+from app.services.market_stream import get_market_stream
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/stream", tags=["Stream"])
+
+SSE_HEARTBEAT = b": ping\n\n"
+WS_HEARTBEAT = '{"type":"heartbeat"}'
+
+
+@router.get("", summary="Live Market Stream (SSE)")
+async def stream_events(request: Request):
+    """
+    Server-Sent Events stream of market data.
+
+    The first event is a full `snapshot` of every index and quote; after
+    that only `delta` events carrying the fields that changed since the
+    previous poll. A comment heartbeat keeps idle connections open.
+
+    Clients that fall behind are resynced with a fresh `snapshot` instead
+    of receiving the backlog.
+
+    **Example:**
+    ```bash
+    curl -N http://localhost:8000/api/v1/stream
+    ```
+    """
+    hub = get_market_stream()
+    if hub.full:
+        raise HTTPException(status_code=503, detail="Too many stream clients, retry later")
+
+    async def events():
+        # Subscribe only once the body is being sent: the finally below is the
+        # only unsubscribe, and it never runs if iteration never starts
+        subscription = hub.subscribe()
+        if subscription is None:
+            return
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=hub.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield SSE_HEARTBEAT
+                    continue
+                yield message.sse
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket):
+    """
+    WebSocket variant of the market stream (same snapshot/delta JSON messages).
+
+    **Example:**
+    ```bash
+    websocat ws://localhost:8000/api/v1/stream/ws
+    ```
+    """
+    hub = get_market_stream()
+    subscription = hub.subscribe()
+    if subscription is None:
+        await websocket.close(code=1013)  # try again later
+        return
+
+    await websocket.accept()
+
+    async def send():
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=hub.heartbeat_seconds)
+            except asyncio.TimeoutError:
+                await websocket.send_text(WS_HEARTBEAT)
+                continue
+            await websocket.send_text(message.data.decode())
+
+    async def receive():
+        # Clients never send anything; this just notices disconnects promptly
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Unsubscribe before awaiting anything: the server may be cancelling us
+        hub.unsubscribe(subscription)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,6 @@
+"""
+Database Package
+"""
+from app.db.session import get_engine, get_session, get_sessionmaker, get_pool_status, close_engine
+
+__all__ = ["get_engine", "get_session", "get_sessionmaker", "get_pool_status", "close_engine"]
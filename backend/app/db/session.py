@@ -0,0 +1,132 @@
+"""
+Async Database Session
+Process-wide SQLAlchemy AsyncEngine on asyncpg and a FastAPI session dependency
+
+Pool and statement-cache settings come from the environment:
+    DB_POOL_SIZE                 persistent connections per process (default 10)
+    DB_MAX_OVERFLOW              extra connections under burst load (default 20)
+    DB_POOL_TIMEOUT              seconds to wait for a free connection (default 10)
+    DB_POOL_RECYCLE              reconnect connections older than this, seconds (default 1800)
+    DB_STATEMENT_CACHE_SIZE      asyncpg prepared statements kept per connection (default 500,
+                                 set 0 behind PgBouncer in transaction mode)
+    DB_ECHO                      log SQL (default false)
+"""
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncIterator, Dict, Optional
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_database_url() -> str:
+    """
+    Database URL for the asyncpg driver
+
+    Uses DATABASE_URL if set, otherwise builds it from the POSTGRES_* variables.
+    """
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        url = "postgresql://{user}:{password}@{host}:{port}/{db}".format(
+            user=os.getenv("POSTGRES_USER", "stockgenie"),
+            password=os.getenv("POSTGRES_PASSWORD", "changeme_secure_password"),
+            host=os.getenv("POSTGRES_HOST", "localhost"),
+            port=os.getenv("POSTGRES_PORT", "5432"),
+            db=os.getenv("POSTGRES_DB", "stockgenie_db"),
+        )
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# Singleton instances
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+
+# Lifetime pool event counters (see get_pool_status)
+_pool_events = {"connects": 0, "checkouts": 0, "invalidations": 0}
+
+
+def _count(name: str):
+    def listener(*args):
+        _pool_events[name] += 1
+    return listener
+
+
+def get_engine() -> AsyncEngine:
+    """Get the process-wide async engine (created on first use)"""
+    global _engine
+    if _engine is None:
+        statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+        _engine = create_async_engine(
+            get_database_url(),
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pool_pre_ping=True,
+            echo=os.getenv("DB_ECHO", "false").lower() == "true",
+            connect_args={
+                # asyncpg's own per-connection prepared statement cache
+                "statement_cache_size": statement_cache_size,
+                # SQLAlchemy adapter cache of prepared statements per connection
+                "prepared_statement_cache_size": statement_cache_size,
+                "server_settings": {"application_name": "stockgenie-backend"},
+            },
+        )
+        pool = _engine.sync_engine.pool
+        event.listen(pool, "connect", _count("connects"))
+        event.listen(pool, "checkout", _count("checkouts"))
+        event.listen(pool, "invalidate", _count("invalidations"))
+        logger.info(
+            f"✅ Database engine created (pool_size={pool.size()}, "
+            f"statement_cache_size={statement_cache_size})"
+        )
+    return _engine
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    """Get the session factory bound to the process-wide engine"""
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(get_engine(), expire_on_commit=False)
+    return _sessionmaker
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding an AsyncSession"""
+    async with get_sessionmaker()() as session:
+        yield session
+
+
+def get_pool_status() -> Dict:
+    """
+    Connection pool metrics
+
+    Returns:
+        Current pool occupancy plus lifetime connect/checkout/invalidation
+        counts; {"initialized": False} before the engine is first used.
+    """
+    if _engine is None:
+        return {"initialized": False}
+    pool = _engine.sync_engine.pool
+    return {
+        "initialized": True,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        **_pool_events,
+    }
+
+
+async def close_engine() -> None:
+    """Dispose pooled connections (called on app shutdown)"""
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _sessionmaker = None
@@ -2,12 +2,47 @@
 StockGenie Backend - FastAPI Application Entry Point
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import os
 from datetime import datetime
 
+from app.services.cache_service import get_cache_service, close_cache_service
+from app.services.market_poller import get_market_poller, poller_enabled
+from app.services.psx_scraper import close_psx_scraper
+from app.services.market_history import record_index_snapshot
+from app.services.company_universe import get_company_universe
+from app.services.market_stream import get_market_stream, publish_market_snapshot
+from app.db import close_engine, get_pool_status
+from app.api.metrics import PrometheusMiddleware, metrics_response
+from app.api.profiling import ProfilingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    # Warm the Redis connection pool before the first request
+    await get_cache_service()
+    # One Redis subscription per worker feeds every SSE/WebSocket client, and
+    # the company universe, whichever replica or process runs the poll
+    get_market_stream().add_listener(get_company_universe().on_market_snapshot)
+    await get_market_stream().start()
+    # Poll PSX in the background so requests only read the cache
+    poller = get_market_poller()
+    if poller_enabled():
+        poller.add_sink(record_index_snapshot)
+        poller.add_sink(publish_market_snapshot)
+        poller.start()
+    yield
+    await poller.stop()
+    await get_market_stream().stop()
+    await close_psx_scraper()
+    await close_cache_service()
+    await close_engine()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="StockGenie API",
@@ -15,6 +50,9 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    # orjson-encoded bodies for every route that returns models/dicts
+    default_response_class=ORJSONResponse,
 )
 
 # CORS configuration
@@ -31,6 +69,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing spans and sampled profiler dumps (PROFILE_MODE, off by default)
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so latency includes CORS handling
+app.add_middleware(PrometheusMiddleware)
+
 
 @app.get("/")
 async def root():
@@ -55,14 +99,33 @@ async def health_check():
     }
 
 
+@app.get("/api/v1/health/db")
+async def database_pool_status():
+    """Database connection pool metrics (occupancy and lifetime counters)"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "pool": get_pool_status(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
+
+
 # Include routers
 from app.api.v1.index import router as index_router
 from app.api.v1.sectors import router as sectors_router
 from app.api.v1.companies import router as companies_router
+from app.api.v1.stream import router as stream_router
+from app.api.v1.chat import router as chat_router
 
 app.include_router(index_router, prefix="/api/v1")
 app.include_router(sectors_router, prefix="/api/v1")
 app.include_router(companies_router, prefix="/api/v1")
+app.include_router(stream_router, prefix="/api/v1")
+app.include_router(chat_router, prefix="/api/v1")
 
 
 @app.get("/api/v1/ping")
@@ -74,7 +137,7 @@ async def ping():
 # Exception handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={
             "error": "Not Found",
@@ -86,7 +149,7 @@ async def not_found_handler(request, exc):
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
@@ -4,6 +4,7 @@ Models package
 from app.models.base import Base
 from app.models.sector import Sector
 from app.models.stock import Stock, StockPrice
+from app.models.index import IndexPrice
 
-__all__ = ["Base", "Sector", "Stock", "StockPrice"]
+__all__ = ["Base", "Sector", "Stock", "StockPrice", "IndexPrice"]
 
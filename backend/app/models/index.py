@@ -0,0 +1,27 @@
+"""
+IndexPrice model
+"""
+from sqlalchemy import Column, String, Numeric, BigInteger, DateTime, func
+from app.models.base import Base
+
+
+class IndexPrice(Base):
+    """
+    Point-in-time index snapshots (TimescaleDB hypertable)
+
+    volume is the cumulative session volume at the snapshot, so daily
+    aggregates take the last value rather than a sum.
+    """
+    __tablename__ = "index_prices"
+
+    symbol = Column(String(20), primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+    open = Column(Numeric(12, 2))
+    high = Column(Numeric(12, 2))
+    low = Column(Numeric(12, 2))
+    close = Column(Numeric(12, 2))
+    volume = Column(BigInteger)
+    created_at = Column(DateTime, server_default=func.now())
+
+    def __repr__(self):
+        return f"<IndexPrice(symbol='{self.symbol}', timestamp={self.timestamp}, close={self.close})>"
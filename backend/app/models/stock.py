@@ -1,9 +1,10 @@
 """
 Stock and StockPrice models
 """
-from sqlalchemy import Column, Integer, String, Numeric, BigInteger, DateTime, Date, ForeignKey, func, Index
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Date, ForeignKey, func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
+from app.models.types import ScaledPrice
 
 
 class Stock(Base):
@@ -27,26 +28,28 @@ class Stock(Base):
 
 
 class StockPrice(Base):
+    """
+    OHLCV bars (TimescaleDB hypertable partitioned on timestamp)
+
+    The (stock_id, timestamp) primary key serves per-symbol range scans and
+    TimescaleDB keeps its own timestamp index for cross-symbol time scans,
+    so no other indexes are maintained on this insert-heavy table. Prices
+    are stored as integer paisa (see ScaledPrice).
+    """
     __tablename__ = "stock_prices"
 
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False, index=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
-    open = Column(Numeric(10, 2))
-    high = Column(Numeric(10, 2))
-    low = Column(Numeric(10, 2))
-    close = Column(Numeric(10, 2))
+    # TimescaleDB requires the time column in every unique index
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+    open = Column(ScaledPrice())
+    high = Column(ScaledPrice())
+    low = Column(ScaledPrice())
+    close = Column(ScaledPrice())
     volume = Column(BigInteger)
-    created_at = Column(DateTime, server_default=func.now())
-
-    # Composite index for efficient queries
-    __table_args__ = (
-        Index('idx_stock_prices_stock_timestamp', 'stock_id', 'timestamp'),
-    )
 
     # Relationships
     stock = relationship("Stock", backref="prices")
 
     def __repr__(self):
-        return f"<StockPrice(id={self.id}, stock_id={self.stock_id}, timestamp={self.timestamp}, close={self.close})>"
+        return f"<StockPrice(stock_id={self.stock_id}, timestamp={self.timestamp}, close={self.close})>"
 
@@ -0,0 +1,38 @@
+"""
+Custom column types
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+
+class ScaledPrice(TypeDecorator):
+    """
+    Price stored as a scaled integer (paisa by default)
+
+    4-byte INTEGER instead of variable-length NUMERIC: smaller rows and
+    integer aggregation in the database, while Python code still gets exact
+    Decimal rupee values back.
+
+    Values with more decimals than `scale` are rounded half away from zero
+    (ROUND_HALF_UP), the same as PostgreSQL round(numeric) used by the
+    lean_stock_prices migration, not Python's round() (half to even).
+    None passes through both ways, so nullable OHLC columns stay NULL.
+    """
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, scale: int = 2):
+        super().__init__()
+        self.scale = scale
+        self.factor = 10 ** scale
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int((Decimal(str(value)) * self.factor).to_integral_value(rounding=ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-self.scale)
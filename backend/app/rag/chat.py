@@ -0,0 +1,294 @@
+"""
+Report Chat
+Question -> statement lookup | semantic cache -> retrieval -> answer generation
+
+    AnswerGenerator        turns a question and retrieved chunks into an answer
+      OpenAIGenerator      OPENAI_MODEL chat completion (needs the openai package)
+      ExtractiveGenerator  quotes the best-matching chunks, no LLM (offline/tests)
+    ChatService            the chain behind POST /api/v1/chat
+
+Numeric questions ("FCCL revenue 2023") are answered from the financial
+statement tables (app.rag.structured) before anything is embedded.
+Otherwise the question is embedded once and the vector is reused for both
+the semantic cache lookup and the index search. Index loading, retrieval
+and generation are blocking and run in a worker thread.
+"""
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+import asyncio
+import logging
+import os
+import re
+import time
+
+from app.rag.embeddings import get_embedding_backend
+from app.rag.ingestion import DEFAULT_PROCESSED_DIR
+from app.rag.lexical_index import DEFAULT_LEXICAL_DIR, load_lexical_index
+from app.rag.retriever import HybridRetriever, RetrievedChunk, VectorRetriever
+from app.rag.semantic_cache import SemanticCache, get_semantic_cache
+from app.rag.structured import StructuredAnswerer
+from app.rag.vector_index import DEFAULT_INDEX_DIR, load_index
+from app.services.profiling import span
+
+try:
+    import openai
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+
+class GeneratedAnswer(NamedTuple):
+    answer: str
+    confidence: float
+    tokens_used: int
+
+
+class AnswerGenerator:
+    """Answers a question from retrieved chunks"""
+
+    name = "base"
+
+    def generate(self, question: str, chunks: List[RetrievedChunk]) -> GeneratedAnswer:
+        raise NotImplementedError
+
+
+class OpenAIGenerator(AnswerGenerator):
+    name = "openai"
+
+    SYSTEM_PROMPT = (
+        "You answer questions about Pakistan Stock Exchange companies using only the "
+        "annual and quarterly report excerpts provided. Cite figures exactly as written, "
+        "mention the reporting period, and say so if the excerpts do not contain the answer."
+    )
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+        if not OPENAI_AVAILABLE:
+            raise ImportError("openai answer generator requires the openai package")
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.client = openai.OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+
+    def generate(self, question: str, chunks: List[RetrievedChunk]) -> GeneratedAnswer:
+        context = "\n\n".join(
+            f"[{n}] {chunk.doc_id}, page {chunk.page}:\n{chunk.text}" for n, chunk in enumerate(chunks, 1)
+        )
+        response = self.client.chat.completions.create(
+            model=self.model,
+            temperature=0,
+            messages=[
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": f"Excerpts:\n{context}\n\nQuestion: {question}"},
+            ],
+        )
+        confidence = max((chunk.score for chunk in chunks), default=0.0)
+        return GeneratedAnswer(
+            answer=response.choices[0].message.content.strip(),
+            confidence=round(confidence, 4),
+            tokens_used=response.usage.total_tokens if response.usage else 0,
+        )
+
+
+class ExtractiveGenerator(AnswerGenerator):
+    """Returns the sentences sharing the most words with the question"""
+
+    name = "extractive"
+
+    def __init__(self, max_sentences: int = 3):
+        self.max_sentences = max_sentences
+
+    def generate(self, question: str, chunks: List[RetrievedChunk]) -> GeneratedAnswer:
+        terms = set(_WORD.findall(question.lower()))
+        scored = []
+        for rank, chunk in enumerate(chunks):
+            for sentence in _SENTENCE.split(chunk.text):
+                overlap = len(terms & set(_WORD.findall(sentence.lower())))
+                if overlap:
+                    scored.append((-overlap, rank, sentence.strip()))
+        if not scored:
+            return GeneratedAnswer("No relevant passages found in the indexed reports.", 0.0, 0)
+        best = [sentence for _, _, sentence in sorted(scored)[: self.max_sentences]]
+        confidence = max((chunk.score for chunk in chunks), default=0.0)
+        return GeneratedAnswer(" ".join(best), round(confidence, 4), 0)
+
+
+ANSWER_GENERATORS: Dict[str, Type[AnswerGenerator]] = {
+    "openai": OpenAIGenerator,
+    "extractive": ExtractiveGenerator,
+}
+
+
+def get_answer_generator(name: Optional[str] = None) -> AnswerGenerator:
+    """Generator by name (see ANSWER_GENERATORS), default CHAT_GENERATOR or openai"""
+    name = name or os.getenv("CHAT_GENERATOR", "openai")
+    try:
+        return ANSWER_GENERATORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown answer generator: {name} (choose from {', '.join(ANSWER_GENERATORS)})")
+
+
+class IndexNotReady(RuntimeError):
+    """No vector index has been built yet"""
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class ChatService:
+    """
+    Structured lookup, then semantic cache, then retrieval + generation
+
+    Numeric statement questions are answered by StructuredAnswerer without
+    the index. The vector index (plus the BM25 index, when built, for
+    hybrid retrieval), embedding backend and generator are loaded on first
+    use, so the API starts without them. A rebuilt index is picked up on the
+    first question after it lands (checked at most every index_check_seconds),
+    which also retires answers cached against the old one; loading happens in
+    a worker thread, one reload at a time.
+    """
+
+    def __init__(
+        self,
+        index_dir: Path = DEFAULT_INDEX_DIR,
+        processed_dir: Path = DEFAULT_PROCESSED_DIR,
+        lexical_dir: Path = DEFAULT_LEXICAL_DIR,
+        semantic_cache: Optional[SemanticCache] = None,
+        generator: Optional[AnswerGenerator] = None,
+        structured: Optional[StructuredAnswerer] = None,
+        index_check_seconds: float = 1.0,
+    ):
+        self.index_dir = Path(index_dir)
+        self.processed_dir = Path(processed_dir)
+        self.lexical_dir = Path(lexical_dir)
+        self.semantic_cache = semantic_cache if semantic_cache is not None else get_semantic_cache()
+        self.structured = structured if structured is not None else StructuredAnswerer()
+        self._generator = generator
+        self.index_check_seconds = index_check_seconds
+        self._retriever: Optional[VectorRetriever] = None
+        self._index_mtimes: Tuple[Optional[float], Optional[float]] = (None, None)
+        self._index_checked_at = 0.0
+        self._reload_lock = asyncio.Lock()
+        # Lifetime counters by answer path (exported by app.services.metrics)
+        self.structured_answers = 0
+        self.cached_answers = 0
+        self.retrieved_answers = 0
+
+    def _load_retriever(self) -> VectorRetriever:
+        """Current retriever, reloading the indexes if they were rebuilt (blocking)"""
+        # Index saves swap a symlink to a new version, so a new meta.json means a new index
+        mtimes = (_mtime(self.index_dir / "meta.json"), _mtime(self.lexical_dir / "meta.json"))
+        if mtimes[0] is None:
+            raise IndexNotReady(f"No vector index in {self.index_dir}; run scripts/embed_chunks.py --build-index")
+        if self._retriever is None or mtimes != self._index_mtimes:
+            try:
+                index = load_index(self.index_dir)
+                lexical = load_lexical_index(self.lexical_dir) if mtimes[1] is not None else None
+            except (OSError, ValueError) as e:
+                # e.g. an index saved by an older version being replaced mid-read
+                if self._retriever is None:
+                    raise IndexNotReady(f"Could not load the index in {self.index_dir}: {e}") from e
+                logger.warning(f"⚠️  Keeping the current index, reload failed: {e}")
+                self._index_checked_at = time.monotonic()
+                return self._retriever
+            if lexical is not None:
+                self._retriever = HybridRetriever(index, lexical, get_embedding_backend(), self.processed_dir)
+            else:
+                self._retriever = VectorRetriever(index, get_embedding_backend(), self.processed_dir)
+            self._index_mtimes = mtimes
+            logger.info(f"📇 Loaded {type(self._retriever).__name__} over {len(index):,} chunks ({self._retriever.version})")
+        self._index_checked_at = time.monotonic()
+        return self._retriever
+
+    async def get_retriever(self) -> VectorRetriever:
+        """
+        Current retriever, checking for a rebuilt index off the event loop
+
+        Raises:
+            IndexNotReady: No vector index has been built
+        """
+        retriever = self._retriever
+        if retriever is not None and time.monotonic() - self._index_checked_at < self.index_check_seconds:
+            return retriever
+        async with self._reload_lock:
+            return await asyncio.to_thread(self._load_retriever)
+
+    @property
+    def generator(self) -> AnswerGenerator:
+        if self._generator is None:
+            self._generator = get_answer_generator()
+        return self._generator
+
+    def _retrieve_and_generate(
+        self, retriever: VectorRetriever, question: str, symbol: Optional[str], limit: int, vector
+    ) -> Dict:
+        chunks = retriever.retrieve(question, limit=limit, symbol=symbol, query_vector=vector)
+        generated = self.generator.generate(question, chunks)
+        return {
+            "answer": generated.answer,
+            "sources": [chunk.source() for chunk in chunks],
+            "confidence": generated.confidence,
+            "tokens_used": generated.tokens_used,
+        }
+
+    async def answer(self, question: str, symbol: Optional[str] = None, limit: int = 5) -> Dict:
+        """
+        Answer a question about a company's financials or reports
+
+        Returns:
+            {"answer", "sources", "confidence", "tokens_used", "answered_by", "cached", "similarity"}
+            where answered_by is "statements", "cache" or "retrieval"
+        """
+        symbol = symbol.upper() if symbol else None
+
+        with span("structured"):
+            structured = self.structured.answer(question, symbol)
+        if structured is not None:
+            self.structured_answers += 1
+            return {**structured, "answered_by": "statements", "cached": False, "similarity": None}
+
+        retriever = await self.get_retriever()
+        version = retriever.version
+
+        mentions, years = self.structured.mentions(question)
+        with span("embed"):
+            vector = await asyncio.to_thread(retriever.embed_query, question)
+        with span("semantic_cache"):
+            cached = await self.semantic_cache.lookup(vector, symbol, version, limit, mentions, years)
+        if cached is not None:
+            self.cached_answers += 1
+            return {
+                "answer": cached["answer"],
+                "sources": cached["sources"],
+                "confidence": cached["confidence"],
+                "tokens_used": 0,
+                "answered_by": "cache",
+                "cached": True,
+                "similarity": round(cached["similarity"], 4),
+            }
+
+        with span("rag"):
+            result = await asyncio.to_thread(self._retrieve_and_generate, retriever, question, symbol, limit, vector)
+        self.retrieved_answers += 1
+        await self.semantic_cache.store(
+            question, vector, result["answer"], result["sources"], symbol, version, limit, result["confidence"],
+            mentions, years,
+        )
+        return {**result, "answered_by": "retrieval", "cached": False, "similarity": None}
+
+
+# Singleton instance
+_chat_service: Optional[ChatService] = None
+
+def get_chat_service() -> ChatService:
+    """Get or create the process-wide chat service"""
+    global _chat_service
+    if _chat_service is None:
+        _chat_service = ChatService()
+    return _chat_service
@@ -0,0 +1,114 @@
+"""
+Text Chunking
+Incremental fixed-size chunker with overlap for page-streamed documents
+
+Text is fed one page at a time and chunks are emitted as soon as enough text
+has accumulated, so only about one chunk plus one page is buffered however
+long the document is. Chunks may span pages; each records the page it starts
+on and the page it ends on.
+"""
+from typing import Iterator, List, NamedTuple, Tuple
+
+CHUNK_SIZE = 1000  # characters (docs/ARCHITECTURE.md: chunk_size=1000, overlap=200)
+CHUNK_OVERLAP = 200
+
+# Preferred cut points, best first; a cut is only taken in the back half of a chunk
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+class Chunk(NamedTuple):
+    index: int
+    text: str
+    page: int
+    page_end: int
+
+
+class TextChunker:
+    """
+    Splits a stream of page texts into overlapping chunks
+
+        chunker = TextChunker()
+        for page_number, text in pages:
+            yield from chunker.feed(text, page_number)
+        yield from chunker.finish()
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP):
+        if not 0 <= overlap < chunk_size:
+            raise ValueError("overlap must be >= 0 and smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._buffer = ""
+        # (offset in buffer, page number) where each buffered page starts
+        self._pages: List[Tuple[int, int]] = []
+        # Leading buffer characters already emitted as overlap
+        self._carried = 0
+        self._count = 0
+
+    def feed(self, text: str, page: int) -> Iterator[Chunk]:
+        """Add one page of text; yields every chunk that is now complete"""
+        text = text.strip()
+        if not text:
+            return
+        if self._buffer:
+            self._buffer += "\n\n"
+        self._pages.append((len(self._buffer), page))
+        self._buffer += text
+        while len(self._buffer) > self.chunk_size:
+            yield self._emit(self._cut())
+
+    def finish(self) -> Iterator[Chunk]:
+        """Flush the remaining text as a final chunk"""
+        # Skip a tail that is nothing but the previous chunk's overlap
+        if self._buffer[self._carried:].strip():
+            yield self._emit(len(self._buffer))
+        self._buffer = ""
+        self._pages = []
+        self._carried = 0
+
+    def _cut(self) -> int:
+        """Chunk end offset: the last good separator in the back half of the window"""
+        window = self._buffer[: self.chunk_size]
+        # Past the overlap too, so every chunk consumes new text
+        earliest = max(self.chunk_size // 2, self.overlap + 1)
+        for separator in SEPARATORS:
+            position = window.rfind(separator)
+            if position + len(separator) >= earliest:
+                return position + len(separator)
+        return self.chunk_size
+
+    def _page_at(self, offset: int) -> int:
+        page = self._pages[0][1]
+        for start, number in self._pages:
+            if start > offset:
+                break
+            page = number
+        return page
+
+    def _emit(self, end: int) -> Chunk:
+        chunk = Chunk(
+            index=self._count,
+            text=self._buffer[:end].strip(),
+            page=self._page_at(0),
+            page_end=self._page_at(max(end - 1, 0)),
+        )
+        self._count += 1
+
+        # Carry the overlap into the next chunk, starting on a word boundary
+        start = end
+        if self.overlap:
+            start = max(end - self.overlap, 0)
+            space = self._buffer.find(" ", start, end)
+            if space != -1:
+                start = space + 1
+        self._buffer = self._buffer[start:]
+        self._carried = end - start
+
+        pages: List[Tuple[int, int]] = []
+        for offset, number in self._pages:
+            if offset <= start:
+                pages = [(0, number)]
+            else:
+                pages.append((offset - start, number))
+        self._pages = pages
+        return chunk
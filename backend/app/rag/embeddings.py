@@ -0,0 +1,366 @@
+"""
+Chunk Embeddings
+Content-addressed embedding cache in front of a pluggable embedding backend
+
+    EmbeddingBackend     turns a batch of texts into float32 vectors
+      OpenAIEmbedder     text-embedding-3-small (needs the openai package)
+      HashingEmbedder    deterministic, offline feature-hashing stand-in
+    EmbeddingStore       append-only float32 vectors (np.memmap) + key index
+    CachedEmbedder       dedupes against the store, batches misses
+
+Vectors are keyed by blake2b(model + normalized text), so the same chunk
+text is only ever embedded once per model, whichever report it came from.
+
+Store layout (one directory per model under data/embeddings):
+    meta.json      {"model", "dimension"}
+    vectors.f32    row-major float32, one row per key
+    keys.bin       16-byte keys in row order (the offset index)
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+import polars as pl
+
+from app.rag.ingestion import BACKEND_DIR, CHUNKS_DIRNAME, DEFAULT_PROCESSED_DIR
+
+try:
+    import openai
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDINGS_DIR = BACKEND_DIR.parent / "data" / "embeddings"
+KEY_BYTES = 16
+DEFAULT_BATCH_SIZE = 512
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for both the cache key and the embedded input"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def content_key(normalized: str, model: str) -> bytes:
+    """16-byte cache key for already-normalized text under a model"""
+    return hashlib.blake2b(f"{model}\0{normalized}".encode(), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingBackend:
+    """Embeds batches of (normalized) texts"""
+
+    name = "base"
+    model = "base"
+    dimension = 0
+    # Largest batch sent in one call, in texts and (if limited) in tokens
+    max_batch_size = DEFAULT_BATCH_SIZE
+    max_batch_tokens: Optional[int] = None
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """float32 array of shape (len(texts), dimension)"""
+        raise NotImplementedError
+
+    def count_tokens(self, text: str) -> int:
+        """Upper-bound token estimate used for batching (~3 characters per token)"""
+        return len(text) // 3 + 1
+
+
+class OpenAIEmbedder(EmbeddingBackend):
+    name = "openai"
+    # The embeddings endpoint accepts up to 2048 inputs and 300k tokens per request;
+    # the token budget leaves headroom for estimation error without tiktoken
+    max_batch_size = 2048
+    max_batch_tokens = 250_000
+
+    DIMENSIONS = {"text-embedding-3-small": 1536, "text-embedding-3-large": 3072, "text-embedding-ada-002": 1536}
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+        if not OPENAI_AVAILABLE:
+            raise ImportError("openai embedding backend requires the openai package")
+        self.model = model or os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+        if self.model not in self.DIMENSIONS:
+            raise ValueError(f"Unknown embedding model: {self.model}")
+        self.dimension = self.DIMENSIONS[self.model]
+        self.client = openai.OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self._encoding = tiktoken.encoding_for_model(self.model) if TIKTOKEN_AVAILABLE else None
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is None:
+            return super().count_tokens(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        # Results carry their input index; do not rely on response order
+        ordered = sorted(response.data, key=lambda item: item.index)
+        return np.asarray([item.embedding for item in ordered], dtype=np.float32)
+
+
+class HashingEmbedder(EmbeddingBackend):
+    """
+    Signed feature hashing of lowercased unigrams and bigrams, L2-normalized
+
+    Deterministic and dependency-free: for tests and offline runs. Texts that
+    share words get similar vectors, which is enough to exercise retrieval.
+    """
+
+    name = "hashing"
+    max_batch_size = 4096
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.model = f"hashing-{dimension}"
+
+    def _features(self, text: str) -> Iterator[str]:
+        tokens = _TOKEN.findall(text.lower())
+        yield from tokens
+        for first, second in zip(tokens, tokens[1:]):
+            yield f"{first} {second}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vectors[row, digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+EMBEDDING_BACKENDS: Dict[str, Type[EmbeddingBackend]] = {
+    "openai": OpenAIEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+
+def get_embedding_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    """Backend by name (see EMBEDDING_BACKENDS), default EMBEDDING_BACKEND or openai"""
+    name = name or os.getenv("EMBEDDING_BACKEND", "openai")
+    try:
+        return EMBEDDING_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend: {name} (expected one of {', '.join(EMBEDDING_BACKENDS)})")
+
+
+class EmbeddingStore:
+    """
+    Append-only, memory-mapped embedding table for one model
+
+    Single writer: run one ingestion process per store at a time. Readers
+    see rows appended by this instance immediately; other processes see
+    them after reopening.
+    """
+
+    def __init__(self, directory: Path, model: str, dimension: int):
+        self.directory = Path(directory)
+        self.model = model
+        self.dimension = dimension
+        self.vectors_path = self.directory / "vectors.f32"
+        self.keys_path = self.directory / "keys.bin"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._check_meta()
+        self._index: Dict[bytes, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._load()
+
+    @classmethod
+    def for_backend(cls, backend: EmbeddingBackend, root: Path = DEFAULT_EMBEDDINGS_DIR) -> "EmbeddingStore":
+        """Store in root/<model> for the backend's model and dimension"""
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", backend.model)
+        return cls(Path(root) / slug, backend.model, backend.dimension)
+
+    def _check_meta(self) -> None:
+        meta_path = self.directory / "meta.json"
+        meta = {"model": self.model, "dimension": self.dimension}
+        if meta_path.exists():
+            stored = json.loads(meta_path.read_text())
+            if stored != meta:
+                raise ValueError(f"Embedding store {self.directory} holds {stored}, not {meta}")
+        else:
+            meta_path.write_text(json.dumps(meta))
+
+    def _load(self) -> None:
+        """Rebuild the key index, dropping a torn tail from an interrupted append"""
+        row_bytes = self.dimension * 4
+        key_rows = self.keys_path.stat().st_size // KEY_BYTES if self.keys_path.exists() else 0
+        vector_rows = self.vectors_path.stat().st_size // row_bytes if self.vectors_path.exists() else 0
+        rows = min(key_rows, vector_rows)
+        for path, size in ((self.keys_path, rows * KEY_BYTES), (self.vectors_path, rows * row_bytes)):
+            if path.exists() and path.stat().st_size != size:
+                os.truncate(path, size)
+
+        if rows:
+            keys = np.fromfile(self.keys_path, dtype=f"V{KEY_BYTES}", count=rows)
+            self._index = {key.tobytes(): row for row, key in enumerate(keys)}
+        self._vectors = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._index
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Every stored vector, (len(self), dimension), memory-mapped read-only"""
+        if self._vectors is None or len(self._vectors) != len(self._index):
+            if not self._index:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._index), self.dimension)
+            )
+        return self._vectors
+
+    def rows(self, keys: Iterable[bytes]) -> List[Optional[int]]:
+        """Row number of each key, None if absent"""
+        return [self._index.get(key) for key in keys]
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """{key: vector} for the keys present"""
+        present = [(key, row) for key, row in zip(keys, self.rows(keys)) if row is not None]
+        if not present:
+            return {}
+        block = self.vectors[[row for _, row in present]]
+        return {key: block[i] for i, (key, _) in enumerate(present)}
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Append new vectors; keys already stored are ignored"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(keys), self.dimension):
+            raise ValueError(f"Expected vectors of shape ({len(keys)}, {self.dimension}), got {vectors.shape}")
+        fresh = [i for i, key in enumerate(keys) if key not in self._index]
+        if not fresh:
+            return
+        # Vectors first: a crash between the writes leaves rows without keys, trimmed on load
+        with open(self.vectors_path, "ab") as f:
+            f.write(vectors[fresh].tobytes())
+        with open(self.keys_path, "ab") as f:
+            f.write(b"".join(keys[i] for i in fresh))
+        start = len(self._index)
+        for offset, i in enumerate(fresh):
+            self._index[keys[i]] = start + offset
+        self._vectors = None
+
+
+class CachedEmbedder:
+    """
+    Embeds texts through an EmbeddingStore
+
+    Each embed() call normalizes and hashes its texts, dedupes them, looks
+    them up in the store and sends only the misses to the backend in
+    batches of up to batch_size texts and the backend's max_batch_tokens.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, store: Optional[EmbeddingStore] = None, batch_size: Optional[int] = None):
+        self.backend = backend
+        self.store = store if store is not None else EmbeddingStore.for_backend(backend)
+        self.batch_size = min(batch_size or backend.max_batch_size, backend.max_batch_size)
+        self.hits = 0
+        self.misses = 0
+        self.backend_calls = 0
+
+    @property
+    def dimension(self) -> int:
+        return self.backend.dimension
+
+    def keys(self, texts: Iterable[str]) -> List[bytes]:
+        """Cache keys of texts under this embedder's model"""
+        return [content_key(normalize_text(text), self.backend.model) for text in texts]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """float32 array of shape (len(texts), dimension), in input order"""
+        normalized = [normalize_text(text) for text in texts]
+        keys = [content_key(text, self.backend.model) for text in normalized]
+
+        unique: Dict[bytes, str] = {}
+        for key, text in zip(keys, normalized):
+            unique.setdefault(key, text)
+        found = self.store.get_many(list(unique))
+        missing = [key for key in unique if key not in found]
+        self.hits += len(unique) - len(missing)
+        self.misses += len(missing)
+
+        for batch in self._batches(missing, unique):
+            vectors = self.backend.embed([unique[key] for key in batch])
+            self.backend_calls += 1
+            self.store.put_many(batch, vectors)
+            found.update(zip(batch, vectors))
+
+        if not keys:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.stack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+    def _batches(self, keys: List[bytes], texts: Dict[bytes, str]) -> Iterator[List[bytes]]:
+        """Consecutive runs of keys within both the count and the token limit"""
+        budget = self.backend.max_batch_tokens
+        batch: List[bytes] = []
+        tokens = 0
+        for key in keys:
+            cost = self.backend.count_tokens(texts[key]) if budget else 0
+            if batch and (len(batch) >= self.batch_size or (budget and tokens + cost > budget)):
+                yield batch
+                batch, tokens = [], 0
+            batch.append(key)
+            tokens += cost
+        if batch:
+            yield batch
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Vector for one text"""
+        return self.embed([text])[0]
+
+
+def get_cached_embedder(backend: Optional[str] = None, root: Path = DEFAULT_EMBEDDINGS_DIR) -> CachedEmbedder:
+    """CachedEmbedder over the named backend with its store under root"""
+    embedding_backend = get_embedding_backend(backend)
+    return CachedEmbedder(embedding_backend, EmbeddingStore.for_backend(embedding_backend, root))
+
+
+def embed_corpus(
+    embedder: CachedEmbedder,
+    processed_dir: Path = DEFAULT_PROCESSED_DIR,
+    batch_rows: int = 8192,
+) -> Dict:
+    """
+    Embed every ingested chunk, one parquet part and batch_rows texts at a time
+
+    Returns:
+        {"chunks", "embedded", "cached", "backend_calls", "seconds", "chunks_per_sec"}
+    """
+    started = time.perf_counter()
+    hits, misses, calls = embedder.hits, embedder.misses, embedder.backend_calls
+    chunks = 0
+    for part in sorted((Path(processed_dir) / CHUNKS_DIRNAME).glob("*.parquet")):
+        texts = pl.read_parquet(part, columns=["text"])["text"]
+        for start in range(0, len(texts), batch_rows):
+            batch = texts.slice(start, batch_rows).to_list()
+            embedder.embed(batch)
+            chunks += len(batch)
+
+    seconds = time.perf_counter() - started
+    return {
+        "chunks": chunks,
+        "embedded": embedder.misses - misses,
+        "cached": embedder.hits - hits,
+        "backend_calls": embedder.backend_calls - calls,
+        "seconds": seconds,
+        "chunks_per_sec": chunks / seconds if seconds else 0.0,
+    }
@@ -0,0 +1,382 @@
+"""
+Annual Report Ingestion
+PDF (data/raw) -> page text (PyMuPDF) -> chunks -> parquet (data/processed)
+
+Reports are processed in parallel, one document per worker process. Each
+worker reads its PDF page by page and streams the text through TextChunker,
+flushing chunks to parquet every flush_rows chunks, so memory stays flat
+however long the report is.
+
+Output layout under processed_dir:
+    chunks/{doc_id}-{part:03d}.parquet   one or more parts per report
+    manifest.json                        source file -> hash, size, mtime, stats
+
+doc_id is a prefix of the file's SHA-256, so re-running skips reports whose
+content has not changed (size+mtime are checked first to avoid re-hashing).
+With prune=True (a full scan of the raw directory) reports that are no
+longer there lose their manifest entry and chunk parts, so they drop out of
+the corpus and of every index built from it.
+
+Workers are started with the spawn method: forking after polars (and its
+thread pool) has been imported can deadlock the children.
+Filenames carry the metadata: {SYMBOL}_{Annual|Quarterly}_{YYYY[-MM-DD]}.pdf
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+
+import polars as pl
+
+from app.rag.chunking import CHUNK_OVERLAP, CHUNK_SIZE, TextChunker
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF < 1.24.3 only ships the fitz name
+    import fitz as pymupdf
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_RAW_DIR = BACKEND_DIR.parent / "data" / "raw"
+DEFAULT_PROCESSED_DIR = BACKEND_DIR.parent / "data" / "processed"
+
+CHUNKS_DIRNAME = "chunks"
+MANIFEST_FILENAME = "manifest.json"
+DEFAULT_FLUSH_ROWS = 1000
+# Most PSX-listed companies close their financial year on 30 June
+DEFAULT_FISCAL_YEAR_END = "06-30"
+
+CHUNK_SCHEMA = {
+    "doc_id": pl.Utf8,
+    "source": pl.Utf8,
+    "symbol": pl.Utf8,
+    "document_type": pl.Utf8,
+    "period_end": pl.Date,
+    "chunk_index": pl.Int32,
+    "page": pl.Int32,
+    "page_end": pl.Int32,
+    "text": pl.Utf8,
+}
+
+_REPORT_NAME = re.compile(
+    r"^(?P<symbol>[A-Za-z0-9]+)[_\- ]+(?:(?P<type>annual|quarterly|q[1-4]|half[_\- ]?year(?:ly)?)[_\- ]+)?"
+    r"(?:fy)?(?P<year>\d{4})(?:-(?P<month>\d{2})-(?P<day>\d{2}))?",
+    re.IGNORECASE,
+)
+
+
+def parse_report_name(path: Path, fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END) -> Dict:
+    """
+    Metadata from a report filename such as FCCL_Annual_2023.pdf or
+    HBL_Quarterly_2024-03-31.pdf; a bare year means that year's fiscal_year_end
+    """
+    match = _REPORT_NAME.match(path.stem)
+    if not match:
+        return {"symbol": None, "document_type": "annual_report", "period_end": None}
+
+    kind = (match["type"] or "annual").lower()
+    document_type = "annual_report" if kind == "annual" else "quarterly_report"
+    year = int(match["year"])
+    if match["month"]:
+        period_end = date(year, int(match["month"]), int(match["day"]))
+    else:
+        month, day = (int(part) for part in fiscal_year_end.split("-"))
+        period_end = date(year, month, day)
+    return {"symbol": match["symbol"].upper(), "document_type": document_type, "period_end": period_end}
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Content hash, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_page_text(path: Path) -> Iterator[Tuple[int, str]]:
+    """(1-based page number, text) for each page, one page in memory at a time"""
+    with pymupdf.open(path) as document:
+        for page in document:
+            yield page.number + 1, page.get_text("text")
+
+
+def _write_part(rows: Dict[str, list], chunks_dir: Path, doc_id: str, part: int) -> None:
+    """Write one parquet part atomically (temp file + rename)"""
+    frame = pl.DataFrame(rows, schema=CHUNK_SCHEMA)
+    target = chunks_dir / f"{doc_id}-{part:03d}.parquet"
+    temporary = target.with_suffix(".parquet.tmp")
+    frame.write_parquet(temporary, compression="zstd")
+    os.replace(temporary, target)
+
+
+def process_report(
+    path: str,
+    doc_id: str,
+    metadata: Dict,
+    chunks_dir: str,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+    flush_rows: int = DEFAULT_FLUSH_ROWS,
+) -> Dict:
+    """
+    Extract, chunk and write one report (runs in a worker process)
+
+    Returns:
+        {"pages", "chunks", "parts", "characters", "seconds"}
+    """
+    started = time.perf_counter()
+    source = Path(path)
+    out_dir = Path(chunks_dir)
+    chunker = TextChunker(chunk_size=chunk_size, overlap=overlap)
+    constant = {
+        "doc_id": doc_id,
+        "source": source.name,
+        "symbol": metadata["symbol"],
+        "document_type": metadata["document_type"],
+        "period_end": metadata["period_end"],
+    }
+    rows: Dict[str, list] = {name: [] for name in CHUNK_SCHEMA}
+    stats = {"pages": 0, "chunks": 0, "parts": 0, "characters": 0}
+
+    def add(chunks: Iterable) -> None:
+        for chunk in chunks:
+            for name, value in constant.items():
+                rows[name].append(value)
+            rows["chunk_index"].append(chunk.index)
+            rows["page"].append(chunk.page)
+            rows["page_end"].append(chunk.page_end)
+            rows["text"].append(chunk.text)
+            stats["chunks"] += 1
+            if len(rows["text"]) >= flush_rows:
+                flush()
+
+    def flush() -> None:
+        if rows["text"]:
+            _write_part(rows, out_dir, doc_id, stats["parts"])
+            stats["parts"] += 1
+            for values in rows.values():
+                values.clear()
+
+    for number, text in iter_page_text(source):
+        stats["pages"] += 1
+        stats["characters"] += len(text)
+        add(chunker.feed(text, number))
+    add(chunker.finish())
+    flush()
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+class ReportIngestor:
+    """
+    Incremental ingestion of a directory of PDF reports
+
+    The manifest is only read and written by the parent process; workers
+    just return stats for the report they processed.
+    """
+
+    def __init__(
+        self,
+        processed_dir: Path = DEFAULT_PROCESSED_DIR,
+        workers: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+        overlap: int = CHUNK_OVERLAP,
+        flush_rows: int = DEFAULT_FLUSH_ROWS,
+        fiscal_year_end: str = DEFAULT_FISCAL_YEAR_END,
+    ):
+        self.processed_dir = Path(processed_dir)
+        self.chunks_dir = self.processed_dir / CHUNKS_DIRNAME
+        self.manifest_path = self.processed_dir / MANIFEST_FILENAME
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.flush_rows = flush_rows
+        self.fiscal_year_end = fiscal_year_end
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self.manifest_path.exists():
+            return json.loads(self.manifest_path.read_text())
+        return {}
+
+    def _save_manifest(self) -> None:
+        temporary = self.manifest_path.with_suffix(".json.tmp")
+        temporary.write_text(json.dumps(self.manifest, indent=2, sort_keys=True, default=str))
+        os.replace(temporary, self.manifest_path)
+
+    def _remove_parts(self, doc_id: str) -> None:
+        for part in self.chunks_dir.glob(f"{doc_id}-*.parquet"):
+            part.unlink()
+
+    def prune(self, present: Iterable[str]) -> List[Dict]:
+        """
+        Forget reports whose files are gone
+
+        Args:
+            present: File names of every report still in the raw directory
+
+        Returns:
+            The removed manifest entries
+        """
+        present = set(present)
+        removed = []
+        for name in [name for name in self.manifest if name not in present]:
+            entry = self.manifest.pop(name)
+            self._remove_parts(entry["doc_id"])
+            removed.append(entry)
+            logger.info(f"🗑️ {name} is gone, removed its {entry.get('chunks', 0)} chunks")
+        return removed
+
+    def plan(self, paths: Iterable[Path], force: bool = False) -> Tuple[List[Tuple[Path, str, Dict]], int]:
+        """
+        Reports that need processing
+
+        Returns:
+            ([(path, sha256, metadata)], number of unchanged reports skipped)
+        """
+        pending: List[Tuple[Path, str, Dict]] = []
+        skipped = 0
+        seen = {entry["sha256"]: name for name, entry in self.manifest.items()}
+        for path in paths:
+            stat = path.stat()
+            entry = self.manifest.get(path.name)
+            if not force and entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                skipped += 1
+                continue
+            sha256 = file_sha256(path)
+            if not force and entry and entry["sha256"] == sha256:
+                # Touched but identical: just refresh size/mtime
+                entry.update(size=stat.st_size, mtime=stat.st_mtime)
+                skipped += 1
+                continue
+            duplicate_of = seen.get(sha256)
+            if duplicate_of and duplicate_of != path.name:
+                logger.warning(f"⚠️ {path.name} has the same content as {duplicate_of}, skipping")
+                skipped += 1
+                continue
+            seen[sha256] = path.name
+            pending.append((path, sha256, parse_report_name(path, self.fiscal_year_end)))
+        return pending, skipped
+
+    def ingest(self, paths: Iterable[Path], force: bool = False, prune: bool = False) -> Dict:
+        """
+        Process every new or changed report in paths
+
+        Args:
+            prune: paths is the whole raw directory; drop reports not in it
+
+        Returns:
+            Totals: reports, skipped, failed, removed, pages, chunks, seconds,
+            pages_per_sec, and the symbols whose reports were (re)ingested or removed
+        """
+        started = time.perf_counter()
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        paths = sorted(paths)
+        removed = self.prune(path.name for path in paths) if prune else []
+        pending, skipped = self.plan(paths, force=force)
+        totals = {"reports": 0, "skipped": skipped, "failed": 0, "removed": len(removed), "pages": 0, "chunks": 0}
+        symbols = {entry["symbol"] for entry in removed if entry.get("symbol")}
+
+        if pending:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(pending)), mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                futures = {}
+                for path, sha256, metadata in pending:
+                    doc_id = sha256[:16]
+                    # Leftovers of an interrupted run
+                    self._remove_parts(doc_id)
+                    future = pool.submit(
+                        process_report, str(path), doc_id, metadata, str(self.chunks_dir),
+                        self.chunk_size, self.overlap, self.flush_rows,
+                    )
+                    futures[future] = (path, sha256, doc_id, metadata)
+
+                for future in as_completed(futures):
+                    path, sha256, doc_id, metadata = futures[future]
+                    try:
+                        stats = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Failed to ingest {path.name}: {e}")
+                        self._remove_parts(doc_id)
+                        totals["failed"] += 1
+                        continue
+
+                    previous = self.manifest.get(path.name)
+                    if previous and previous["doc_id"] != doc_id:
+                        self._remove_parts(previous["doc_id"])
+                    stat = path.stat()
+                    self.manifest[path.name] = {
+                        "doc_id": doc_id,
+                        "sha256": sha256,
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                        **metadata,
+                        **stats,
+                    }
+                    totals["reports"] += 1
+                    totals["pages"] += stats["pages"]
+                    totals["chunks"] += stats["chunks"]
+                    if metadata["symbol"]:
+                        symbols.add(metadata["symbol"])
+                    logger.info(
+                        f"✅ {path.name}: {stats['pages']} pages, {stats['chunks']} chunks "
+                        f"in {stats['seconds']:.2f}s"
+                    )
+                    # Saved per report so an interrupted run keeps its progress
+                    self._save_manifest()
+        elif skipped or removed:
+            self._save_manifest()
+
+        totals["symbols"] = sorted(symbols)
+        totals["seconds"] = time.perf_counter() - started
+        totals["pages_per_sec"] = totals["pages"] / totals["seconds"] if totals["seconds"] else 0.0
+        return totals
+
+
+def find_reports(paths: Iterable[Path]) -> List[Path]:
+    """PDF files among paths, descending into directories"""
+    found: List[Path] = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            found.extend(p for p in path.rglob("*") if p.suffix.lower() == ".pdf")
+        elif path.suffix.lower() == ".pdf":
+            found.append(path)
+    return found
+
+
+def load_chunk_texts(
+    keys: Iterable[Tuple[str, int]], processed_dir: Path = DEFAULT_PROCESSED_DIR
+) -> Dict[Tuple[str, int], str]:
+    """
+    Text of chunks by (doc_id, chunk_index)
+
+    Only the parquet parts of the documents asked for are read.
+    """
+    wanted: Dict[str, List[int]] = {}
+    for doc_id, chunk_index in keys:
+        wanted.setdefault(doc_id, []).append(chunk_index)
+    texts: Dict[Tuple[str, int], str] = {}
+    chunks_dir = Path(processed_dir) / CHUNKS_DIRNAME
+    for doc_id, indexes in wanted.items():
+        for part in sorted(chunks_dir.glob(f"{doc_id}-*.parquet")):
+            frame = pl.read_parquet(part, columns=["chunk_index", "text"]).filter(pl.col("chunk_index").is_in(indexes))
+            for chunk_index, text in frame.iter_rows():
+                texts[(doc_id, chunk_index)] = text
+    return texts
+
+
+def scan_chunks(processed_dir: Path = DEFAULT_PROCESSED_DIR) -> pl.LazyFrame:
+    """Lazy view over every ingested chunk"""
+    return pl.scan_parquet(Path(processed_dir) / CHUNKS_DIRNAME / "*.parquet")
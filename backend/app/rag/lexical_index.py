@@ -0,0 +1,218 @@
+"""
+Lexical Chunk Index
+BM25 over report chunks, precomputed as an inverted index with per-posting impacts
+
+Tickers, years and line-item names ("FCCL", "2023", "net profit") are exact
+tokens that embeddings blur; this index scores them directly and is fused
+with the vector index by app.rag.retriever.HybridRetriever.
+
+Each posting stores its final BM25 contribution (idf x saturated, length-
+normalized tf), so a query is a gather of its terms' posting slices and a
+sum per chunk; nothing is recomputed at query time.
+
+Layout (data/embeddings/lexical, next to the vector index):
+    meta.json         {"kind", "count", "terms", "k1", "b", "built_at"}
+    terms.json        vocabulary, term id = position
+    offsets.npy       int64, postings of term t are [offsets[t], offsets[t + 1])
+    rows.npy          int32 chunk rows, ascending within a term
+    impacts.npy       float32 BM25 contribution of each posting
+    payload.parquet   PAYLOAD_COLUMNS per chunk row (same as the vector index)
+
+Saved as a versioned directory behind a symlink, swapped atomically the
+same way as the vector index.
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import json
+import re
+import time
+import unicodedata
+
+import numpy as np
+import polars as pl
+
+from app.rag.ingestion import BACKEND_DIR, CHUNKS_DIRNAME, DEFAULT_PROCESSED_DIR
+from app.rag.vector_index import PAYLOAD_COLUMNS, SearchHit, SymbolFilter, _new_version, _publish_version, _top_k
+
+DEFAULT_LEXICAL_DIR = BACKEND_DIR.parent / "data" / "embeddings" / "lexical"
+
+_TOKEN = re.compile(r"\w+")
+# Function words only; financial terms ("total", "net", "per") stay indexed
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what which "
+    "with how did does do".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords (same for chunks and queries)"""
+    return [
+        token for token in _TOKEN.findall(unicodedata.normalize("NFKC", text).lower()) if token not in STOPWORDS
+    ]
+
+
+class BM25Index:
+    """Okapi BM25 over a precomputed inverted index"""
+
+    kind = "bm25"
+
+    def __init__(
+        self,
+        terms: List[str],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        impacts: np.ndarray,
+        payload: pl.DataFrame,
+        k1: float = 1.2,
+        b: float = 0.75,
+        built_at: Optional[float] = None,
+    ):
+        if len(offsets) != len(terms) + 1:
+            raise ValueError(f"{len(terms)} terms but {len(offsets)} offsets")
+        self.terms = terms
+        self._term_ids = {term: n for n, term in enumerate(terms)}
+        self.offsets = offsets
+        self.rows = rows
+        self.impacts = impacts
+        self.payload = payload
+        self.k1 = k1
+        self.b = b
+        self.built_at = built_at if built_at is not None else time.time()
+        symbols = payload["symbol"].fill_null("").to_numpy().astype(str)
+        self._symbol_names, codes = np.unique(symbols, return_inverse=True)
+        self._symbol_codes = codes.astype(np.int32)
+
+    @classmethod
+    def build(cls, texts: Iterable[str], payload: pl.DataFrame, k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """Tokenize texts (row order = payload order) and precompute every posting's impact"""
+        term_ids: Dict[str, int] = {}
+        posting_terms: List[int] = []
+        posting_rows: List[int] = []
+        posting_tfs: List[int] = []
+        lengths: List[int] = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+                posting_rows.append(row)
+                posting_tfs.append(tf)
+        if len(lengths) != len(payload):
+            raise ValueError(f"{len(lengths)} texts but {len(payload)} payload rows")
+
+        term_of = np.asarray(posting_terms, dtype=np.int64)
+        rows = np.asarray(posting_rows, dtype=np.int32)
+        tfs = np.asarray(posting_tfs, dtype=np.float32)
+        lengths = np.asarray(lengths, dtype=np.float32)
+
+        # Group postings by term; stable sort keeps rows ascending within a term
+        order = np.argsort(term_of, kind="stable")
+        term_of, rows, tfs = term_of[order], rows[order], tfs[order]
+        df = np.bincount(term_of, minlength=len(term_ids))
+        offsets = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+
+        count = len(lengths)
+        idf = np.log1p((count - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * lengths / max(float(lengths.mean()) if count else 0.0, 1.0))
+        impacts = idf[term_of] * tfs * (k1 + 1) / (tfs + norm[rows])
+
+        terms = [""] * len(term_ids)
+        for term, n in term_ids.items():
+            terms[n] = term
+        return cls(terms, offsets, rows, impacts.astype(np.float32), payload, k1=k1, b=b)
+
+    def __len__(self) -> int:
+        return len(self.payload)
+
+    @property
+    def version(self) -> str:
+        """Changes whenever the index is rebuilt"""
+        return f"{self.kind}:{len(self)}:{self.built_at:.3f}"
+
+    def search(self, query: str, limit: int = 5, symbol: SymbolFilter = None) -> List[SearchHit]:
+        """Top-limit chunks by BM25 score, optionally restricted to symbols"""
+        term_ids = [self._term_ids[t] for t in set(tokenize(query)) if t in self._term_ids]
+        if not term_ids:
+            return []
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        rows = np.concatenate([self.rows[s] for s in slices])
+        impacts = np.concatenate([self.impacts[s] for s in slices])
+        candidates, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=impacts)
+
+        if symbol is not None:
+            wanted = [symbol] if isinstance(symbol, str) else list(symbol)
+            codes = np.flatnonzero(np.isin(self._symbol_names, [s.upper() for s in wanted]))
+            keep = np.isin(self._symbol_codes[candidates], codes)
+            candidates, scores = candidates[keep], scores[keep]
+            if not len(candidates):
+                return []
+
+        top = _top_k(scores, limit)
+        rows = candidates[top]
+        records = self.payload[rows].to_dicts()
+        return [SearchHit(int(row), float(score), record) for row, score, record in zip(rows, scores[top], records)]
+
+    def save(self, directory: Path) -> None:
+        """Write the index as a new version of directory and switch directory to it atomically"""
+        directory = Path(directory)
+        staging = _new_version(directory)
+        (staging / "terms.json").write_text(json.dumps(self.terms))
+        np.save(staging / "offsets.npy", self.offsets)
+        np.save(staging / "rows.npy", self.rows)
+        np.save(staging / "impacts.npy", self.impacts)
+        self.payload.write_parquet(staging / "payload.parquet")
+        meta = {
+            "kind": self.kind,
+            "count": len(self),
+            "terms": len(self.terms),
+            "k1": self.k1,
+            "b": self.b,
+            "built_at": self.built_at,
+        }
+        (staging / "meta.json").write_text(json.dumps(meta, indent=2))
+        _publish_version(directory, staging)
+
+
+def load_lexical_index(directory: Path = DEFAULT_LEXICAL_DIR) -> BM25Index:
+    """Open a saved index; postings are memory-mapped read-only"""
+    # Resolve the link once so every file comes from the same version
+    directory = Path(directory).resolve()
+    meta = json.loads((directory / "meta.json").read_text())
+    return BM25Index(
+        json.loads((directory / "terms.json").read_text()),
+        np.load(directory / "offsets.npy"),
+        np.load(directory / "rows.npy", mmap_mode="r"),
+        np.load(directory / "impacts.npy", mmap_mode="r"),
+        pl.read_parquet(directory / "payload.parquet"),
+        k1=meta["k1"],
+        b=meta["b"],
+        built_at=meta["built_at"],
+    )
+
+
+def build_corpus_lexical_index(
+    processed_dir: Path = DEFAULT_PROCESSED_DIR,
+    directory: Path = DEFAULT_LEXICAL_DIR,
+) -> Dict:
+    """
+    Index every ingested chunk, then save
+
+    Returns:
+        {"count", "terms", "postings", "seconds"}
+    """
+    started = time.perf_counter()
+    frames = [pl.read_parquet(part) for part in sorted((Path(processed_dir) / CHUNKS_DIRNAME).glob("*.parquet"))]
+    if not frames:
+        raise ValueError(f"No chunks in {processed_dir}; run scripts/ingest_reports.py first")
+    chunks = pl.concat(frames)
+    index = BM25Index.build(chunks["text"], chunks.select(PAYLOAD_COLUMNS))
+    index.save(directory)
+    return {
+        "count": len(index),
+        "terms": len(index.terms),
+        "postings": len(index.rows),
+        "seconds": time.perf_counter() - started,
+    }
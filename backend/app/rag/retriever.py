@@ -0,0 +1,171 @@
+"""
+Report Retrieval
+Question -> most relevant report chunks (with text) from the local indexes
+
+    VectorRetriever    embedding search over the vector index
+    HybridRetriever    vector + BM25 rankings merged by reciprocal rank fusion
+"""
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.rag.embeddings import EmbeddingBackend, content_key, normalize_text
+from app.rag.ingestion import DEFAULT_PROCESSED_DIR, load_chunk_texts
+from app.rag.lexical_index import BM25Index
+from app.rag.vector_index import SearchHit, VectorIndex
+from app.services.local_cache import LocalCache
+
+# Reciprocal rank fusion damping; 60 is the value from the original RRF paper
+RRF_K = 60
+
+
+class RetrievedChunk(NamedTuple):
+    doc_id: str
+    chunk_index: int
+    symbol: Optional[str]
+    period_end: Optional[date]
+    page: int
+    score: float
+    text: str
+
+    def source(self) -> Dict:
+        """Citation fields (no text)"""
+        return {
+            "doc_id": self.doc_id,
+            "chunk_index": self.chunk_index,
+            "symbol": self.symbol,
+            "period_end": self.period_end.isoformat() if self.period_end else None,
+            "page": self.page,
+            "score": round(self.score, 4),
+        }
+
+
+class VectorRetriever:
+    """
+    Embeds questions with the index's backend and searches the vector index
+
+    Query vectors are kept in a small in-process LRU; they are not written
+    to the corpus embedding store, which has a single writer.
+    """
+
+    def __init__(
+        self,
+        index: VectorIndex,
+        backend: EmbeddingBackend,
+        processed_dir: Path = DEFAULT_PROCESSED_DIR,
+        query_cache_size: int = 1024,
+    ):
+        if index.model and index.model != backend.model:
+            raise ValueError(f"Index was built with {index.model}, not {backend.model}")
+        self.index = index
+        self.backend = backend
+        self.processed_dir = processed_dir
+        self._query_vectors = LocalCache(max_size=query_cache_size, max_ttl_seconds=86400)
+
+    def embed_query(self, question: str) -> np.ndarray:
+        """Normalized question vector"""
+        normalized = normalize_text(question)
+        key = content_key(normalized, self.backend.model).hex()
+        vector = self._query_vectors.get(key)
+        if vector is None:
+            vector = self.backend.embed([normalized])[0]
+            self._query_vectors.set(key, vector, 86400)
+        return vector
+
+    def retrieve(
+        self,
+        question: str,
+        limit: int = 5,
+        symbol: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None,
+    ) -> List[RetrievedChunk]:
+        """Top chunks for question, optionally restricted to one symbol"""
+        if query_vector is None:
+            query_vector = self.embed_query(question)
+        hits = self.index.search(query_vector, limit=limit, symbol=symbol)
+        return with_texts([(hit.payload, hit.score) for hit in hits], self.processed_dir)
+
+    @property
+    def version(self) -> str:
+        return self.index.version
+
+
+class HybridRetriever(VectorRetriever):
+    """
+    Vector and BM25 search, fused by reciprocal rank
+
+    Each index contributes its top `candidates` chunks; a chunk scores
+    sum(1 / (RRF_K + rank)) over the rankings it appears in, so exact
+    token matches (tickers, years, line items) and paraphrases both surface
+    without calibrating BM25 against cosine scores.
+    """
+
+    def __init__(
+        self,
+        index: VectorIndex,
+        lexical: BM25Index,
+        backend: EmbeddingBackend,
+        processed_dir: Path = DEFAULT_PROCESSED_DIR,
+        query_cache_size: int = 1024,
+        candidates: int = 50,
+    ):
+        super().__init__(index, backend, processed_dir, query_cache_size)
+        self.lexical = lexical
+        self.candidates = candidates
+
+    def retrieve(
+        self,
+        question: str,
+        limit: int = 5,
+        symbol: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None,
+    ) -> List[RetrievedChunk]:
+        """Top chunks for question by fused rank, optionally restricted to one symbol"""
+        if query_vector is None:
+            query_vector = self.embed_query(question)
+        depth = max(self.candidates, limit)
+        fused = reciprocal_rank_fusion(
+            self.index.search(query_vector, limit=depth, symbol=symbol),
+            self.lexical.search(question, limit=depth, symbol=symbol),
+        )
+        return with_texts(fused[:limit], self.processed_dir)
+
+    @property
+    def version(self) -> str:
+        return f"{self.index.version}+{self.lexical.version}"
+
+
+def reciprocal_rank_fusion(*rankings: List[SearchHit], k: int = RRF_K) -> List[Tuple[Dict, float]]:
+    """
+    (payload, fused score) best first, chunks identified by (doc_id, chunk_index)
+
+    Scores are scaled to [0, 1]; 1.0 means ranked first by every ranking.
+    """
+    best = len(rankings) / (k + 1)
+    scores: Dict[Tuple[str, int], float] = {}
+    payloads: Dict[Tuple[str, int], Dict] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, 1):
+            key = (hit.payload["doc_id"], hit.payload["chunk_index"])
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            payloads.setdefault(key, hit.payload)
+    return [(payloads[key], score / best) for key, score in sorted(scores.items(), key=lambda item: -item[1])]
+
+
+def with_texts(scored: List[Tuple[Dict, float]], processed_dir: Path) -> List[RetrievedChunk]:
+    """RetrievedChunks for (payload, score) pairs, reading only the chunk files involved"""
+    texts = load_chunk_texts(((payload["doc_id"], payload["chunk_index"]) for payload, _ in scored), processed_dir)
+    return [
+        RetrievedChunk(
+            doc_id=payload["doc_id"],
+            chunk_index=payload["chunk_index"],
+            symbol=payload["symbol"],
+            period_end=payload["period_end"],
+            page=payload["page"],
+            score=score,
+            text=texts.get((payload["doc_id"], payload["chunk_index"]), ""),
+        )
+        for payload, score in scored
+    ]
@@ -0,0 +1,262 @@
+"""
+Semantic Answer Cache
+Reuses chat answers for near-duplicate questions, skipping retrieval and generation
+
+Entries live in Redis (via CacheService) under one key per scope,
+chat:semantic:{SYMBOL}, or for unscoped questions the companies they name
+(chat:semantic:{A+B}) or chat:semantic:_all, holding the most recent
+max_entries questions with their vectors (float16, base64), answers and
+sources. A lookup compares the question vector against every entry in its
+scope; the decoded matrix is kept per process until the scope value changes.
+
+Questions that differ only in a ticker or a year ("LUCK revenue in 2022"
+vs "...in 2023") embed almost identically, so entries also record the
+companies and years their question named (see
+StructuredAnswerer.mentions) and only serve questions naming the same ones.
+
+Freshness:
+  - entries record the vector index version they were answered from and
+    are ignored once the index is rebuilt
+  - entries record the retrieval limit they were answered with and only
+    serve requests with the same limit (the answer and sources depend on it)
+  - symbol-scoped entries are tagged rag:{SYMBOL}, unscoped ones
+    rag:corpus; scripts/ingest_reports.py invalidates both when it
+    re-ingests a symbol's reports (price updates, which invalidate
+    symbol:{SYMBOL}, leave them alone)
+  - the whole cache can be dropped with invalidate_namespace("chat")
+
+Stores rewrite the whole scope value, so they hold lock:{key} for the
+read-modify-write and read the current value from Redis, not L1; a store
+that cannot get the lock within store_lock_wait_seconds is skipped.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import base64
+import logging
+import os
+import time
+import uuid
+
+import numpy as np
+
+from app.services.cache_service import get_cache_service
+
+logger = logging.getLogger(__name__)
+
+CORPUS_TAG = "rag:corpus"
+ALL_SCOPE = "_all"
+
+
+def report_tag(symbol: str) -> str:
+    """Tag for cached answers drawn from one symbol's reports"""
+    return f"rag:{symbol.upper()}"
+
+
+def semantic_cache_key(symbol: Optional[str], mentions: Iterable[str] = ()) -> str:
+    """Cache key holding the entries of one scope (the symbol, else the companies named)"""
+    if symbol:
+        return f"chat:semantic:{symbol.upper()}"
+    mentioned = sorted({s.upper() for s in mentions})
+    return f"chat:semantic:{'+'.join(mentioned) if mentioned else ALL_SCOPE}"
+
+
+def _question_keys(symbol: Optional[str], mentions: Iterable[str], years: Iterable[str]) -> Dict[str, List[str]]:
+    """Companies (besides the scope symbol) and years an entry must match"""
+    scope = symbol.upper() if symbol else None
+    return {
+        "mentions": sorted({s.upper() for s in mentions} - {scope}),
+        "years": sorted(set(years)),
+    }
+
+
+def _encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float16).tobytes()).decode()
+
+
+def _decode_vector(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float16).astype(np.float32)
+
+
+class SemanticCache:
+    """
+    Cosine-similarity cache of chat answers
+
+    A question hits when an entry in the same scope, answered from the
+    current index version with the same retrieval limit and naming the same
+    companies and years, scores at least `threshold` against it.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: int = 3600,
+        max_entries: int = 128,
+        store_lock_wait_seconds: float = 1.0,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.store_lock_wait_seconds = store_lock_wait_seconds
+        # scope key -> (entries list as returned by the cache, unit-vector matrix)
+        self._matrices: Dict[str, Tuple[List[Dict], np.ndarray]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.store_conflicts = 0
+
+    @staticmethod
+    def _tags(symbol: Optional[str]) -> List[str]:
+        return [report_tag(symbol)] if symbol else [CORPUS_TAG]
+
+    def _matrix(self, key: str, entries: List[Dict]) -> np.ndarray:
+        """Entry vectors as rows, decoded once per cached value"""
+        cached = self._matrices.get(key)
+        # L1 returns the same list object until the value changes
+        if cached is not None and cached[0] is entries:
+            return cached[1]
+        matrix = np.stack([_decode_vector(entry["vector"]) for entry in entries])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        self._matrices[key] = (entries, matrix)
+        return matrix
+
+    async def lookup(
+        self,
+        vector: np.ndarray,
+        symbol: Optional[str],
+        version: str,
+        limit: int,
+        mentions: Sequence[str] = (),
+        years: Sequence[str] = (),
+    ) -> Optional[Dict]:
+        """
+        Best cached entry for the question vector
+
+        Args:
+            mentions: Companies the question names
+            years: Years the question names
+
+        Returns:
+            {"question", "answer", "sources", "confidence", "similarity", "created_at"} or None
+        """
+        key = semantic_cache_key(symbol, mentions)
+        keys = _question_keys(symbol, mentions, years)
+        cache = await get_cache_service()
+        value = await cache.get(key)
+        entries = value.get("entries") if isinstance(value, dict) else None
+        if not entries:
+            self.misses += 1
+            return None
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self._matrix(key, entries) @ query
+        for position in np.argsort(-scores):
+            if scores[position] < self.threshold:
+                break
+            entry = entries[position]
+            if (
+                entry["version"] == version
+                and entry.get("limit") == limit
+                and entry.get("mentions") == keys["mentions"]
+                and entry.get("years") == keys["years"]
+            ):
+                self.hits += 1
+                return {
+                    "question": entry["question"],
+                    "answer": entry["answer"],
+                    "sources": entry["sources"],
+                    "confidence": entry.get("confidence", 0.0),
+                    "similarity": float(scores[position]),
+                    "created_at": entry["created_at"],
+                }
+        self.misses += 1
+        return None
+
+    async def store(
+        self,
+        question: str,
+        vector: np.ndarray,
+        answer: str,
+        sources: List[Dict],
+        symbol: Optional[str],
+        version: str,
+        limit: int,
+        confidence: float = 0.0,
+        mentions: Sequence[str] = (),
+        years: Sequence[str] = (),
+    ) -> bool:
+        """Add an answer to its scope, keeping the newest max_entries"""
+        key = semantic_cache_key(symbol, mentions)
+        cache = await get_cache_service()
+        if not cache.is_available():
+            return False
+        entry = {
+            "id": uuid.uuid4().hex,
+            "question": question,
+            "vector": _encode_vector(vector),
+            "answer": answer,
+            "sources": sources,
+            "confidence": confidence,
+            "version": version,
+            "limit": limit,
+            **_question_keys(symbol, mentions, years),
+            "created_at": time.time(),
+        }
+        lock_name = f"lock:{key}"
+        token = await self._acquire_store_lock(lock_name)
+        if token is None:
+            self.store_conflicts += 1
+            logger.debug(f"Semantic cache store skipped, {key} is locked")
+            return False
+        try:
+            # Read Redis, not L1: another replica may have just rewritten the scope
+            value = await cache.get(key, local=False)
+            entries = list(value.get("entries", [])) if isinstance(value, dict) else []
+            # Drop entries from older index versions while rewriting the scope
+            entries = [e for e in entries if e["version"] == version]
+            entries.append(entry)
+            stored = await cache.set(
+                key, {"entries": entries[-self.max_entries:]}, ttl_seconds=self.ttl_seconds, tags=self._tags(symbol)
+            )
+        finally:
+            await cache.release_lock(lock_name, token)
+        if stored:
+            self.stores += 1
+        return stored
+
+    async def _acquire_store_lock(self, lock_name: str) -> Optional[str]:
+        """Lock a scope for one store, waiting up to store_lock_wait_seconds"""
+        cache = await get_cache_service()
+        deadline = time.monotonic() + self.store_lock_wait_seconds
+        while True:
+            token = await cache.acquire_lock(lock_name, lease_seconds=5)
+            if token is not None or time.monotonic() >= deadline:
+                return token
+            await asyncio.sleep(0.02)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+async def invalidate_rag_answers(symbols: List[str]) -> int:
+    """Expire cached answers that may depend on these symbols' reports"""
+    cache = await get_cache_service()
+    return await cache.invalidate_tags(CORPUS_TAG, *(report_tag(s) for s in symbols))
+
+
+# Singleton instance
+_semantic_cache: Optional[SemanticCache] = None
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create the process-wide semantic cache"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            ttl_seconds=int(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "128")),
+        )
+    return _semantic_cache
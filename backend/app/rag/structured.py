@@ -0,0 +1,207 @@
+"""
+Structured Financial Answers
+Numeric questions answered straight from financial statement tables
+
+"FCCL revenue 2023", "What was FCCL's EPS in 2022?" or "FCCL ROE" name a
+company, a line item and (optionally) a year; the answer is one cell of an
+income statement, balance sheet, cash flow statement or ratio table. Such
+questions are answered here from the statement rows (the shapes in
+app/mocks/financials.py) before the semantic cache, retrieval or the LLM
+are consulted. Anything not confidently matched returns None and falls
+through to report retrieval, including questions about a change or a
+comparison ("revenue growth", "FCCL profit vs LUCK"), relative periods
+("last year") and questions naming more than one company: one cell does
+not answer them.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+import re
+
+from app.mocks.financials import (
+    get_mock_balance_sheets,
+    get_mock_cashflow_statements,
+    get_mock_financial_ratios,
+    get_mock_income_statements,
+)
+from app.services.company_universe import get_company_universe
+
+# statement name -> getter(symbol) returning rows with "period_end" (YYYY-MM-DD)
+StatementGetter = Callable[[str], List[Dict]]
+MOCK_STATEMENTS: Dict[str, StatementGetter] = {
+    "income_statement": get_mock_income_statements,
+    "balance_sheet": get_mock_balance_sheets,
+    "cash_flow": get_mock_cashflow_statements,
+    "ratios": get_mock_financial_ratios,
+}
+
+
+class Metric(NamedTuple):
+    field: str
+    statement: str
+    label: str
+    unit: str  # pkr, per_share, percent or times
+
+
+# Phrases are matched on lowercased text with punctuation folded to spaces
+# ("P/E" -> "p e"), longest phrase first, so "net profit margin" wins over
+# "net profit" and "earnings per share" over "earnings".
+METRICS: Dict[str, Metric] = {}
+_PHRASES: Dict[str, str] = {}
+
+
+def _metric(field: str, statement: str, label: str, unit: str, *phrases: str) -> None:
+    METRICS[field] = Metric(field, statement, label, unit)
+    for phrase in phrases:
+        _PHRASES[phrase] = field
+
+
+_metric("revenue", "income_statement", "revenue", "pkr", "revenue", "revenues", "sales", "net sales", "turnover")
+_metric("cost_of_revenue", "income_statement", "cost of revenue", "pkr", "cost of revenue", "cost of sales", "cogs")
+_metric("gross_profit", "income_statement", "gross profit", "pkr", "gross profit")
+_metric("operating_expenses", "income_statement", "operating expenses", "pkr", "operating expenses", "opex")
+_metric("operating_income", "income_statement", "operating income", "pkr",
+        "operating income", "operating profit", "ebit")
+_metric("interest_expense", "income_statement", "interest expense", "pkr",
+        "interest expense", "finance cost", "finance costs")
+_metric("income_before_tax", "income_statement", "profit before tax", "pkr",
+        "profit before tax", "income before tax", "pbt")
+_metric("income_tax", "income_statement", "income tax", "pkr", "income tax", "tax expense", "taxation")
+_metric("net_income", "income_statement", "net profit", "pkr",
+        "net income", "net profit", "profit after tax", "pat", "earnings", "profit")
+_metric("eps", "income_statement", "EPS", "per_share", "eps", "earnings per share")
+_metric("total_assets", "balance_sheet", "total assets", "pkr", "total assets", "assets")
+_metric("current_assets", "balance_sheet", "current assets", "pkr", "current assets")
+_metric("non_current_assets", "balance_sheet", "non-current assets", "pkr", "non current assets")
+_metric("total_liabilities", "balance_sheet", "total liabilities", "pkr", "total liabilities", "liabilities")
+_metric("current_liabilities", "balance_sheet", "current liabilities", "pkr", "current liabilities")
+_metric("non_current_liabilities", "balance_sheet", "non-current liabilities", "pkr", "non current liabilities")
+_metric("shareholders_equity", "balance_sheet", "shareholders' equity", "pkr",
+        "shareholders equity", "shareholder equity", "total equity", "equity")
+_metric("operating_cashflow", "cash_flow", "operating cash flow", "pkr",
+        "operating cash flow", "operating cashflow", "cash from operations")
+_metric("investing_cashflow", "cash_flow", "investing cash flow", "pkr", "investing cash flow", "investing cashflow")
+_metric("financing_cashflow", "cash_flow", "financing cash flow", "pkr", "financing cash flow", "financing cashflow")
+_metric("free_cashflow", "cash_flow", "free cash flow", "pkr", "free cash flow", "free cashflow", "fcf")
+_metric("capex", "cash_flow", "capital expenditure", "pkr", "capex", "capital expenditure")
+_metric("pe_ratio", "ratios", "P/E ratio", "times", "p e", "pe ratio", "p e ratio", "price to earnings")
+_metric("pb_ratio", "ratios", "P/B ratio", "times", "p b", "pb ratio", "p b ratio", "price to book")
+_metric("roe", "ratios", "return on equity", "percent", "roe", "return on equity")
+_metric("roa", "ratios", "return on assets", "percent", "roa", "return on assets")
+_metric("debt_to_equity", "ratios", "debt-to-equity", "times", "debt to equity", "d e", "gearing")
+_metric("current_ratio", "ratios", "current ratio", "times", "current ratio")
+_metric("dividend_yield", "ratios", "dividend yield", "percent", "dividend yield")
+_metric("profit_margin", "ratios", "net profit margin", "percent",
+        "profit margin", "net profit margin", "net margin")
+
+_PHRASE_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p in sorted(_PHRASES, key=len, reverse=True)) + r")\b"
+)
+_FOLD = re.compile(r"[^a-z0-9]+")
+_YEAR = re.compile(r"\b(?:fy\s?)?((?:19|20)\d{2})\b")
+_TICKER = re.compile(r"\b[A-Za-z]{2,8}\b")
+# Questions asking for explanation rather than a figure go to retrieval
+_EXPLANATORY = re.compile(r"\b(why|explain|reason|reasons|outlook|strategy|risk|risks|describe|discuss)\b")
+# ...as do changes, comparisons and relative periods, which one cell cannot answer
+_NOT_A_LOOKUP = re.compile(
+    r"\b(growth|grow|grew|grown|change|changed|changes|increase|increased|decrease|decreased|decline|declined"
+    r"|rise|rose|fall|fell|drop|dropped|trend|trends|compare|compared|comparison|versus|vs|against|difference"
+    r"|higher|lower|cagr|yoy|qoq|since|between"
+    r"|(last|previous|prior|this|next|past|recent) (year|years|quarter|quarters|fy|period)"
+    r"|(last|past|previous) \d+ (year|years|quarter|quarters))\b"
+)
+
+
+def format_value(value: float, unit: str) -> str:
+    if unit == "percent":
+        return f"{value:.2f}%"
+    if unit == "times":
+        return f"{value:.2f}x"
+    if unit == "per_share":
+        return f"PKR {value:,.2f}"
+    magnitude = abs(value)
+    if magnitude >= 1e9:
+        return f"PKR {value / 1e9:,.2f} billion"
+    if magnitude >= 1e6:
+        return f"PKR {value / 1e6:,.2f} million"
+    return f"PKR {value:,.0f}"
+
+
+class StructuredAnswerer:
+    """
+    Answers "<symbol> <line item> [<year>]" questions from statement rows
+
+    Returns the same answer shape as ChatService (answer, sources,
+    confidence, tokens_used) with statement cells as sources.
+    """
+
+    def __init__(self, statements: Optional[Dict[str, StatementGetter]] = None):
+        self.statements = statements if statements is not None else MOCK_STATEMENTS
+
+    def _has_data(self, symbol: str) -> bool:
+        return any(getter(symbol) for getter in self.statements.values())
+
+    def _symbols(self, question: str) -> List[str]:
+        """Words in the question that are listed companies or have statements"""
+        universe = get_company_universe()
+        seen: Set[str] = set()
+        symbols: List[str] = []
+        for word in _TICKER.findall(question):
+            candidate = word.upper()
+            if candidate not in seen and candidate.lower() not in _PHRASES:
+                seen.add(candidate)
+                if universe.get(candidate) is not None or self._has_data(candidate):
+                    symbols.append(candidate)
+        return symbols
+
+    def mentions(self, question: str) -> Tuple[List[str], List[str]]:
+        """Companies (listed or with statements) and years a question names"""
+        folded = f" {_FOLD.sub(' ', question.lower())} "
+        return sorted(set(self._symbols(question))), sorted(set(_YEAR.findall(folded)))
+
+    @staticmethod
+    def _metrics(folded: str) -> List[Metric]:
+        fields = dict.fromkeys(_PHRASES[match] for match in _PHRASE_PATTERN.findall(folded))
+        return [METRICS[field] for field in fields]
+
+    def answer(self, question: str, symbol: Optional[str] = None) -> Optional[Dict]:
+        """Answer dict, or None when the question is not a statement lookup"""
+        folded = f" {_FOLD.sub(' ', question.lower())} "
+        if _EXPLANATORY.search(folded) or _NOT_A_LOOKUP.search(folded):
+            return None
+        metrics = self._metrics(folded)
+        if not metrics:
+            return None
+        mentioned = self._symbols(question)
+        symbol = symbol.upper() if symbol else None
+        # Another company besides the scoped one (or two unscoped ones) means a
+        # comparison or a question about a different company
+        if len(set(mentioned) - {symbol}) > (0 if symbol else 1):
+            return None
+        symbol = symbol or (mentioned[0] if mentioned else None)
+        if symbol is None or not self._has_data(symbol):
+            return None
+        years = list(dict.fromkeys(_YEAR.findall(folded)))
+
+        sentences: List[str] = []
+        sources: List[Dict] = []
+        for metric in metrics:
+            getter = self.statements.get(metric.statement)
+            rows = [row for row in (getter(symbol) if getter else []) if row.get(metric.field) is not None]
+            if years:
+                rows = [row for year in years for row in rows if row["period_end"].startswith(year)]
+            else:
+                rows = sorted(rows, key=lambda row: row["period_end"], reverse=True)[:1]
+            if not rows:
+                # A metric we cannot answer means the question is not fully structured
+                return None
+            for row in rows:
+                sentences.append(
+                    f"{symbol} {metric.label} for the period ended {row['period_end']} "
+                    f"was {format_value(row[metric.field], metric.unit)}."
+                )
+                sources.append({
+                    "symbol": symbol,
+                    "statement": metric.statement,
+                    "field": metric.field,
+                    "period_end": row["period_end"],
+                })
+        return {"answer": " ".join(sentences), "sources": sources, "confidence": 1.0, "tokens_used": 0}
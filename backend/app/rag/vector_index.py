@@ -0,0 +1,403 @@
+"""
+Local Vector Index
+In-process cosine search over chunk embeddings, a stand-in for Qdrant in
+dev/test and small deployments
+
+    FlatIndex   exact, one matrix-vector product per query; used below
+                ivf_threshold vectors
+    IVFIndex    inverted file: spherical k-means centroids, vectors stored
+                contiguously per list, nprobe lists scanned per query
+
+Both filter on symbol and period_end (exact or range) before ranking, and
+return Qdrant-style hits (id, score, payload). Very selective filters on an
+IVF index are answered exactly over the matching rows instead.
+
+Saved layout (loaded with mmap, so opening a large index is instant):
+    meta.json        kind, dimension, model, count, built_at (+ nlist, nprobe)
+    vectors.npy      float32 (count, dimension), L2-normalized
+    payload.parquet  doc_id, chunk_index, symbol, document_type, period_end, page, page_end
+    centroids.npy    IVF only, (nlist, dimension)
+    offsets.npy      IVF only, list i is rows offsets[i]:offsets[i + 1]
+
+The index directory is a symlink to a versioned sibling ({name}.{stamp});
+save() writes a new version and swaps the link with one rename, so readers
+see either the old index or the new one, never a missing or half-written
+directory. The previous version is kept for readers still opening it.
+"""
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+import json
+import logging
+import math
+import os
+import shutil
+import time
+
+import numpy as np
+import polars as pl
+
+from app.rag.embeddings import CachedEmbedder
+from app.rag.ingestion import BACKEND_DIR, CHUNKS_DIRNAME, DEFAULT_PROCESSED_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = BACKEND_DIR.parent / "data" / "embeddings" / "index"
+DEFAULT_IVF_THRESHOLD = 50_000
+# Filters matching at most this many rows are searched exactly
+EXACT_FILTER_ROWS = 20_000
+PAYLOAD_COLUMNS = ("doc_id", "chunk_index", "symbol", "document_type", "period_end", "page", "page_end")
+
+_EPOCH = date(1970, 1, 1)
+_NO_DATE = np.iinfo(np.int32).min
+
+SymbolFilter = Union[str, Sequence[str], None]
+
+
+class SearchHit(NamedTuple):
+    id: int  # row in the index payload
+    score: float  # cosine similarity
+    payload: Dict
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _days(value: date) -> int:
+    return (value - _EPOCH).days
+
+
+def _new_version(directory: Path) -> Path:
+    """Empty versioned sibling of directory to write a new build into"""
+    version = directory.with_name(f"{directory.name}.{time.time_ns():x}")
+    version.mkdir(parents=True)
+    return version
+
+
+def _publish_version(directory: Path, version: Path, keep: int = 2) -> None:
+    """
+    Atomically point the directory symlink at version
+
+    Keeps the newest `keep` versions (the one just published and its
+    predecessor, which readers may still be opening) and deletes the rest.
+    """
+    link = directory.with_name(directory.name + ".link")
+    if link.is_symlink() or link.exists():
+        link.unlink()
+    link.symlink_to(version.name, target_is_directory=True)
+    if directory.is_dir() and not directory.is_symlink():
+        # Layout from before versioning: move the plain directory aside once
+        os.replace(directory, directory.with_name(f"{directory.name}.{time.time_ns():x}.old"))
+    os.replace(link, directory)
+
+    versions = sorted(
+        (p for p in directory.parent.glob(f"{directory.name}.*") if p.is_dir() and not p.is_symlink()),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for old in versions[:-keep]:
+        if old != version:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+class FlatIndex:
+    """Exact cosine search"""
+
+    kind = "flat"
+
+    def __init__(
+        self, vectors: np.ndarray, payload: pl.DataFrame, model: Optional[str] = None, built_at: Optional[float] = None
+    ):
+        if len(vectors) != len(payload):
+            raise ValueError(f"{len(vectors)} vectors but {len(payload)} payload rows")
+        self.vectors = vectors
+        self.payload = payload
+        self.model = model
+        self.built_at = built_at if built_at is not None else time.time()
+        self.dimension = vectors.shape[1]
+        # Filter columns as numpy arrays, so a filter is one vectorized compare
+        symbols = payload["symbol"].fill_null("").to_numpy().astype(str)
+        self._symbol_names, codes = np.unique(symbols, return_inverse=True)
+        self._symbol_codes = codes.astype(np.int32)
+        self._period_days = payload["period_end"].cast(pl.Int32).fill_null(_NO_DATE).to_numpy()
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def version(self) -> str:
+        """Changes whenever the index is rebuilt (results derived from it go stale)"""
+        return f"{self.kind}:{len(self)}:{self.built_at:.3f}"
+
+    def _mask(
+        self,
+        symbol: SymbolFilter,
+        period_end: Optional[date],
+        period_from: Optional[date],
+        period_to: Optional[date],
+    ) -> Optional[np.ndarray]:
+        """Rows passing the filters, None when unfiltered"""
+        mask = None
+        if symbol is not None:
+            wanted = [symbol] if isinstance(symbol, str) else list(symbol)
+            codes = np.flatnonzero(np.isin(self._symbol_names, [s.upper() for s in wanted]))
+            mask = np.isin(self._symbol_codes, codes)
+        for bound, compare in ((period_end, np.equal), (period_from, np.greater_equal), (period_to, np.less_equal)):
+            if bound is not None:
+                passed = compare(self._period_days, _days(bound)) & (self._period_days != _NO_DATE)
+                mask = passed if mask is None else mask & passed
+        return mask
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[SearchHit]:
+        records = self.payload[rows].to_dicts() if len(rows) else []
+        return [SearchHit(int(row), float(score), record) for row, score, record in zip(rows, scores, records)]
+
+    def _exact(self, query: np.ndarray, limit: int, rows: Optional[np.ndarray] = None) -> List[SearchHit]:
+        if rows is None:
+            scores = self.vectors @ query
+            top = _top_k(scores, limit)
+            return self._hits(top, scores[top])
+        if not len(rows):
+            return []
+        scores = self.vectors[rows] @ query
+        top = _top_k(scores, limit)
+        return self._hits(rows[top], scores[top])
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        limit: int = 5,
+        symbol: SymbolFilter = None,
+        period_end: Optional[date] = None,
+        period_from: Optional[date] = None,
+        period_to: Optional[date] = None,
+    ) -> List[SearchHit]:
+        """Top-limit rows by cosine similarity among rows passing the filters"""
+        query = normalize_rows(query_vector)
+        mask = self._mask(symbol, period_end, period_from, period_to)
+        return self._exact(query, limit, None if mask is None else np.flatnonzero(mask))
+
+    def _meta(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "dimension": self.dimension,
+            "model": self.model,
+            "count": len(self),
+            "built_at": self.built_at,
+        }
+
+    def save(self, directory: Path) -> None:
+        """Write the index as a new version of directory and switch directory to it atomically"""
+        directory = Path(directory)
+        staging = _new_version(directory)
+        np.save(staging / "vectors.npy", self.vectors)
+        self.payload.write_parquet(staging / "payload.parquet")
+        self._save_extra(staging)
+        (staging / "meta.json").write_text(json.dumps(self._meta(), indent=2))
+        _publish_version(directory, staging)
+
+    def _save_extra(self, directory: Path) -> None:
+        pass
+
+
+class IVFIndex(FlatIndex):
+    """
+    Inverted-file index: each query scans the nprobe lists whose centroids
+    are closest, instead of every vector
+
+    Rows are stored grouped by list, so row ids differ from insertion order;
+    the payload is reordered to match.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        payload: pl.DataFrame,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int = 8,
+        model: Optional[str] = None,
+        built_at: Optional[float] = None,
+    ):
+        super().__init__(vectors, payload, model, built_at)
+        self.centroids = centroids
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        payload: pl.DataFrame,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: Optional[int] = None,
+        model: Optional[str] = None,
+        seed: int = 0,
+        batch_size: int = 65_536,
+    ) -> "IVFIndex":
+        """
+        Cluster with spherical k-means on a sample, then assign every vector
+
+        Defaults: nlist ~ sqrt(n), nprobe ~ nlist / 8 (at least 8),
+        sample of 64 vectors per list.
+        """
+        count = len(vectors)
+        nlist = nlist or int(min(max(math.sqrt(count), 16), 4096, count))
+        nprobe = nprobe or min(max(nlist // 8, 8), nlist)
+        rng = np.random.default_rng(seed)
+
+        sample_rows = np.sort(rng.choice(count, size=min(count, sample_size or 64 * nlist), replace=False))
+        sample = normalize_rows(vectors[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            sizes = np.bincount(assignment, minlength=nlist)
+            empty = np.flatnonzero(sizes == 0)
+            # Reseed empty lists with random sample points
+            sums[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+            centroids = normalize_rows(sums)
+
+        assignment = np.concatenate([
+            np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+            for start in range(0, count, batch_size)
+        ])
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assignment, minlength=nlist))
+        return cls(
+            np.ascontiguousarray(vectors[order]), payload[order], centroids, offsets, nprobe, model
+        )
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        limit: int = 5,
+        symbol: SymbolFilter = None,
+        period_end: Optional[date] = None,
+        period_from: Optional[date] = None,
+        period_to: Optional[date] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[SearchHit]:
+        query = normalize_rows(query_vector)
+        mask = self._mask(symbol, period_end, period_from, period_to)
+        if mask is not None:
+            matching = np.flatnonzero(mask)
+            if len(matching) <= EXACT_FILTER_ROWS:
+                return self._exact(query, limit, matching)
+
+        probe = _top_k(self.centroids @ query, min(nprobe or self.nprobe, self.nlist))
+        # Lists are contiguous, so each is scored on a slice without gathering rows
+        rows, scores = [], []
+        for i in probe:
+            start, end = self.offsets[i], self.offsets[i + 1]
+            if start == end:
+                continue
+            list_rows = np.arange(start, end)
+            list_scores = self.vectors[start:end] @ query
+            if mask is not None:
+                keep = mask[start:end]
+                list_rows, list_scores = list_rows[keep], list_scores[keep]
+            rows.append(list_rows)
+            scores.append(list_scores)
+        if not rows:
+            return []
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        top = _top_k(scores, limit)
+        return self._hits(rows[top], scores[top])
+
+    def _meta(self) -> Dict:
+        return {**super()._meta(), "nlist": self.nlist, "nprobe": self.nprobe}
+
+    def _save_extra(self, directory: Path) -> None:
+        np.save(directory / "centroids.npy", self.centroids)
+        np.save(directory / "offsets.npy", self.offsets)
+
+
+VectorIndex = Union[FlatIndex, IVFIndex]
+
+
+def build_index(
+    vectors: np.ndarray,
+    payload: pl.DataFrame,
+    ivf_threshold: int = DEFAULT_IVF_THRESHOLD,
+    model: Optional[str] = None,
+    **ivf_options,
+) -> VectorIndex:
+    """FlatIndex below ivf_threshold vectors, IVFIndex at or above it"""
+    vectors = normalize_rows(vectors)
+    if len(vectors) < ivf_threshold:
+        return FlatIndex(vectors, payload, model)
+    return IVFIndex.train(vectors, payload, model=model, **ivf_options)
+
+
+def load_index(directory: Path = DEFAULT_INDEX_DIR) -> VectorIndex:
+    """Open a saved index; vectors are memory-mapped read-only"""
+    # Resolve the link once so every file comes from the same version
+    directory = Path(directory).resolve()
+    meta = json.loads((directory / "meta.json").read_text())
+    vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+    payload = pl.read_parquet(directory / "payload.parquet")
+    if meta["kind"] == IVFIndex.kind:
+        return IVFIndex(
+            vectors,
+            payload,
+            np.load(directory / "centroids.npy"),
+            np.load(directory / "offsets.npy"),
+            nprobe=meta["nprobe"],
+            model=meta.get("model"),
+            built_at=meta.get("built_at", 0.0),
+        )
+    return FlatIndex(vectors, payload, meta.get("model"), meta.get("built_at", 0.0))
+
+
+def build_corpus_index(
+    embedder: CachedEmbedder,
+    processed_dir: Path = DEFAULT_PROCESSED_DIR,
+    index_dir: Path = DEFAULT_INDEX_DIR,
+    ivf_threshold: int = DEFAULT_IVF_THRESHOLD,
+    batch_rows: int = 8192,
+) -> Dict:
+    """
+    Embed (through the cache) and index every ingested chunk, then save
+
+    Returns:
+        {"kind", "count", "seconds"}
+    """
+    started = time.perf_counter()
+    payloads: List[pl.DataFrame] = []
+    blocks: List[np.ndarray] = []
+    for part in sorted((Path(processed_dir) / CHUNKS_DIRNAME).glob("*.parquet")):
+        frame = pl.read_parquet(part)
+        texts = frame["text"]
+        for start in range(0, len(texts), batch_rows):
+            blocks.append(embedder.embed(texts.slice(start, batch_rows).to_list()))
+        payloads.append(frame.select(PAYLOAD_COLUMNS))
+
+    if not payloads:
+        raise ValueError(f"No chunks in {processed_dir}; run scripts/ingest_reports.py first")
+    index = build_index(
+        np.concatenate(blocks), pl.concat(payloads), ivf_threshold=ivf_threshold, model=embedder.backend.model
+    )
+    index.save(index_dir)
+    return {"kind": index.kind, "count": len(index), "seconds": time.perf_counter() - started}
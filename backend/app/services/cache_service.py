@@ -1,114 +1,755 @@
 """
 Redis Caching Service
 Provides caching for PSX data with configurable TTL
+
+Uses the asyncio Redis client on a shared connection pool so cache calls
+never block the event loop. The hiredis parser is picked up automatically
+by redis-py when installed.
+
+Values are stored as raw bytes produced by a pluggable Serializer (orjson
+by default, CACHE_SERIALIZER to change it), so nothing is UTF-8 decoded
+into an intermediate str on the way in or out.
+
+Reads go through an in-process L1 tier (LocalCache) first. Every write or
+delete publishes the key on INVALIDATION_CHANNEL so other replicas drop
+their L1 copy.
+
+Keys in a versioned namespace (NAMESPACES, the part before the first ":")
+are stored under the namespace's current generation, e.g.
+"index:KSE100:latest" -> "index:g3:KSE100:latest". invalidate_namespace()
+bumps the generation, which logically drops every key in it in O(1);
+the orphaned keys simply expire. clear() bumps only the market-data
+namespaces (DATA_NAMESPACES); chat contexts and semantic-cache answers are
+dropped only by an explicit invalidate_namespace("chat"). Keys can also carry tags (e.g.
+symbol_tag("HBL")) and be dropped together with invalidate_tags().
 """
-import redis
-import json
+import redis.asyncio as redis
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+import asyncio
 import logging
-from typing import Optional, Any
-from datetime import timedelta
+import os
+import time
+import uuid
+from typing import Optional, Any, Dict, Iterable, List, Callable, Awaitable, Tuple, Union
+
+from app.services.local_cache import LocalCache
+from app.services.profiling import span
+from app.services.serializers import Serializer, get_serializer
+from app.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Namespaces whose keys are generation-versioned; clear() drops only the data ones
+DATA_NAMESPACES = ("index", "stock", "sector", "company")
+NAMESPACES = DATA_NAMESPACES + ("chat",)
+
+
+def symbol_tag(symbol: str) -> str:
+    """Tag for every cached value derived from one symbol's data"""
+    return f"symbol:{symbol.upper()}"
+
 
 class CacheService:
-    """Redis caching service"""
-    
-    def __init__(self, redis_host: str = "localhost", redis_port: int = 6379, redis_db: int = 0):
-        """Initialize Redis connection"""
+    """Async Redis caching service backed by a shared connection pool"""
+
+    INVALIDATION_CHANNEL = "cache:invalidate"
+    GENERATIONS_KEY = "cache:generations"
+    TAG_KEY_PREFIX = "cache:tag:"
+    TAG_TTL_SECONDS = 86400
+    # Generations are re-read at least this often even if a bump message is missed
+    GENERATION_TTL_SECONDS = 30
+
+    # Unlink every key in a tag set, drop the set, return the keys
+    _INVALIDATE_TAG_SCRIPT = """
+    local members = redis.call("smembers", KEYS[1])
+    for i = 1, #members, 500 do
+        redis.call("unlink", unpack(members, i, math.min(i + 499, #members)))
+    end
+    redis.call("del", KEYS[1])
+    return members
+    """
+
+    # Delete the lock only if we still own it (compare-and-delete)
+    _RELEASE_LOCK_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    # Extend the lease only if we still own the lock
+    _RENEW_LOCK_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("pexpire", KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    def __init__(
+        self,
+        redis_host: str = "localhost",
+        redis_port: int = 6379,
+        redis_db: int = 0,
+        max_connections: int = 50,
+        local_cache_size: int = 1024,
+        local_ttl_seconds: float = 60,
+        serializer: Optional[Serializer] = None,
+    ):
+        """Create the connection pool (no I/O until connect() is awaited)"""
+        self.redis_host = redis_host
+        self.redis_port = redis_port
+        self.redis_db = redis_db
+        self.instance_id = uuid.uuid4().hex
+        self.local = LocalCache(max_size=local_cache_size, max_ttl_seconds=local_ttl_seconds)
+        self._listener_task: Optional[asyncio.Task] = None
+        self._single_flight = SingleFlight()
+        self.serializer = serializer or get_serializer()
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        # Lifetime counters (exported by app.services.metrics)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stale_served = 0
+        self.pool = redis.ConnectionPool(
+            host=redis_host,
+            port=redis_port,
+            db=redis_db,
+            decode_responses=False,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            max_connections=max_connections,
+        )
+        self.redis_client = redis.Redis(connection_pool=self.pool)
+        self.available = False
+
+    async def connect(self) -> bool:
+        """
+        Test the Redis connection
+
+        Returns:
+            True if Redis is reachable, False if caching is disabled
+        """
         try:
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                db=redis_db,
-                decode_responses=True,
-                socket_connect_timeout=2,
-                socket_timeout=2,
-            )
-            # Test connection
-            self.redis_client.ping()
+            await self.redis_client.ping()
             self.available = True
-            logger.info(f"✅ Redis connected: {redis_host}:{redis_port}")
-        except (redis.ConnectionError, redis.TimeoutError) as e:
+            if self.local.max_size > 0:
+                self._listener_task = asyncio.create_task(self._listen_for_invalidations())
+            logger.info(f"✅ Redis connected: {self.redis_host}:{self.redis_port}")
+        except (RedisConnectionError, RedisTimeoutError, OSError) as e:
             logger.warning(f"⚠️ Redis not available: {e}. Caching disabled.")
             self.available = False
-            self.redis_client = None
-    
-    def get(self, key: str) -> Optional[Any]:
+            await self.pool.disconnect()
+        return self.available
+
+    async def close(self) -> None:
+        """Release all pooled connections"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        self.local.clear()
+        await self.redis_client.aclose()
+        await self.pool.disconnect()
+        self.available = False
+
+    async def get(self, key: str, local: bool = True) -> Optional[Any]:
         """
         Get value from cache
-        
+
         Args:
             key: Cache key
-            
+            local: Serve from the L1 tier when possible; pass False to read
+                Redis directly (e.g. for read-modify-write under a lock)
+
         Returns:
             Cached value or None if not found/expired
         """
         if not self.available:
             return None
-            
+
+        key = await self._key(key)
+        local_value = self.local.get(key) if local else None
+        if local_value is not None:
+            logger.debug(f"✅ L1 HIT: {key}")
+            self.hits += 1
+            return local_value
+
         try:
-            value = self.redis_client.get(key)
+            with span("redis"):
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    value, ttl_ms = await pipe.get(key).pttl(key).execute()
             if value:
                 logger.debug(f"✅ Cache HIT: {key}")
-                return json.loads(value)
+                self.hits += 1
+                decoded = self.serializer.loads(value)
+                if ttl_ms > 0:
+                    self.local.set(key, decoded, ttl_ms / 1000)
+                return decoded
             else:
                 logger.debug(f"❌ Cache MISS: {key}")
+                self.misses += 1
                 return None
         except Exception as e:
             logger.error(f"Cache get error for {key}: {e}")
+            self.errors += 1
             return None
-    
-    def set(self, key: str, value: Any, ttl_seconds: int = 300) -> bool:
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Get several values from cache in a single round trip
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            List of cached values aligned with keys (None for misses)
+        """
+        found = await self.get_many(keys)
+        return [found.get(key) for key in keys]
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values with one MGET for everything not in L1
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            {key: value} for hits only. If Redis fails mid-call the L1 hits
+            are still returned.
+        """
+        if not self.available or not keys:
+            return {}
+
+        physical = await self._keys(keys)
+        found: Dict[str, Any] = {}
+        missing: List[str] = []
+        for key in keys:
+            value = self.local.get(physical[key])
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        if not missing:
+            self.hits += len(found)
+            return found
+
+        try:
+            with span("redis"):
+                values = await self.redis_client.mget([physical[key] for key in missing])
+        except Exception as e:
+            logger.error(f"Cache get_many error for {len(missing)} keys: {e}")
+            self.errors += 1
+            self.hits += len(found)
+            self.misses += len(missing)
+            return found
+
+        for key, value in zip(missing, values):
+            if value:
+                try:
+                    found[key] = self.serializer.loads(value)
+                except Exception as e:
+                    logger.warning(f"Cache decode error for {key}: {e}")
+                    self.errors += 1
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: int = 300,
+        tags: Optional[Iterable[str]] = None,
+    ) -> bool:
         """
         Set value in cache with TTL
-        
+
         Args:
             key: Cache key
-            value: Value to cache (will be JSON serialized)
+            value: Value to cache (encoded by the configured serializer)
             ttl_seconds: Time to live in seconds (default: 5 minutes)
-            
+            tags: Tags for invalidate_tags()
+
         Returns:
             True if successful, False otherwise
         """
         if not self.available:
             return False
-            
+
         try:
-            json_value = json.dumps(value)
-            self.redis_client.setex(key, ttl_seconds, json_value)
+            key = await self._key(key)
+            payload = self.serializer.dumps(value)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(key, ttl_seconds, payload)
+                self._tag(pipe, key, tags)
+                await pipe.execute()
+            self._set_local(key, payload, ttl_seconds)
+            await self._publish_invalidation(key)
             logger.debug(f"✅ Cached: {key} (TTL: {ttl_seconds}s)")
             return True
         except Exception as e:
             logger.error(f"Cache set error for {key}: {e}")
+            self.errors += 1
             return False
-    
-    def delete(self, key: str) -> bool:
+
+    def _set_local(self, key: str, payload: bytes, ttl_seconds: float) -> None:
+        """
+        Put a just-written value in L1 as other processes will read it
+
+        L1 holds the decoded payload, never the caller's object: the caller
+        may mutate it later, and a round trip through the serializer turns
+        tuples into lists, datetimes into strings and so on.
+        """
+        if self.local.max_size > 0:
+            self.local.set(key, self.serializer.loads(payload), ttl_seconds)
+
+    async def delete(self, key: str) -> bool:
         """Delete key from cache"""
         if not self.available:
             return False
-            
+
         try:
-            self.redis_client.delete(key)
+            key = await self._key(key)
+            self.local.pop(key)
+            await self.redis_client.delete(key)
+            await self._publish_invalidation(key)
             logger.debug(f"🗑️ Deleted from cache: {key}")
             return True
         except Exception as e:
             logger.error(f"Cache delete error for {key}: {e}")
+            self.errors += 1
             return False
-    
-    def clear(self) -> bool:
-        """Clear all cache"""
+
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl_seconds: int = 300,
+        ttls: Optional[Dict[str, int]] = None,
+        tags: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> int:
+        """
+        Set several values in one pipelined round trip
+
+        Args:
+            items: {key: value}
+            ttl_seconds: Default TTL
+            ttls: Per-key TTL overrides
+            tags: Per-key tags for invalidate_tags()
+
+        Returns:
+            Number of keys written (failed commands are skipped, not raised)
+        """
+        if not self.available or not items:
+            return 0
+
+        ttls = ttls or {}
+        tags = tags or {}
+        keys = list(items)
+        try:
+            physical = await self._keys(keys)
+            payloads = {key: self.serializer.dumps(items[key]) for key in keys}
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.setex(physical[key], ttls.get(key, ttl_seconds), payloads[key])
+                for key in keys:
+                    self._tag(pipe, physical[key], tags.get(key))
+                if self.local.max_size > 0:
+                    for key in keys:
+                        pipe.publish(self.INVALIDATION_CHANNEL, f"{self.instance_id} {physical[key]}")
+                results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logger.error(f"Cache set_many error for {len(keys)} keys: {e}")
+            self.errors += 1
+            return 0
+
+        written = 0
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Cache set_many failed for {key}: {result}")
+                continue
+            self._set_local(physical[key], payloads[key], ttls.get(key, ttl_seconds))
+            written += 1
+        logger.debug(f"✅ Cached {written}/{len(keys)} keys")
+        return written
+
+    async def delete_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """
+        Delete every key matching a glob pattern
+
+        Walks the keyspace with SCAN (never KEYS) and UNLINKs in batches,
+        so Redis is not blocked on large keyspaces.
+
+        Returns:
+            Number of keys deleted (so far, if Redis fails part-way)
+        """
+        if not self.available:
+            return 0
+
+        deleted = 0
+        pattern = await self._key(pattern)
+        self.local.pop_pattern(pattern)
+        try:
+            batch: List[bytes] = []
+            async for key in self.redis_client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += await self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.redis_client.unlink(*batch)
+        except Exception as e:
+            logger.error(f"Cache delete_pattern error for {pattern}: {e}")
+            self.errors += 1
+        await self._publish_invalidation(pattern)
+        logger.debug(f"🗑️ Deleted {deleted} keys matching {pattern}")
+        return deleted
+
+    async def clear(self) -> bool:
+        """
+        Invalidate the market-data namespaces (DATA_NAMESPACES)
+
+        Bumps each data namespace generation instead of FLUSHDB, so locks,
+        chat state and any non-cache keys sharing the database survive.
+        """
         if not self.available:
             return False
-            
+
         try:
-            self.redis_client.flushdb()
+            for namespace in DATA_NAMESPACES:
+                await self.invalidate_namespace(namespace)
+                self.local.pop_pattern(f"{namespace}:*")
+                await self._publish_invalidation(f"{namespace}:*")
             logger.info("🗑️ Cache cleared")
             return True
         except Exception as e:
             logger.error(f"Cache clear error: {e}")
+            self.errors += 1
             return False
-    
+
+    async def invalidate_namespace(self, namespace: str) -> Optional[int]:
+        """
+        Logically drop every key in a namespace (O(1))
+
+        Returns:
+            The new generation, or None if Redis is unavailable
+        """
+        if not self.available:
+            return None
+        try:
+            generation = await self.redis_client.hincrby(self.GENERATIONS_KEY, namespace, 1)
+        except Exception as e:
+            logger.error(f"Cache namespace invalidation error for {namespace}: {e}")
+            self.errors += 1
+            return None
+        self._generations[namespace] = (generation, time.monotonic() + self.GENERATION_TTL_SECONDS)
+        await self.publish(self.INVALIDATION_CHANNEL, f"{self.instance_id} #gen:{namespace}")
+        logger.info(f"🗑️ Cache namespace {namespace} -> generation {generation}")
+        return generation
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every key tagged with any of tags
+
+        Returns:
+            Number of keys dropped
+        """
+        if not self.available or not tags:
+            return 0
+
+        dropped: List[str] = []
+        for tag in tags:
+            try:
+                members = await self.redis_client.eval(self._INVALIDATE_TAG_SCRIPT, 1, self.TAG_KEY_PREFIX + tag)
+            except Exception as e:
+                logger.error(f"Cache tag invalidation error for {tag}: {e}")
+                self.errors += 1
+                continue
+            dropped.extend(m.decode() if isinstance(m, bytes) else m for m in members)
+
+        for key in dropped:
+            self.local.pop(key)
+        if dropped and self.local.max_size > 0:
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key in dropped:
+                        pipe.publish(self.INVALIDATION_CHANNEL, f"{self.instance_id} {key}")
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Cache invalidation publish failed for tags {tags}: {e}")
+        logger.debug(f"🗑️ Invalidated {len(dropped)} keys tagged {', '.join(tags)}")
+        return len(dropped)
+
+    def _tag(self, pipe, key: str, tags: Optional[Iterable[str]]) -> None:
+        """Queue tag-set membership for key on a pipeline"""
+        for tag in tags or ():
+            tag_key = self.TAG_KEY_PREFIX + tag
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, self.TAG_TTL_SECONDS)
+
+    async def _generation(self, namespace: str) -> int:
+        """Current generation of a namespace (cached in process, refreshed on bump messages)"""
+        cached = self._generations.get(namespace)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        try:
+            value = await self.redis_client.hget(self.GENERATIONS_KEY, namespace)
+            generation = int(value) if value else 0
+        except Exception as e:
+            logger.warning(f"Cache generation lookup failed for {namespace}: {e}")
+            return cached[0] if cached is not None else 0
+        self._generations[namespace] = (generation, time.monotonic() + self.GENERATION_TTL_SECONDS)
+        return generation
+
+    async def _key(self, key: str) -> str:
+        """Physical Redis key for a logical key"""
+        namespace, sep, rest = key.partition(":")
+        if not sep or namespace not in NAMESPACES:
+            return key
+        return f"{namespace}:g{await self._generation(namespace)}:{rest}"
+
+    async def _keys(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Physical keys for several logical keys (one generation lookup per namespace)"""
+        return {key: await self._key(key) for key in keys}
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        ttl_seconds: int = 300,
+        stale_ttl_seconds: int = 900,
+        lock_lease_seconds: float = 15,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Optional[Any]:
+        """
+        Read-through cache with stampede protection and stale-while-revalidate
+
+        Values are stored as {"value": ..., "fresh_until": epoch} and kept in
+        Redis for ttl_seconds + stale_ttl_seconds. Within the stale window the
+        previous value is returned immediately while one background refresh
+        runs. Loads are coalesced per process (SingleFlight) and per cluster
+        (short-lease Redis lock on "lock:{key}").
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the value (None = load failed)
+            ttl_seconds: How long a value counts as fresh
+            stale_ttl_seconds: How long a stale value may still be served
+            lock_lease_seconds: Lease of the cluster-wide refresh lock
+            tags: Tags for invalidate_tags()
+
+        Returns:
+            Fresh or stale cached value, newly loaded value, or None
+        """
+        envelope = await self.get(key)
+        if isinstance(envelope, dict) and "value" in envelope:
+            if envelope.get("fresh_until", 0) > time.time():
+                return envelope["value"]
+            self.stale_served += 1
+            if not self._single_flight.in_flight(key):
+                logger.info(f"♻️ Serving stale {key}, refreshing in background")
+            self._single_flight.start(
+                key, lambda: self._refresh(key, loader, ttl_seconds, stale_ttl_seconds, lock_lease_seconds, tags)
+            )
+            return envelope["value"]
+
+        return await self._single_flight.do(
+            key, lambda: self._refresh(key, loader, ttl_seconds, stale_ttl_seconds, lock_lease_seconds, tags)
+        )
+
+    async def set_fresh(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: int = 300,
+        stale_ttl_seconds: int = 900,
+        tags: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """Store value in the envelope format read by get_or_load"""
+        envelope = {"value": value, "fresh_until": time.time() + ttl_seconds}
+        return await self.set(key, envelope, ttl_seconds=ttl_seconds + stale_ttl_seconds, tags=tags)
+
+    async def get_value(self, key: str) -> Optional[Any]:
+        """Read a value written by set_fresh/get_or_load without loading (stale allowed)"""
+        envelope = await self.get(key)
+        if isinstance(envelope, dict) and "value" in envelope:
+            return envelope["value"]
+        return None
+
+    async def _refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        ttl_seconds: int,
+        stale_ttl_seconds: int,
+        lock_lease_seconds: float,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Optional[Any]:
+        """Load key (once across the cluster where possible) and store it"""
+        lock_name = f"lock:{key}"
+        token = await self.acquire_lock(lock_name, lock_lease_seconds)
+        try:
+            if token is None and self.available:
+                # Another replica holds the lock: wait for its result
+                value = await self._wait_for_fresh(key, lock_lease_seconds)
+                if value is not None:
+                    return value
+
+            value = await loader()
+            if value is not None:
+                await self.set_fresh(key, value, ttl_seconds, stale_ttl_seconds, tags)
+            return value
+        except Exception as e:
+            logger.error(f"Cache refresh error for {key}: {e}", exc_info=True)
+            self.errors += 1
+            return None
+        finally:
+            if token is not None:
+                await self.release_lock(lock_name, token)
+
+    async def _wait_for_fresh(self, key: str, timeout_seconds: float) -> Optional[Any]:
+        """Poll for a fresh value written by another replica"""
+        deadline = time.monotonic() + timeout_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+            envelope = await self.get(key)
+            if isinstance(envelope, dict) and envelope.get("fresh_until", 0) > time.time():
+                return envelope["value"]
+        logger.warning(f"⚠️ Timed out waiting for {key} refresh, loading locally")
+        return None
+
+    async def acquire_lock(self, name: str, lease_seconds: float, token: Optional[str] = None) -> Optional[str]:
+        """
+        Try to take a cluster-wide lock (SET NX PX)
+
+        Args:
+            name: Lock key
+            lease_seconds: Lock expiry
+            token: Owner token; if the lock is already held with this token
+                its lease is renewed instead of failing
+
+        Returns:
+            Ownership token, or None if the lock is held elsewhere or Redis is down
+        """
+        if not self.available:
+            return None
+        token = token or uuid.uuid4().hex
+        lease_ms = int(lease_seconds * 1000)
+        try:
+            if await self.redis_client.set(name, token, nx=True, px=lease_ms):
+                return token
+            renewed = await self.redis_client.eval(self._RENEW_LOCK_SCRIPT, 1, name, token, lease_ms)
+            return token if renewed else None
+        except Exception as e:
+            logger.error(f"Cache lock error for {name}: {e}")
+            self.errors += 1
+            return None
+
+    async def release_lock(self, name: str, token: str) -> None:
+        """Release a lock taken with acquire_lock, if still owned"""
+        try:
+            await self.redis_client.eval(self._RELEASE_LOCK_SCRIPT, 1, name, token)
+        except Exception as e:
+            logger.warning(f"Cache lock release error for {name}: {e}")
+
+    async def _publish_invalidation(self, key: str) -> None:
+        """Tell other replicas to drop key from their L1 tier (glob patterns allowed, "*" = everything)"""
+        if self.local.max_size <= 0:
+            return
+        await self.publish(self.INVALIDATION_CHANNEL, f"{self.instance_id} {key}")
+
+    async def publish(self, channel: str, message: Union[str, bytes]) -> bool:
+        """Publish a message on a Redis pub/sub channel"""
+        if not self.available:
+            return False
+        try:
+            await self.redis_client.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.warning(f"Cache publish error on {channel}: {e}")
+            return False
+
+    async def subscribe(
+        self,
+        channel: str,
+        handler: Callable[[str], Any],
+        on_disconnect: Optional[Callable[[], Any]] = None,
+        on_subscribe: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Run handler for every message on channel, until cancelled
+
+        Uses a dedicated connection without a socket timeout, since a
+        subscriber sits idle between messages, and reconnects with backoff.
+        on_disconnect runs whenever the subscription drops, since messages
+        may have been missed. on_subscribe (sync or async) runs each time the
+        subscription is (re)established, before any message is handled, so
+        state can be resynced from the cache first.
+        """
+        backoff = 1
+        while True:
+            client = redis.Redis(
+                host=self.redis_host,
+                port=self.redis_port,
+                db=self.redis_db,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                health_check_interval=30,
+            )
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(channel)
+                backoff = 1
+                if on_subscribe is not None:
+                    result = on_subscribe()
+                    if asyncio.iscoroutine(result):
+                        await result
+                async for message in pubsub.listen():
+                    result = handler(message["data"])
+                    if asyncio.iscoroutine(result):
+                        await result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Subscriber on {channel} lost: {e}. Retrying in {backoff}s")
+                if on_disconnect is not None:
+                    on_disconnect()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    async def _listen_for_invalidations(self) -> None:
+        """
+        Background task evicting L1 entries rewritten by other replicas
+
+        If the subscription drops, L1 and the cached namespace generations
+        are cleared because invalidations may have been missed.
+        """
+        await self.subscribe(self.INVALIDATION_CHANNEL, self._on_invalidation, on_disconnect=self._on_invalidations_lost)
+
+    def _on_invalidations_lost(self) -> None:
+        self.local.clear()
+        self._generations.clear()
+
+    def _on_invalidation(self, data: str) -> None:
+        origin, _, key = data.partition(" ")
+        if origin == self.instance_id:
+            return
+        if key.startswith("#gen:"):
+            # Namespace bumped elsewhere: re-read its generation on next use
+            self._generations.pop(key[5:], None)
+        elif key == "*":
+            self.local.clear()
+        elif any(c in key for c in "*?["):
+            self.local.pop_pattern(key)
+        else:
+            self.local.pop(key)
+
     def is_available(self) -> bool:
         """Check if Redis is available"""
         return self.available
@@ -116,11 +757,30 @@ class CacheService:
 
 # Singleton instance
 _cache_instance: Optional[CacheService] = None
+_cache_lock = asyncio.Lock()
 
-def get_cache_service() -> CacheService:
-    """Get singleton cache service instance"""
+async def get_cache_service() -> CacheService:
+    """Get singleton cache service instance (connects on first use)"""
     global _cache_instance
     if _cache_instance is None:
-        _cache_instance = CacheService()
+        async with _cache_lock:
+            if _cache_instance is None:
+                service = CacheService(
+                    redis_host=os.getenv("REDIS_HOST", "localhost"),
+                    redis_port=int(os.getenv("REDIS_PORT", "6379")),
+                    max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+                    local_cache_size=int(os.getenv("CACHE_L1_MAX_SIZE", "1024")),
+                    local_ttl_seconds=float(os.getenv("CACHE_L1_MAX_TTL", "60")),
+                    serializer=get_serializer(os.getenv("CACHE_SERIALIZER", "orjson")),
+                )
+                await service.connect()
+                _cache_instance = service
     return _cache_instance
 
+
+async def close_cache_service() -> None:
+    """Close the singleton cache service (called on app shutdown)"""
+    global _cache_instance
+    if _cache_instance is not None:
+        await _cache_instance.close()
+        _cache_instance = None
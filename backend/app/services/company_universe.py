@@ -0,0 +1,143 @@
+"""
+Company Universe
+In-memory company store with pre-sorted views for /companies/top
+
+Every (sector, sort field) combination is sorted once when the universe
+loads or prices change, so a request is an O(limit) slice of a ready list
+instead of a filter + sort over the whole universe.
+
+`version` is a digest of the universe's contents, so replicas holding the
+same data agree on it (response cache entries and ETags are keyed on it)
+however many times each has rebuilt.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+SORT_FIELDS = (
+    "rank", "symbol", "market_cap", "price", "change_percent",
+    "pe_ratio", "dividend_yield", "volume",
+)
+
+# Quote fields the poller may update
+QUOTE_FIELDS = ("price", "change", "change_percent", "volume")
+
+
+class CompanyUniverse:
+    """
+    Company universe with per-sector, per-field sorted views
+
+    Views are kept ascending; descending requests read them from the end.
+    """
+
+    def __init__(self, companies: Iterable[Dict] = ()):
+        self.version = ""
+        self._companies: Dict[str, Dict] = {}
+        self._views: Dict[Tuple[Optional[str], str], List[Dict]] = {}
+        self.load(companies)
+
+    def load(self, companies: Iterable[Dict]) -> None:
+        """Replace the universe and rebuild every view"""
+        self._companies = {c["symbol"]: dict(c) for c in companies}
+        self._rebuild()
+
+    def apply_quotes(self, quotes: Dict[str, Dict]) -> bool:
+        """
+        Merge fresh quotes into the universe
+
+        Args:
+            quotes: {symbol: quote} as produced by the market poller
+
+        Returns:
+            True if any value changed (views were rebuilt)
+        """
+        changed = False
+        for symbol, quote in quotes.items():
+            company = self._companies.get(symbol)
+            if company is None:
+                continue
+            for field in QUOTE_FIELDS:
+                value = quote.get(field)
+                if value is not None and company.get(field) != value:
+                    company[field] = value
+                    changed = True
+        if changed:
+            self._rebuild()
+        return changed
+
+    def on_market_snapshot(self, market: Dict) -> None:
+        """Market stream listener: apply the snapshot's quotes"""
+        self.apply_quotes(market.get("quotes") or {})
+
+    def _rebuild(self) -> None:
+        companies = list(self._companies.values())
+        sectors: Dict[Optional[str], List[Dict]] = {None: companies}
+        for company in companies:
+            sectors.setdefault(company["sector"], []).append(company)
+
+        views = {}
+        for sector, members in sectors.items():
+            for field in SORT_FIELDS:
+                views[(sector, field)] = sorted(members, key=lambda c, f=field: c[f])
+        self._views = views
+        self.version = self._digest()
+        logger.debug(f"Company universe {self.version}: {len(companies)} companies, {len(views)} views")
+
+    def _digest(self) -> str:
+        """Content version: identical data gives the identical version in every process"""
+        encoded = orjson.dumps(
+            [self._companies[symbol] for symbol in sorted(self._companies)], option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+    def top(
+        self,
+        limit: int,
+        sort_by: str = "rank",
+        descending: bool = False,
+        sector: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        First `limit` companies of the full (optionally sector-filtered) universe
+
+        Args:
+            limit: Number of companies to return
+            sort_by: One of SORT_FIELDS
+            descending: Largest first
+            sector: Only companies in this sector
+
+        Returns:
+            Company dicts (shared, do not mutate)
+        """
+        view = self._views.get((sector, sort_by), [])
+        if limit <= 0:
+            return []
+        if descending:
+            return view[-limit:][::-1]
+        return view[:limit]
+
+    def sector(self, name: str) -> List[Dict]:
+        """Companies in a sector, by rank"""
+        return self._views.get((name, "rank"), [])
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        return self._companies.get(symbol)
+
+    def __len__(self) -> int:
+        return len(self._companies)
+
+
+# Singleton instance
+_company_universe: Optional[CompanyUniverse] = None
+
+def get_company_universe() -> CompanyUniverse:
+    """Get or create the company universe (seeded from the mock top companies)"""
+    global _company_universe
+    if _company_universe is None:
+        from app.mocks.sectors import MOCK_TOP_COMPANIES
+        _company_universe = CompanyUniverse(MOCK_TOP_COMPANIES)
+    return _company_universe
@@ -0,0 +1,70 @@
+"""
+In-Process LRU Cache
+Bounded, per-key TTL cache used as the L1 tier in front of Redis
+"""
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Optional, Any, Tuple
+import time
+
+
+class LocalCache:
+    """
+    Size-bounded LRU cache with per-key expiry
+
+    Not thread-safe; it is only touched from the event loop thread.
+    Values are returned by reference, so callers must treat them as read-only.
+    """
+
+    def __init__(self, max_size: int = 1024, max_ttl_seconds: float = 60):
+        self.max_size = max_size
+        self.max_ttl_seconds = max_ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for key, or None if missing/expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value, capping its lifetime at max_ttl_seconds"""
+        ttl = min(ttl_seconds, self.max_ttl_seconds)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        """Drop key if present"""
+        self._data.pop(key, None)
+
+    def pop_pattern(self, pattern: str) -> int:
+        """Drop keys matching a glob pattern (Redis MATCH syntax); returns the count"""
+        matched = [key for key in self._data if fnmatchcase(key, pattern)]
+        for key in matched:
+            del self._data[key]
+        return len(matched)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
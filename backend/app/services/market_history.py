@@ -0,0 +1,91 @@
+"""
+Market History Service
+Persists index snapshots and serves historical OHLCV from TimescaleDB
+continuous aggregates (index_prices_1d / index_prices_1w)
+"""
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta
+from typing import Dict, List
+import logging
+
+from app.db import get_sessionmaker
+from app.models import IndexPrice
+
+logger = logging.getLogger(__name__)
+
+# Pre-rolled aggregate per supported interval
+HISTORY_VIEWS = {
+    "1d": "index_prices_1d",
+    "1w": "index_prices_1w",
+}
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse the scraper's ISO 8601 timestamp into a naive UTC datetime"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+async def record_index_snapshot(market: Dict) -> None:
+    """
+    Poller sink: store every index in the snapshot as one index_prices row
+
+    Snapshots are points in time, so open/high/low/close all carry the
+    current value; the daily aggregates derive the real OHLC from them.
+    """
+    indices = market.get("indices") or {}
+    if not indices:
+        return
+
+    rows = [
+        {
+            "symbol": symbol,
+            "timestamp": _parse_timestamp(data["timestamp"]),
+            "open": data["value"],
+            "high": data["value"],
+            "low": data["value"],
+            "close": data["value"],
+            "volume": data.get("volume"),
+        }
+        for symbol, data in indices.items()
+    ]
+    statement = insert(IndexPrice).values(rows).on_conflict_do_nothing(
+        index_elements=["symbol", "timestamp"]
+    )
+    async with get_sessionmaker()() as session:
+        await session.execute(statement)
+        await session.commit()
+    logger.debug(f"Stored {len(rows)} index snapshots")
+
+
+async def get_index_history(symbol: str, days: int, interval: str = "1d") -> List[Dict]:
+    """
+    Historical OHLCV bars for an index
+
+    Args:
+        symbol: Index symbol (e.g. KSE100)
+        days: How many days back to return
+        interval: Bucket size, "1d" or "1w"
+
+    Returns:
+        Bars ordered oldest first
+    """
+    view = HISTORY_VIEWS[interval]
+    since = datetime.utcnow() - timedelta(days=days)
+    query = text(
+        f"SELECT bucket, open, high, low, close, volume FROM {view} "
+        "WHERE symbol = :symbol AND bucket >= :since ORDER BY bucket"
+    )
+    async with get_sessionmaker()() as session:
+        result = await session.execute(query, {"symbol": symbol, "since": since})
+        return [
+            {
+                "date": row.bucket.date().isoformat(),
+                "open": float(row.open),
+                "high": float(row.high),
+                "low": float(row.low),
+                "close": float(row.close),
+                "volume": int(row.volume or 0),
+            }
+            for row in result
+        ]
@@ -0,0 +1,346 @@
+"""
+Market Data Poller
+Background ingestion worker that polls PSX and publishes snapshots to the cache,
+so API requests never wait on a PSX fetch.
+
+Runs inside the API process (started from the FastAPI lifespan) or standalone:
+    python -m app.services.market_poller
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Optional, Dict, List, Callable, Awaitable, Set
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.services.psx_scraper import get_psx_scraper
+from app.services.cache_service import get_cache_service, symbol_tag
+
+logger = logging.getLogger(__name__)
+
+INDEX_CACHE_TTL = 300  # 5 minutes fresh
+INDEX_STALE_TTL = 900  # then served stale for up to 15 minutes while refreshing
+ALL_INDICES_CACHE_KEY = "index:all:latest"
+
+QUOTE_CACHE_TTL = 60  # stock:price:{symbol}:latest
+
+# Receives {"indices": {symbol: Dict}, "quotes": {symbol: Dict}} after every successful poll
+SnapshotSink = Callable[[Dict], Awaitable[None]]
+
+# Sink failures from an unreachable backing service (e.g. no Postgres in
+# development): logged once as a warning, not as a traceback every cycle
+UNAVAILABLE_SINK_ERRORS = (OSError, asyncio.TimeoutError, OperationalError, InterfaceError)
+
+# Constituent counts for indices with a fixed membership
+INDEX_CONSTITUENTS = {"KSE100": 100, "KSE30": 30, "KMI30": 30, "MII30": 30, "PSXDIV20": 20, "UPP9": 9}
+
+
+def index_cache_key(symbol: str) -> str:
+    """Cache key for an index's latest snapshot"""
+    return f"index:{symbol}:latest"
+
+
+KSE100_CACHE_KEY = index_cache_key("KSE100")
+
+
+def _complete_index(real_data: Dict) -> Dict:
+    """Fill index fields the PSX page does not provide"""
+    symbol = real_data['symbol']
+    value = real_data['value']
+    # Ensure all required fields are present
+    # Add missing fields with sensible defaults
+    if 'open' not in real_data:
+        real_data['open'] = real_data.get('previous_close', value)
+    real_data.setdefault('high', value)
+    real_data.setdefault('low', value)
+    real_data.setdefault('volume', 0)
+    real_data.setdefault('year_high', real_data['high'])
+    real_data.setdefault('year_low', real_data['low'])
+    real_data.setdefault('ytd_change_percent', 0.0)
+    if 'market_cap' not in real_data:
+        # Only known (approximately) for the benchmark index
+        real_data['market_cap'] = 8547000000000 if symbol == "KSE100" else 0
+    if 'constituent_count' not in real_data:
+        real_data['constituent_count'] = INDEX_CONSTITUENTS.get(symbol, 0)
+    if 'average_volume_30d' not in real_data:
+        real_data['average_volume_30d'] = real_data.get('volume')
+    return real_data
+
+
+async def fetch_indices_snapshot() -> Optional[Dict[str, Dict]]:
+    """Fetch every index from PSX (one page fetch) and fill missing fields"""
+    logger.info("📊 Fetching fresh index data from PSX...")
+    indices = await get_psx_scraper().fetch_all_indices()
+    if not indices:
+        return None
+    if "KSE100" in indices:
+        logger.info(f"✅ Fetched real KSE100 data: {indices['KSE100']['value']}")
+    return {symbol: _complete_index(data) for symbol, data in indices.items()}
+
+
+async def store_indices(cache, indices: Dict[str, Dict], ttl_seconds: int = INDEX_CACHE_TTL) -> None:
+    """Write each index under its own key plus the combined snapshot"""
+    await asyncio.gather(
+        cache.set_fresh(ALL_INDICES_CACHE_KEY, indices, ttl_seconds=ttl_seconds, stale_ttl_seconds=INDEX_STALE_TTL),
+        *(
+            cache.set_fresh(
+                index_cache_key(symbol), data,
+                ttl_seconds=ttl_seconds, stale_ttl_seconds=INDEX_STALE_TTL, tags=[symbol_tag(symbol)],
+            )
+            for symbol, data in indices.items()
+        ),
+    )
+
+
+def quote_cache_key(symbol: str) -> str:
+    """Cache key for a symbol's latest quote"""
+    return f"stock:price:{symbol}:latest"
+
+
+def _default_symbols() -> List[str]:
+    """Symbols polled each cycle (MARKET_POLL_SYMBOLS or the top-companies universe)"""
+    configured = os.getenv("MARKET_POLL_SYMBOLS", "")
+    if configured:
+        return [s.strip().upper() for s in configured.split(",") if s.strip()]
+    from app.mocks.sectors import get_mock_top_companies
+    return [c["symbol"] for c in get_mock_top_companies(limit=100)]
+
+
+class MarketDataPoller:
+    """
+    Polls PSX on a trading-hours-aware cadence
+
+    Only one replica polls per cycle (Redis lock); the others just refresh
+    their in-process copy of the latest snapshot from the cache. Sinks run
+    only where the poll ran; per-worker state such as the company universe
+    follows the market stream instead (MarketStreamHub.add_listener).
+    """
+
+    LOCK_NAME = "lock:poller:market"
+
+    @property
+    def latest(self) -> Optional[Dict]:
+        """Latest KSE100 snapshot held in process"""
+        return self.latest_indices.get("KSE100")
+
+    def __init__(
+        self,
+        open_interval_seconds: float = 60,
+        closed_interval_seconds: float = 900,
+        symbols: Optional[List[str]] = None,
+    ):
+        self.open_interval_seconds = open_interval_seconds
+        self.closed_interval_seconds = closed_interval_seconds
+        self.symbols = symbols if symbols is not None else []
+        self.latest_indices: Dict[str, Dict] = {}
+        self.latest_quotes: Dict[str, Dict] = {}
+        self.last_success_at: Optional[float] = None
+        self.sinks: List[SnapshotSink] = []
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._unavailable_sinks: Set[str] = set()
+        self._lock_token = uuid.uuid4().hex
+
+    @property
+    def running(self) -> bool:
+        """Check whether the polling loop is active in this process"""
+        return self._task is not None and not self._task.done()
+
+    def add_sink(self, sink: SnapshotSink) -> None:
+        """Register an extra async consumer called with every new snapshot"""
+        self.sinks.append(sink)
+
+    def current_interval(self) -> float:
+        """Seconds until the next poll, based on trading status and recent failures"""
+        if get_psx_scraper()._determine_trading_status() == "open":
+            interval = self.open_interval_seconds
+        else:
+            interval = self.closed_interval_seconds
+        if self._failures:
+            # Back off on consecutive failures, never slower than the closed cadence
+            interval = min(interval * (2 ** self._failures), max(interval, self.closed_interval_seconds))
+        return interval
+
+    async def poll_once(self) -> Optional[Dict]:
+        """
+        Run one polling cycle
+
+        Returns:
+            The snapshot fetched (or read from cache when another replica
+            owns this cycle), None if nothing is available
+        """
+        cache = await get_cache_service()
+        interval = self.current_interval()
+        token = await cache.acquire_lock(
+            self.LOCK_NAME, lease_seconds=max(interval * 0.9, 1), token=self._lock_token
+        )
+
+        if token is None and cache.is_available():
+            # Another replica is polling; just mirror its result
+            indices = await cache.get_value(ALL_INDICES_CACHE_KEY)
+            if indices:
+                self.latest_indices = indices
+            return self.latest
+
+        # Keep the lock until it expires so no replica polls again this cycle
+        # Index page and constituent pages are fetched concurrently
+        market = await get_psx_scraper().fetch_market_snapshot(self.symbols)
+        quotes = market["quotes"]
+        if quotes:
+            self.latest_quotes.update(quotes)
+            quote_ttl = int(max(QUOTE_CACHE_TTL, interval * 2))
+            await cache.set_many(
+                {quote_cache_key(s): q for s, q in quotes.items()},
+                ttl_seconds=quote_ttl,
+                tags={quote_cache_key(s): [symbol_tag(s)] for s in quotes},
+            )
+
+        if not market["indices"]:
+            self._failures += 1
+            logger.warning(f"⚠️ PSX poll failed ({self._failures} in a row)")
+            return None
+
+        indices = {symbol: _complete_index(data) for symbol, data in market["indices"].items()}
+        self._failures = 0
+        self.latest_indices = indices
+        self.last_success_at = time.time()
+        # Stay fresh for at least one full cycle so reads between polls are hits
+        await store_indices(cache, indices, ttl_seconds=int(max(INDEX_CACHE_TTL, interval * 2)))
+
+        await self._run_sinks(self.sinks, {"indices": indices, "quotes": quotes})
+
+        return self.latest
+
+    async def _run_sinks(self, sinks: List[SnapshotSink], market: Dict) -> None:
+        """Feed a snapshot to sinks; one failing sink never stops the others"""
+        for sink in sinks:
+            name = getattr(sink, "__name__", repr(sink))
+            try:
+                await sink(market)
+            except UNAVAILABLE_SINK_ERRORS as e:
+                if name not in self._unavailable_sinks:
+                    self._unavailable_sinks.add(name)
+                    logger.warning(f"⚠️ Snapshot sink {name} skipped, backing service unavailable: {e}")
+                continue
+            except Exception as e:
+                logger.error(f"Snapshot sink {name} failed: {e}", exc_info=True)
+                continue
+            if name in self._unavailable_sinks:
+                self._unavailable_sinks.discard(name)
+                logger.info(f"✅ Snapshot sink {name} recovered")
+
+    async def _run(self) -> None:
+        """Polling loop"""
+        logger.info("🔁 Market data poller started")
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Market data poll error: {e}", exc_info=True)
+            await asyncio.sleep(self.current_interval())
+
+    def start(self) -> None:
+        """Start the polling loop on the running event loop"""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the polling loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("⏹️ Market data poller stopped")
+
+
+async def get_index_snapshot(symbol: str = "KSE100") -> Optional[Dict]:
+    """
+    Latest snapshot of one index for API reads
+
+    When the poller runs in this process reads are pure cache lookups (with
+    the poller's in-process copy as fallback). Otherwise falls back to a
+    coalesced read-through load; that single page fetch also caches every
+    other index on the page.
+    """
+    cache = await get_cache_service()
+    poller = get_market_poller()
+    key = index_cache_key(symbol)
+    if poller.running:
+        snapshot = await cache.get_value(key)
+        return snapshot or poller.latest_indices.get(symbol)
+
+    async def load() -> Optional[Dict]:
+        indices = await fetch_indices_snapshot()
+        if not indices:
+            return None
+        # One fetch, N cache entries
+        await store_indices(cache, indices)
+        return indices.get(symbol)
+
+    return await cache.get_or_load(
+        key,
+        load,
+        ttl_seconds=INDEX_CACHE_TTL,
+        stale_ttl_seconds=INDEX_STALE_TTL,
+    )
+
+
+async def get_kse100_snapshot() -> Optional[Dict]:
+    """Latest KSE100 snapshot for API reads"""
+    return await get_index_snapshot("KSE100")
+
+
+def poller_enabled() -> bool:
+    """Whether the API process should run the poller (ENABLE_MARKET_POLLER)"""
+    return os.getenv("ENABLE_MARKET_POLLER", "true").lower() in ("1", "true", "yes")
+
+
+# Singleton instance
+_poller_instance: Optional[MarketDataPoller] = None
+
+def get_market_poller() -> MarketDataPoller:
+    """Get singleton market data poller instance"""
+    global _poller_instance
+    if _poller_instance is None:
+        _poller_instance = MarketDataPoller(
+            open_interval_seconds=float(os.getenv("MARKET_POLL_INTERVAL_OPEN", "60")),
+            closed_interval_seconds=float(os.getenv("MARKET_POLL_INTERVAL_CLOSED", "900")),
+            symbols=_default_symbols(),
+        )
+    return _poller_instance
+
+
+async def run_forever() -> None:
+    """Standalone worker entry point"""
+    from app.services.cache_service import close_cache_service
+    from app.services.psx_scraper import close_psx_scraper
+    from app.services.market_history import record_index_snapshot
+    from app.services.market_stream import publish_market_snapshot
+    from app.db import close_engine
+
+    poller = get_market_poller()
+    poller.add_sink(record_index_snapshot)
+    poller.add_sink(publish_market_snapshot)
+    poller.start()
+    try:
+        await poller._task
+    finally:
+        await close_psx_scraper()
+        await close_cache_service()
+        await close_engine()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(run_forever())
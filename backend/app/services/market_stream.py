@@ -0,0 +1,238 @@
+"""
+Market Stream
+Fans market snapshots out to SSE / WebSocket clients
+
+The poller publishes each snapshot once on STREAM_CHANNEL; every worker
+holds a single Redis subscription, diffs the snapshot against its last
+known state and pushes only the changed fields to its clients. Each
+message is encoded once and shared by all subscribers.
+
+In-process consumers of the same snapshots (e.g. the company universe)
+register with add_listener(); because every API worker holds the
+subscription, they stay current on replicas that do not own the poll
+lock and when the poller runs standalone (ENABLE_MARKET_POLLER=false).
+
+The hub seeds its state from the cached snapshot (index:all:latest plus
+the latest quotes) whenever its subscription is established, so clients
+connecting while the market is closed get a full snapshot straight away,
+and deltas missed while Redis was unreachable are replayed as one delta.
+
+Slow consumers get a small bounded queue. When it overflows, the queued
+deltas are dropped and replaced by one full snapshot, so memory stays
+bounded per client and a lagging client resyncs instead of stalling the
+fan-out.
+"""
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+import orjson
+
+from app.services.cache_service import get_cache_service
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHANNEL = "market:stream"
+SECTIONS = ("indices", "quotes")
+
+# Called with every full snapshot this worker receives
+SnapshotListener = Callable[[Dict], None]
+
+# Fields that change on every poll and are not worth a delta on their own
+VOLATILE_FIELDS = {"timestamp"}
+
+
+class StreamMessage(NamedTuple):
+    """One encoded stream event (shared by every subscriber)"""
+    event: str
+    seq: int
+    data: bytes  # JSON
+    sse: bytes   # complete SSE frame
+
+
+def _encode(event: str, seq: int, payload: Dict) -> StreamMessage:
+    data = orjson.dumps({"type": event, "seq": seq, **payload})
+    sse = b"id: %d\nevent: %s\ndata: %s\n\n" % (seq, event.encode(), data)
+    return StreamMessage(event, seq, data, sse)
+
+
+class Subscription:
+    """A connected client's bounded message queue"""
+
+    def __init__(self, hub: "MarketStreamHub", queue_size: int):
+        self.hub = hub
+        self.queue: "asyncio.Queue[StreamMessage]" = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+    def offer(self, message: StreamMessage) -> None:
+        """Enqueue without blocking; on overflow collapse the backlog into a snapshot"""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.hub.snapshot_message())
+            self.resyncs += 1
+            self.hub.resyncs += 1
+
+    async def get(self) -> StreamMessage:
+        return await self.queue.get()
+
+
+class MarketStreamHub:
+    """Per-worker fan-out of market deltas"""
+
+    def __init__(self, max_clients: int = 5000, queue_size: int = 16, heartbeat_seconds: float = 15):
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.seq = 0
+        self.resyncs = 0
+        self._state: Dict[str, Dict[str, Dict]] = {section: {} for section in SECTIONS}
+        self._snapshot: Optional[StreamMessage] = None
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[SnapshotListener] = []
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def full(self) -> bool:
+        """True when no more clients can subscribe"""
+        return len(self._subscribers) >= self.max_clients
+
+    def subscribe(self) -> Optional[Subscription]:
+        """Register a client (None when the worker is at max_clients); it starts with a snapshot"""
+        if self.full:
+            return None
+        subscription = Subscription(self, self.queue_size)
+        subscription.offer(self.snapshot_message())
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def add_listener(self, listener: SnapshotListener) -> None:
+        """Register an in-process consumer of every snapshot (not just the deltas)"""
+        self._listeners.append(listener)
+
+    def snapshot_message(self) -> StreamMessage:
+        """Full current state (encoded once per sequence number)"""
+        if self._snapshot is None or self._snapshot.seq != self.seq:
+            self._snapshot = _encode("snapshot", self.seq, self._state)
+        return self._snapshot
+
+    def _diff(self, market: Dict) -> Dict[str, Dict[str, Dict]]:
+        """Changed fields per symbol, applied to the local state"""
+        delta: Dict[str, Dict[str, Dict]] = {}
+        for section in SECTIONS:
+            known = self._state[section]
+            for symbol, data in (market.get(section) or {}).items():
+                previous = known.get(symbol) or {}
+                changed = {k: v for k, v in data.items() if previous.get(k) != v}
+                if not changed or set(changed) <= VOLATILE_FIELDS:
+                    continue
+                known[symbol] = {**previous, **data}
+                delta.setdefault(section, {})[symbol] = changed
+        return delta
+
+    def dispatch(self, market: Dict) -> int:
+        """
+        Push a snapshot's changes to every subscriber
+
+        Returns:
+            Sequence number of the delta sent, or 0 if nothing changed
+        """
+        for listener in self._listeners:
+            try:
+                listener(market)
+            except Exception as e:
+                logger.error(f"Stream listener {getattr(listener, '__name__', listener)} failed: {e}", exc_info=True)
+        delta = self._diff(market)
+        if not delta:
+            return 0
+        self.seq += 1
+        message = _encode("delta", self.seq, delta)
+        for subscription in self._subscribers:
+            subscription.offer(message)
+        return self.seq
+
+    async def resync(self) -> int:
+        """
+        Apply the latest cached snapshot (indices and quotes)
+
+        Returns:
+            Sequence number of the resulting delta, or 0 if nothing changed
+        """
+        from app.services.market_poller import ALL_INDICES_CACHE_KEY, get_market_poller, quote_cache_key
+
+        cache = await get_cache_service()
+        keys = {quote_cache_key(symbol): symbol for symbol in get_market_poller().symbols}
+        indices, quotes = await asyncio.gather(cache.get_value(ALL_INDICES_CACHE_KEY), cache.get_many(list(keys)))
+        market = {"indices": indices or {}, "quotes": {keys[key]: quote for key, quote in quotes.items()}}
+        if not market["indices"] and not market["quotes"]:
+            return 0
+        seq = self.dispatch(market)
+        logger.info(f"🔄 Market stream resynced from cache ({len(market['indices'])} indices, "
+                    f"{len(market['quotes'])} quotes)")
+        return seq
+
+    def _on_message(self, data: str) -> None:
+        try:
+            self.dispatch(orjson.loads(data))
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Malformed stream message: {e}")
+
+    async def start(self) -> None:
+        """Subscribe this worker to STREAM_CHANNEL (no-op without Redis), resyncing on every (re)subscribe"""
+        if self._listener_task is not None:
+            return
+        cache = await get_cache_service()
+        if not cache.is_available():
+            logger.info("Market stream running without Redis (local poller only)")
+            return
+        self._listener_task = asyncio.create_task(
+            cache.subscribe(STREAM_CHANNEL, self._on_message, on_subscribe=self.resync)
+        )
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        self._subscribers.clear()
+
+
+# Singleton instance
+_market_stream: Optional[MarketStreamHub] = None
+
+def get_market_stream() -> MarketStreamHub:
+    """Get or create this worker's stream hub"""
+    global _market_stream
+    if _market_stream is None:
+        _market_stream = MarketStreamHub(
+            max_clients=int(os.getenv("STREAM_MAX_CLIENTS", "5000")),
+            queue_size=int(os.getenv("STREAM_CLIENT_QUEUE_SIZE", "16")),
+            heartbeat_seconds=float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15")),
+        )
+    return _market_stream
+
+
+async def publish_market_snapshot(market: Dict) -> None:
+    """
+    Poller sink: publish the snapshot to every worker
+
+    Goes through Redis when available; otherwise only this worker's
+    clients can be reached, so the local hub is fed directly.
+    """
+    cache = await get_cache_service()
+    if cache.is_available() and await cache.publish(STREAM_CHANNEL, orjson.dumps(market)):
+        return
+    get_market_stream().dispatch(market)
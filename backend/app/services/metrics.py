@@ -0,0 +1,191 @@
+"""
+Prometheus Metrics
+Metric definitions shared by the API middleware and background services
+
+Hot-path counters (cache hits/misses/errors, stream resyncs, pool events)
+are plain integers on the owning objects; RuntimeCollector turns them into
+metric families only when /metrics is scraped, so recording costs one
+integer add. Only request latency and PSX fetches use prometheus_client
+histograms directly, with bounded label sets (route templates, page kinds).
+"""
+import time
+from typing import Iterator
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Around the p95 targets in docs/ARCHITECTURE.md (200ms cached, 1s DB)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.35, 0.5, 1.0, 2.5, 5.0, 10.0)
+PSX_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0)
+
+# Label for requests that matched no route, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUESTS = Counter(
+    "stockgenie_http_requests_total",
+    "HTTP requests by route template, method and status code",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "stockgenie_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "stockgenie_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+
+PSX_FETCH_SECONDS = Histogram(
+    "stockgenie_psx_fetch_duration_seconds",
+    "PSX page fetch time including retries and backoff",
+    ["page"],
+    buckets=PSX_BUCKETS,
+)
+PSX_FETCH_FAILURES = Counter(
+    "stockgenie_psx_fetch_failures_total",
+    "PSX fetches that failed after retries, or whose page could not be parsed",
+    ["page", "reason"],
+)
+PSX_FETCH_RETRIES = Counter(
+    "stockgenie_psx_fetch_retries_total",
+    "PSX requests retried after a transport error, 429 or 5xx",
+    ["page"],
+)
+
+
+class RuntimeCollector(Collector):
+    """
+    Reads service counters at scrape time
+
+    Services are looked up through their module singletons without creating
+    them, so scraping never opens a Redis or database connection.
+    """
+
+    def describe(self) -> list:
+        # Nothing up front; otherwise registering would run collect() mid-import
+        return []
+
+    def collect(self) -> Iterator:
+        yield from self._cache()
+        yield from self._response_cache()
+        yield from self._stream()
+        yield from self._db_pool()
+        yield from self._poller()
+        yield from self._semantic_cache()
+        yield from self._chat()
+
+    def _cache(self) -> Iterator:
+        from app.services import cache_service
+
+        cache = cache_service._cache_instance
+        if cache is None:
+            return
+        available = GaugeMetricFamily("stockgenie_cache_available", "1 if Redis is reachable")
+        available.add_metric([], 1 if cache.available else 0)
+        yield available
+
+        requests = CounterMetricFamily(
+            "stockgenie_cache_requests", "Cache lookups by result (L1 and Redis combined)", labels=["result"]
+        )
+        requests.add_metric(["hit"], cache.hits)
+        requests.add_metric(["miss"], cache.misses)
+        yield requests
+        yield CounterMetricFamily("stockgenie_cache_errors", "Redis/serializer errors", value=cache.errors)
+        yield CounterMetricFamily(
+            "stockgenie_cache_stale_served", "Stale values served while refreshing", value=cache.stale_served
+        )
+
+        local = CounterMetricFamily("stockgenie_cache_l1_requests", "In-process L1 lookups by result", labels=["result"])
+        local.add_metric(["hit"], cache.local.hits)
+        local.add_metric(["miss"], cache.local.misses)
+        yield local
+        yield GaugeMetricFamily("stockgenie_cache_l1_entries", "Entries held in L1", value=len(cache.local))
+
+    def _response_cache(self) -> Iterator:
+        from app.services import response_cache
+
+        responses = response_cache._response_cache
+        if responses is None:
+            return
+        requests = CounterMetricFamily(
+            "stockgenie_response_cache_requests", "Pre-serialized response lookups by result", labels=["result"]
+        )
+        requests.add_metric(["hit"], responses.hits)
+        requests.add_metric(["miss"], responses.misses)
+        yield requests
+        yield GaugeMetricFamily("stockgenie_response_cache_entries", "Cached response bodies", value=len(responses))
+
+    def _stream(self) -> Iterator:
+        from app.services import market_stream
+
+        hub = market_stream._market_stream
+        if hub is None:
+            return
+        yield GaugeMetricFamily("stockgenie_stream_clients", "Connected SSE/WebSocket clients", value=hub.client_count)
+        yield CounterMetricFamily(
+            "stockgenie_stream_resyncs", "Slow clients resynced with a snapshot", value=hub.resyncs
+        )
+        yield GaugeMetricFamily("stockgenie_stream_sequence", "Last stream message sequence number", value=hub.seq)
+
+    def _db_pool(self) -> Iterator:
+        from app.db import get_pool_status
+
+        status = get_pool_status()
+        if not status.get("initialized"):
+            return
+        for field in ("size", "checked_in", "checked_out", "overflow"):
+            yield GaugeMetricFamily(f"stockgenie_db_pool_{field}", f"Connection pool {field.replace('_', ' ')}",
+                                    value=status[field])
+        for field in ("connects", "checkouts", "invalidations"):
+            yield CounterMetricFamily(f"stockgenie_db_pool_{field}", f"Connection pool {field} since start",
+                                      value=status[field])
+
+    def _poller(self) -> Iterator:
+        from app.services import market_poller
+
+        poller = market_poller._poller_instance
+        if poller is None:
+            return
+        yield GaugeMetricFamily("stockgenie_poller_running", "1 if the PSX poller runs in this process",
+                                value=1 if poller.running else 0)
+        yield GaugeMetricFamily("stockgenie_poller_consecutive_failures", "PSX polls failed in a row",
+                                value=poller._failures)
+        if poller.last_success_at is not None:
+            yield GaugeMetricFamily("stockgenie_poller_last_success_age_seconds", "Seconds since the last good poll",
+                                    value=time.time() - poller.last_success_at)
+
+    def _semantic_cache(self) -> Iterator:
+        from app.rag import semantic_cache
+
+        answers = semantic_cache._semantic_cache
+        if answers is None:
+            return
+        requests = CounterMetricFamily(
+            "stockgenie_semantic_cache_requests", "Chat semantic cache lookups by result", labels=["result"]
+        )
+        requests.add_metric(["hit"], answers.hits)
+        requests.add_metric(["miss"], answers.misses)
+        yield requests
+        yield CounterMetricFamily("stockgenie_semantic_cache_stores", "Chat answers written to the semantic cache",
+                                  value=answers.stores)
+        yield CounterMetricFamily("stockgenie_semantic_cache_store_conflicts",
+                                  "Semantic cache stores skipped because the scope was locked",
+                                  value=answers.store_conflicts)
+
+    def _chat(self) -> Iterator:
+        from app.rag import chat
+
+        service = chat._chat_service
+        if service is None:
+            return
+        answers = CounterMetricFamily("stockgenie_chat_answers", "Chat answers by path", labels=["path"])
+        answers.add_metric(["statements"], service.structured_answers)
+        answers.add_metric(["cache"], service.cached_answers)
+        answers.add_metric(["retrieval"], service.retrieved_answers)
+        yield answers
+
+
+REGISTRY.register(RuntimeCollector())
@@ -0,0 +1,153 @@
+"""
+Price Ingestion Service
+Bulk-loads OHLCV bars into stock_prices with COPY
+
+Each batch is COPY'd (asyncpg copy_records_to_table) into an index-free
+temporary staging table and merged with a single
+INSERT ... SELECT ... ON CONFLICT DO NOTHING, so re-running a backfill is
+idempotent and no per-row round trips or existence checks are made.
+"""
+from datetime import datetime
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import time
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db import get_engine, get_sessionmaker
+from app.models import Stock
+from app.models.types import ScaledPrice
+
+logger = logging.getLogger(__name__)
+
+# (stock_id, timestamp, open, high, low, close, volume) with prices in rupees
+Bar = Tuple[int, datetime, float, float, float, float, Optional[int]]
+
+BAR_COLUMNS = ("stock_id", "timestamp", "open", "high", "low", "close", "volume")
+STAGING_TABLE = "stock_prices_staging"
+DEFAULT_BATCH_SIZE = 50_000
+
+# Bars are scaled exactly as the ORM column would bind them
+PRICE_TYPE = ScaledPrice()
+
+# Lives for the pooled connection's lifetime; rows vanish at every commit
+CREATE_STAGING_SQL = (
+    f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+    "(LIKE stock_prices INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+)
+
+_COLUMN_LIST = ", ".join(f'"{c}"' for c in BAR_COLUMNS)
+MERGE_SQL = (
+    f"INSERT INTO stock_prices ({_COLUMN_LIST}) "
+    f"SELECT {_COLUMN_LIST} FROM {STAGING_TABLE} "
+    'ON CONFLICT (stock_id, "timestamp") DO NOTHING'
+)
+
+
+def _to_paisa(value) -> Optional[int]:
+    """Rupee price to the integer paisa stored by ScaledPrice (same rounding, None stays None)"""
+    return PRICE_TYPE.process_bind_param(value, None)
+
+
+def _to_record(bar: Sequence) -> Tuple:
+    stock_id, timestamp, open_, high, low, close, volume = bar
+    return (
+        stock_id,
+        timestamp,
+        _to_paisa(open_),
+        _to_paisa(high),
+        _to_paisa(low),
+        _to_paisa(close),
+        None if volume is None else int(volume),
+    )
+
+
+async def _batches(bars: Union[Iterable[Bar], AsyncIterable[Bar]], batch_size: int):
+    """Group a sync or async stream of bars into COPY-ready record lists"""
+    batch: List[Tuple] = []
+    if hasattr(bars, "__aiter__"):
+        async for bar in bars:
+            batch.append(_to_record(bar))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    else:
+        for bar in bars:
+            batch.append(_to_record(bar))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def ingest_bars(
+    bars: Union[Iterable[Bar], AsyncIterable[Bar]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict:
+    """
+    Stream OHLCV bars into stock_prices
+
+    Args:
+        bars: (stock_id, timestamp, open, high, low, close, volume) tuples,
+            prices in rupees, timestamps naive UTC
+        batch_size: Rows per COPY + merge transaction
+
+    Returns:
+        Dict with rows_received, rows_inserted, batches, seconds, rows_per_sec
+    """
+    received = inserted = batches = 0
+    started = time.perf_counter()
+
+    async with get_engine().connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection  # asyncpg.Connection
+        await pg.execute(CREATE_STAGING_SQL)
+
+        async for batch in _batches(bars, batch_size):
+            async with pg.transaction():
+                await pg.copy_records_to_table(STAGING_TABLE, records=batch, columns=BAR_COLUMNS)
+                status = await pg.execute(MERGE_SQL)
+            received += len(batch)
+            inserted += int(status.split()[-1])  # "INSERT 0 <n>"
+            batches += 1
+            logger.debug(f"Batch {batches}: {len(batch)} rows staged")
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "rows_received": received,
+        "rows_inserted": inserted,
+        "batches": batches,
+        "seconds": seconds,
+        "rows_per_sec": received / seconds if seconds > 0 else 0.0,
+    }
+    logger.info(
+        f"Ingested {inserted}/{received} bars in {seconds:.2f}s "
+        f"({stats['rows_per_sec']:,.0f} rows/sec)"
+    )
+    return stats
+
+
+async def resolve_stock_ids(symbols: Iterable[str], create_missing: bool = False) -> Dict[str, int]:
+    """
+    Map symbols to stocks.id
+
+    Args:
+        symbols: Ticker symbols
+        create_missing: Insert a bare stocks row (name = symbol) for unknown symbols
+
+    Returns:
+        {symbol: stock_id} for every symbol that exists (or was created)
+    """
+    symbols = sorted({s.upper() for s in symbols})
+    async with get_sessionmaker()() as session:
+        if create_missing and symbols:
+            await session.execute(
+                insert(Stock)
+                .values([{"symbol": s, "name": s} for s in symbols])
+                .on_conflict_do_nothing(index_elements=["symbol"])
+            )
+            await session.commit()
+        result = await session.execute(select(Stock.symbol, Stock.id).where(Stock.symbol.in_(symbols)))
+        return {row.symbol: row.id for row in result}
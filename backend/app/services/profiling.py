@@ -0,0 +1,91 @@
+"""
+Request Profiling
+Per-request span timings for hot-path stages, reported as Server-Timing
+
+A RequestProfile is attached to the current context by the profiling
+middleware (app.api.profiling) only for requests that opted in or were
+sampled; span() is a no-op costing one ContextVar lookup otherwise.
+
+Spans with the same name add up (e.g. several Redis round trips become one
+"redis" entry with a count). Tasks spawned from a profiled request inherit
+its profile, so spans of concurrent work can sum to more than wall time.
+"""
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Tuple
+import time
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Accumulated span durations for one request"""
+
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # name -> [seconds, count], in first-seen order
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        """Seconds since the profile was attached"""
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in ms, counts in desc)"""
+        parts = []
+        for name, (seconds, count) in self.spans.items():
+            part = f"{name};dur={seconds * 1000:.2f}"
+            if count > 1:
+                part += f';desc="x{int(count)}"'
+            parts.append(part)
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Profile of the request being handled, if it is profiled"""
+    return _current_profile.get()
+
+
+def start_profile() -> Tuple[RequestProfile, Token]:
+    """Attach a new profile to the current context; pass the token to end_profile"""
+    profile = RequestProfile()
+    return profile, _current_profile.set(profile)
+
+
+def end_profile(token: Token) -> None:
+    """Detach the profile attached by start_profile"""
+    _current_profile.reset(token)
+
+
+class span:
+    """
+    Time a block into the current request profile
+
+        with span("redis"):
+            value = await redis.get(key)
+    """
+
+    __slots__ = ("name", "profile", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile = _current_profile.get()
+
+    def __enter__(self) -> "span":
+        if self.profile is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.profile is not None:
+            self.profile.add(self.name, time.perf_counter() - self.started)
@@ -0,0 +1,213 @@
+"""
+Fast PSX HTML Parser
+Extracts every index from the Market Watch page, and quotes from company
+pages, with lxml and precompiled XPath
+
+BeautifulSoup builds a Python object per node and walks them with find_all;
+here libxml2 builds the tree in C and a handful of compiled XPath queries
+pull only the topIndices__item tiles and tabs__panel[data-name] stats,
+so all indices come out of a single parse. Company pages are read the same
+way (quote__close, change__value/percent and the stats_item pairs).
+
+The functions are blocking; async callers run them in a worker thread
+(lxml releases the GIL while parsing).
+"""
+from lxml import etree, html as lxml_html
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Full names for the indices shown on dps.psx.com.pk
+INDEX_NAMES = {
+    "KSE100": "Karachi Stock Exchange 100 Index",
+    "KSE30": "KSE-30 Index",
+    "KMI30": "KMI-30 Index",
+    "ALLSHR": "All Share Index",
+    "KMIALLSHR": "KMI All Share Index",
+    "BKTI": "Banks Tradable Index",
+    "OGTI": "Oil & Gas Tradable Index",
+    "PSXDIV20": "PSX Dividend 20 Index",
+    "UPP9": "UBL Pakistan Enterprise Index",
+    "NITPGI": "NIT Pakistan Gateway Index",
+    "NBPPGI": "NBP Pakistan Growth Index",
+    "MZNPI": "Meezan Pakistan Index",
+    "JSMFI": "JS Momentum Factor Index",
+    "ACI": "Alfalah Consumer Index",
+    "JSGBKTI": "JS Global Banking Sector Tradable Index",
+    "HBLTTI": "HBL Total Treasury Index",
+    "MII30": "Mahaana Islamic Index 30",
+}
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching a whole class token"""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+_TOP_INDEX_ITEMS = etree.XPath(f'//div[{_has_class("topIndices__item")}]')
+_ITEM_NAME = etree.XPath(f'string(.//div[{_has_class("topIndices__item__name")}])')
+_ITEM_VALUE = etree.XPath(f'string(.//div[{_has_class("topIndices__item__val")}])')
+_ITEM_CHANGE = etree.XPath(f'string(.//div[{_has_class("topIndices__item__change")}])')
+_ITEM_CHANGE_PCT = etree.XPath(f'string(.//div[{_has_class("topIndices__item__changep")}])')
+
+_INDEX_PANELS = etree.XPath(f'//div[{_has_class("tabs__panel")} and @data-name]')
+_STATS_ITEMS = etree.XPath(f'.//div[{_has_class("stats_item")}]')
+_STATS_LABEL = etree.XPath(f'string(.//div[{_has_class("stats_label")}])')
+_STATS_VALUE = etree.XPath(f'string(.//div[{_has_class("stats_value")}])')
+
+_QUOTE_CLOSE = etree.XPath(f'string((//div[{_has_class("quote__close")}])[1])')
+_QUOTE_CHANGE = etree.XPath(f'string((//div[{_has_class("change__value")}])[1])')
+_QUOTE_CHANGE_PCT = etree.XPath(f'string((//div[{_has_class("change__percent")}])[1])')
+_ALL_STATS_ITEMS = etree.XPath(f'//div[{_has_class("stats_item")}]')
+
+
+def parse_number(text: str) -> float:
+    """Parse number from text, removing commas and other characters"""
+    try:
+        # Remove commas, spaces, and other non-numeric characters
+        clean_text = text.replace(',', '').replace(' ', '').strip()
+        # Handle negative numbers
+        clean_text = clean_text.replace('−', '-')  # Replace minus sign
+        return float(clean_text)
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Error parsing number from '{text}': {e}")
+        return 0.0
+
+
+def parse_percent(text: str) -> float:
+    """Parse "(1.23%)" / "1.23%" style percentages"""
+    return parse_number(text.replace('(', '').replace(')', '').replace('%', '').strip())
+
+
+def apply_stat(detailed: Dict, label: str, value_text: str) -> None:
+    """Map one stats_label/stats_value pair from an index panel onto detailed"""
+    if label == 'high':
+        detailed['high'] = parse_number(value_text)
+    elif label == 'low':
+        detailed['low'] = parse_number(value_text)
+    elif label == 'volume':
+        detailed['volume'] = int(parse_number(value_text))
+    elif label == 'previous close':
+        detailed['previous_close'] = parse_number(value_text)
+    elif label == '1-year change':
+        detailed['year_change_percent'] = parse_percent(value_text)
+    elif label == 'ytd change':
+        detailed['ytd_change_percent'] = parse_percent(value_text)
+    elif label == '52-week range':
+        # Parse range like "85,120.90 — 169,988.62"
+        parts = value_text.split('—')
+        if len(parts) == 2:
+            detailed['year_low'] = parse_number(parts[0])
+            detailed['year_high'] = parse_number(parts[1])
+
+
+def parse_document(content: bytes) -> etree._Element:
+    """Build the lxml tree for a page"""
+    return lxml_html.fromstring(content)
+
+
+def parse_top_indices(doc: etree._Element) -> Dict[str, Dict]:
+    """Value/change for every tile in the top indices slider, keyed by index symbol"""
+    indices = {}
+    for item in _TOP_INDEX_ITEMS(doc):
+        symbol = _ITEM_NAME(item).strip()
+        value_text = _ITEM_VALUE(item)
+        if not symbol or not value_text.strip() or symbol in indices:
+            continue
+        change_text = _ITEM_CHANGE(item)
+        change_pct_text = _ITEM_CHANGE_PCT(item)
+        indices[symbol] = {
+            "value": parse_number(value_text),
+            "change": parse_number(change_text) if change_text.strip() else 0,
+            "change_percent": parse_percent(change_pct_text) if change_pct_text.strip() else 0,
+        }
+    return indices
+
+
+def parse_index_panels(doc: etree._Element) -> Dict[str, Dict]:
+    """Detailed stats (high/low/volume/ranges) for every tabs__panel[data-name]"""
+    panels = {}
+    for panel in _INDEX_PANELS(doc):
+        symbol = panel.get('data-name', '').strip()
+        detailed: Dict = {}
+        for item in _STATS_ITEMS(panel):
+            label = _STATS_LABEL(item).strip().lower()
+            value_text = _STATS_VALUE(item).strip()
+            if label and value_text:
+                apply_stat(detailed, label, value_text)
+        if symbol and detailed:
+            panels[symbol] = detailed
+    return panels
+
+
+def parse_all_indices(content: bytes, only: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Parse every index on the Market Watch page in one pass
+
+    Args:
+        content: Raw page bytes
+        only: Restrict the result to one index symbol (e.g. "KSE100")
+
+    Returns:
+        Mapping of index symbol to data in the scraper's index format
+        (without timestamp/trading_status, which the caller adds)
+    """
+    doc = parse_document(content)
+    tiles = parse_top_indices(doc)
+    panels = parse_index_panels(doc)
+
+    result = {}
+    for symbol, tile in tiles.items():
+        if only and symbol != only:
+            continue
+        data = {
+            "symbol": symbol,
+            "name": INDEX_NAMES.get(symbol, f"{symbol} Index"),
+            "value": tile["value"],
+            "change": tile["change"],
+            "change_percent": tile["change_percent"],
+            "previous_close": round(tile["value"] - tile["change"], 2),
+        }
+        if symbol in panels:
+            data.update(panels[symbol])
+        result[symbol] = data
+    return result
+
+
+def parse_symbol_quote(content: bytes, symbol: str) -> Optional[Dict]:
+    """
+    Parse a quote from a company page (dps.psx.com.pk/company/{symbol})
+
+    Returns:
+        {"symbol", "price", "change", "change_percent"} plus open/high/low,
+        volume and previous_close when shown (without timestamp, which the
+        caller adds), or None if the page has no price
+    """
+    doc = parse_document(content)
+    close_text = _QUOTE_CLOSE(doc).strip()
+    if not close_text:
+        return None
+
+    change_text = _QUOTE_CHANGE(doc)
+    change_pct_text = _QUOTE_CHANGE_PCT(doc)
+    quote = {
+        "symbol": symbol,
+        "price": parse_number(close_text.replace('Rs.', '')),
+        "change": parse_number(change_text) if change_text.strip() else 0.0,
+        "change_percent": parse_percent(change_pct_text) if change_pct_text.strip() else 0.0,
+    }
+
+    # The first stats panel holds the regular-market figures
+    for item in _ALL_STATS_ITEMS(doc):
+        label = _STATS_LABEL(item).strip().lower()
+        value_text = _STATS_VALUE(item).strip()
+        if not (label and value_text):
+            continue
+        if label in ('open', 'high', 'low') and label not in quote:
+            quote[label] = parse_number(value_text)
+        elif label == 'volume' and 'volume' not in quote:
+            quote['volume'] = int(parse_number(value_text))
+        elif label == 'ldcp' and 'previous_close' not in quote:
+            quote['previous_close'] = parse_number(value_text)
+    return quote
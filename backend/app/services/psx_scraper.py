@@ -1,66 +1,310 @@
 """
 PSX (Pakistan Stock Exchange) Data Scraper
 Fetches real-time KSE100 index data from dps.psx.com.pk
+
+Async scraper on a pooled httpx.AsyncClient (keep-alive, HTTP/2 when the
+h2 package is installed) with bounded concurrency, per-host rate limiting
+and retries with jittered exponential backoff, so the index page and all
+constituent pages can be fetched in parallel in one polling cycle.
+
+Index pages are parsed with the lxml/XPath parser in psx_parser by default,
+returning every index from one download; parser="bs4" (PSX_PARSER=bs4)
+keeps the original KSE100-only BeautifulSoup walk for fetch_kse100_data.
+Company pages are parsed with psx_parser too. Every parse runs in a worker
+thread, so a cycle's ~100 pages never block the event loop (and the API
+requests sharing it).
 """
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Iterable
 from datetime import datetime
+from urllib.parse import urlsplit
+
+from app.services.psx_parser import parse_all_indices, parse_number, parse_symbol_quote, apply_stat
+from app.services.metrics import PSX_FETCH_FAILURES, PSX_FETCH_RETRIES, PSX_FETCH_SECONDS
+from app.services.profiling import span
+import asyncio
 import logging
+import os
+import random
+import time
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+class HostRateLimiter:
+    """Spaces requests to each host at least 1/requests_per_second apart"""
+
+    def __init__(self, requests_per_second: float):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        """Sleep until host may be requested again, reserving the slot"""
+        if not self.min_interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        # Reserve synchronously (no await in between) so concurrent callers queue up
+        self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
 class PSXScraper:
     """Scraper for Pakistan Stock Exchange data portal"""
     
     BASE_URL = "https://dps.psx.com.pk"
     MARKET_WATCH_URL = f"{BASE_URL}/?page_id=30"  # Market Watch page
+    COMPANY_URL = f"{BASE_URL}/company/{{symbol}}"  # Per-symbol quote page
+    
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+    
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        requests_per_second: float = 5.0,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 0.5,
+        timeout_seconds: float = 10.0,
+        parser: str = "lxml",
+    ):
+        self.parser = parser
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.timeout_seconds = timeout_seconds
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.HEADERS,
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(self.timeout_seconds, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=30,
+                ),
+                follow_redirects=True,
+            )
+        return self._client
+    
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _get(self, url: str, page: str = "market_watch") -> httpx.Response:
+        """
+        GET with concurrency cap, per-host rate limit and retries
+        
+        Retries transport errors, timeouts and 429/5xx responses with full-jitter
+        exponential backoff (honouring Retry-After when present). Duration and
+        failures are recorded per page kind ("market_watch", "company").
+        
+        Raises:
+            httpx.HTTPError: If the request still fails after all retries
+        """
+        started = time.perf_counter()
+        try:
+            with span("psx_fetch"):
+                return await self._get_with_retries(url, page)
+        except httpx.HTTPStatusError:
+            PSX_FETCH_FAILURES.labels(page, "status").inc()
+            raise
+        except httpx.HTTPError:
+            PSX_FETCH_FAILURES.labels(page, "transport").inc()
+            raise
+        finally:
+            PSX_FETCH_SECONDS.labels(page).observe(time.perf_counter() - started)
+    
+    async def _get_with_retries(self, url: str, page: str) -> httpx.Response:
+        """Retry loop behind _get"""
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            retry_after: Optional[float] = None
+            async with self._semaphore:
+                await self.rate_limiter.wait(host)
+                try:
+                    response = await self.client.get(url)
+                    if response.status_code not in self.RETRY_STATUS_CODES:
+                        response.raise_for_status()
+                        return response
+                    if attempt >= self.max_retries:
+                        response.raise_for_status()
+                    retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                    logger.debug(f"PSX returned {response.status_code} for {url}, retrying")
+                except (httpx.TransportError, httpx.TimeoutException) as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    logger.debug(f"Transport error for {url}: {e}, retrying")
+            
+            # Back off outside the semaphore so other requests can proceed
+            delay = random.uniform(0, self.backoff_base_seconds * (2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            attempt += 1
+            PSX_FETCH_RETRIES.labels(page).inc()
+            await asyncio.sleep(delay)
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-        })
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given in seconds"""
+        try:
+            return min(float(value), 30.0) if value else None
+        except ValueError:
+            return None
     
-    def fetch_kse100_data(self) -> Optional[Dict]:
+    async def fetch_kse100_data(self) -> Optional[Dict]:
         """
         Fetch current KSE100 index data from PSX portal
         
         Returns:
             Dict with index data or None if fetch fails
         """
+        if self.parser != "bs4":
+            indices = await self.fetch_all_indices()
+            index_data = indices.get("KSE100") if indices else None
+            if indices and not index_data:
+                logger.warning("Could not parse KSE100 data from page")
+            return index_data
+        
         try:
             logger.info("Fetching KSE100 data from PSX portal...")
             
             # Try to fetch the page
-            response = self.session.get(self.MARKET_WATCH_URL, timeout=10)
-            response.raise_for_status()
+            response = await self._get(self.MARKET_WATCH_URL)
             
             # Parse HTML
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # Try to find KSE100 data
-            # Note: This is a template - actual selectors need to be determined
-            # by inspecting the actual page structure
-            index_data = self._parse_kse100_from_html(soup)
+            with span("bs4"):
+                soup = await asyncio.to_thread(BeautifulSoup, response.content, 'lxml')
+            with span("parse"):
+                index_data = self._parse_kse100_from_html(soup)
             
             if index_data:
                 logger.info(f"Successfully fetched KSE100: {index_data.get('value')}")
                 return index_data
             else:
                 logger.warning("Could not parse KSE100 data from page")
+                PSX_FETCH_FAILURES.labels("market_watch", "parse").inc()
                 return None
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Network error fetching PSX data: {e}")
             return None
         except Exception as e:
             logger.error(f"Unexpected error fetching PSX data: {e}")
             return None
     
+    async def fetch_all_indices(self) -> Optional[Dict[str, Dict]]:
+        """
+        Fetch every index shown on the Market Watch page (KSE100, KSE30, KMI30, ALLSHR, ...)
+        from a single page download and parse
+        
+        Returns:
+            Mapping of index symbol to index data, or None if fetch/parse fails
+        """
+        try:
+            logger.info("Fetching index data from PSX portal...")
+            response = await self._get(self.MARKET_WATCH_URL)
+            with span("parse"):
+                indices = await asyncio.to_thread(parse_all_indices, response.content)
+            if not indices:
+                logger.warning("Could not parse any index data from page")
+                PSX_FETCH_FAILURES.labels("market_watch", "parse").inc()
+                return None
+            
+            timestamp = datetime.utcnow().isoformat() + "Z"
+            trading_status = self._determine_trading_status()
+            for index_data in indices.values():
+                index_data.update({
+                    "timestamp": timestamp,
+                    "source": "PSX Data Portal",
+                    "trading_status": trading_status,
+                })
+            logger.info(f"Successfully fetched {len(indices)} indices")
+            return indices
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Network error fetching PSX data: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error fetching PSX data: {e}")
+            return None
+    
+    async def fetch_symbol_quote(self, symbol: str) -> Optional[Dict]:
+        """
+        Fetch the latest quote for one listed symbol from its company page
+        
+        Returns:
+            Dict with quote data or None if fetch/parse fails
+        """
+        try:
+            response = await self._get(self.COMPANY_URL.format(symbol=symbol), page="company")
+            with span("parse"):
+                quote = await asyncio.to_thread(parse_symbol_quote, response.content, symbol)
+            if quote is None:
+                logger.warning(f"Could not find price for {symbol}")
+                PSX_FETCH_FAILURES.labels("company", "parse").inc()
+                return None
+            quote["timestamp"] = datetime.utcnow().isoformat() + "Z"
+            return quote
+        except httpx.HTTPError as e:
+            logger.warning(f"Network error fetching quote for {symbol}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error fetching quote for {symbol}: {e}")
+            return None
+    
+    async def fetch_symbol_quotes(self, symbols: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Fetch quotes for many symbols concurrently
+        
+        Returns:
+            Mapping of symbol to quote for the symbols that succeeded
+        """
+        symbols = list(symbols)
+        quotes = await asyncio.gather(*(self.fetch_symbol_quote(s) for s in symbols))
+        return {s: q for s, q in zip(symbols, quotes) if q}
+    
+    async def fetch_market_snapshot(self, symbols: Iterable[str] = ()) -> Dict:
+        """
+        Fetch all indices and constituent quotes in one parallel cycle
+        
+        Returns:
+            {"indices": {symbol: Dict}, "quotes": {symbol: Dict}}
+        """
+        started = time.perf_counter()
+        indices, quotes = await asyncio.gather(
+            self.fetch_all_indices(),
+            self.fetch_symbol_quotes(symbols),
+        )
+        indices = indices or {}
+        logger.info(
+            f"Fetched PSX snapshot: {len(indices)} indices, "
+            f"{len(quotes)} quotes in {time.perf_counter() - started:.2f}s"
+        )
+        return {"indices": indices, "quotes": quotes}
+    
     def _parse_kse100_from_html(self, soup: BeautifulSoup) -> Optional[Dict]:
         """
         Parse KSE100 data from HTML soup
@@ -155,28 +399,7 @@ class PSXScraper:
                     label = label_elem.text.strip().lower()
                     value_text = value_elem.text.strip()
                     
-                    # Parse specific fields
-                    if label == 'high':
-                        detailed['high'] = self._parse_number(value_text)
-                    elif label == 'low':
-                        detailed['low'] = self._parse_number(value_text)
-                    elif label == 'volume':
-                        detailed['volume'] = int(self._parse_number(value_text))
-                    elif label == 'previous close':
-                        detailed['previous_close'] = self._parse_number(value_text)
-                    elif label == '1-year change':
-                        # Extract percentage
-                        pct_text = value_text.replace('%', '').strip()
-                        detailed['year_change_percent'] = self._parse_number(pct_text)
-                    elif label == 'ytd change':
-                        pct_text = value_text.replace('%', '').strip()
-                        detailed['ytd_change_percent'] = self._parse_number(pct_text)
-                    elif label == '52-week range':
-                        # Parse range like "85,120.90 — 169,988.62"
-                        parts = value_text.split('—')
-                        if len(parts) == 2:
-                            detailed['year_low'] = self._parse_number(parts[0])
-                            detailed['year_high'] = self._parse_number(parts[1])
+                    apply_stat(detailed, label, value_text)
             
             return detailed if detailed else None
             
@@ -186,15 +409,7 @@ class PSXScraper:
     
     def _parse_number(self, text: str) -> float:
         """Parse number from text, removing commas and other characters"""
-        try:
-            # Remove commas, spaces, and other non-numeric characters
-            clean_text = text.replace(',', '').replace(' ', '').strip()
-            # Handle negative numbers
-            clean_text = clean_text.replace('−', '-')  # Replace minus sign
-            return float(clean_text)
-        except (ValueError, AttributeError) as e:
-            logger.error(f"Error parsing number from '{text}': {e}")
-            return 0.0
+        return parse_number(text)
     
     def _determine_trading_status(self) -> str:
         """Determine if market is open or closed based on current time"""
@@ -212,12 +427,12 @@ class PSXScraper:
         else:
             return "closed"
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         """Test if PSX portal is accessible"""
         try:
-            response = self.session.get(self.BASE_URL, timeout=5)
+            response = await self.client.get(self.BASE_URL, timeout=5)
             return response.status_code == 200
-        except:
+        except httpx.HTTPError:
             return False
 
 
@@ -228,6 +443,18 @@ def get_psx_scraper() -> PSXScraper:
     """Get singleton PSX scraper instance"""
     global _scraper_instance
     if _scraper_instance is None:
-        _scraper_instance = PSXScraper()
+        _scraper_instance = PSXScraper(
+            max_concurrency=int(os.getenv("PSX_MAX_CONCURRENCY", "10")),
+            requests_per_second=float(os.getenv("PSX_REQUESTS_PER_SECOND", "5")),
+            parser=os.getenv("PSX_PARSER", "lxml"),
+        )
     return _scraper_instance
 
+
+async def close_psx_scraper() -> None:
+    """Close the singleton scraper's connection pool (called on shutdown)"""
+    global _scraper_instance
+    if _scraper_instance is not None:
+        await _scraper_instance.close()
+        _scraper_instance = None
+
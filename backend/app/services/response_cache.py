@@ -0,0 +1,126 @@
+"""
+Response Cache
+Pre-serialized JSON bodies for list endpoints
+
+Payloads are validated and encoded once per data version (orjson bytes)
+and served as raw Responses, skipping per-request model construction,
+response_model validation and JSON encoding. Entries record the version
+they were built from and are rebuilt as soon as the source moves on.
+
+Versions must identify the data itself (e.g. a content digest such as
+CompanyUniverse.version), never a per-process counter: behind a load
+balancer every replica has to map the same data to the same version and
+different data to different versions.
+
+ETags derive from route + params + version, so a matching If-None-Match
+is answered with 304 before any body is looked up or built.
+"""
+from fastapi import Request, Response
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+import logging
+import os
+
+import orjson
+
+from app.api.http_cache import caching_headers, etag_matches, make_etag, not_modified
+from app.services.local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+# (version, body, etag)
+CachedBody = Tuple[Any, bytes, str]
+
+
+class ResponseCache:
+    """Bounded LRU of serialized bodies keyed by route + normalized params"""
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 3600):
+        self._entries = LocalCache(max_size=max_size, max_ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def make_key(route: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Route plus query params in a canonical order (None values dropped)"""
+        if not params:
+            return route
+        items = sorted((k, v) for k, v in params.items() if v is not None)
+        return f"{route}?{urlencode(items)}"
+
+    def get_or_build(
+        self,
+        route: str,
+        params: Optional[Dict[str, Any]],
+        version: Any,
+        build: Callable[[], Any],
+    ) -> Tuple[bytes, str]:
+        """
+        Serialized body and ETag for a route at a data version
+
+        Args:
+            route: Logical route name
+            params: Parsed query/path params
+            version: Content-derived version of the data the payload derives from
+            build: Returns the JSON-ready payload (called on miss only)
+
+        Returns:
+            (body, etag)
+        """
+        key = self.make_key(route, params)
+        entry: Optional[CachedBody] = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+
+        body = orjson.dumps(build())
+        etag = make_etag(key, version)
+        self._entries.set(key, (version, body, etag), self.ttl_seconds)
+        return body, etag
+
+    def respond(
+        self,
+        route: str,
+        params: Optional[Dict[str, Any]],
+        version: Any,
+        build: Callable[[], Any],
+        request: Optional[Request] = None,
+        policy: Optional[str] = None,
+    ) -> Response:
+        """
+        Raw JSON Response for a route, from cache when the version matches
+
+        Args:
+            request: Incoming request, for If-None-Match
+            policy: CACHE_POLICIES entry for the Cache-Control header
+        """
+        etag = make_etag(self.make_key(route, params), version)
+        if etag_matches(request, etag):
+            return not_modified(etag, policy)
+
+        body, etag = self.get_or_build(route, params, version, build)
+        return Response(content=body, media_type="application/json", headers=caching_headers(etag, policy))
+
+    def clear(self) -> None:
+        """Drop every cached body"""
+        self._entries.clear()
+
+    @property
+    def hits(self) -> int:
+        return self._entries.hits
+
+    @property
+    def misses(self) -> int:
+        return self._entries.misses
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Singleton instance
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the process-wide response cache"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(max_size=int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "2048")))
+    return _response_cache
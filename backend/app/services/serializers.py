@@ -0,0 +1,92 @@
+"""
+Cache Serializers
+Pluggable value encodings for CacheService (raw bytes in Redis)
+
+    orjson   default; JSON-compatible with values written by the stdlib encoder
+    json     stdlib, kept as a fallback
+    msgpack  compact binary, if the msgpack package is installed
+"""
+from decimal import Decimal
+from typing import Any, Dict, Type
+import json
+
+import orjson
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    """Types orjson/msgpack do not encode natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+class Serializer:
+    """Encodes cache values to bytes and back"""
+
+    name = "base"
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class ORJSONSerializer(Serializer):
+    name = "orjson"
+
+    # Non-str dict keys become strings, as with json.dumps
+    OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_default, option=self.OPTIONS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class JSONSerializer(Serializer):
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackSerializer(Serializer):
+    name = "msgpack"
+
+    def __init__(self):
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("msgpack serializer requires the msgpack package")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+SERIALIZERS: Dict[str, Type[Serializer]] = {
+    "orjson": ORJSONSerializer,
+    "json": JSONSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+def get_serializer(name: str = "orjson") -> Serializer:
+    """Serializer by name (see SERIALIZERS)"""
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown cache serializer: {name} (expected one of {', '.join(SERIALIZERS)})")
@@ -0,0 +1,39 @@
+"""
+Single-Flight Request Coalescing
+Ensures only one load runs per key per process; concurrent callers share its result
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Return the in-flight task for key, starting fn() if none is running
+
+        The task keeps running even if every caller stops waiting for it.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once for all concurrent callers of key and return its result"""
+        # shield: a cancelled waiter must not cancel the shared load
+        return await asyncio.shield(self.start(key, fn))
+
+    def in_flight(self, key: str) -> bool:
+        """Check whether a load for key is currently running"""
+        return key in self._inflight
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test script for price scaling
+Checks that the COPY ingestion path stores the same paisa as the ORM column
+"""
+from decimal import Decimal
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+
+from app.models.types import ScaledPrice
+from app.services.price_ingestion import _to_paisa
+
+# Half-paisa prices that binary floats round the wrong way with round()
+PRICES = [1.005, 0.125, 10.245, 187.505, 2.675, 99.995, 0.0, None]
+EXPECTED = {1.005: 101, 0.125: 13, 10.245: 1025, 187.505: 18751, 2.675: 268, 99.995: 10000, 0.0: 0, None: None}
+
+
+def test_copy_path_matches_orm_path():
+    metadata = MetaData()
+    prices = Table(
+        "prices", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("price", ScaledPrice(), nullable=True),
+        Column("paisa", Integer, nullable=True),
+    )
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(prices), [
+            {"id": i, "price": price, "paisa": _to_paisa(price)} for i, price in enumerate(PRICES)
+        ])
+        rows = conn.execute(select(prices.c.id, prices.c.price, prices.c.paisa).order_by(prices.c.id)).all()
+
+    for (_, stored, paisa), price in zip(rows, PRICES):
+        assert paisa == EXPECTED[price], f"{price}: COPY path gave {paisa}"
+        expected = None if paisa is None else Decimal(paisa).scaleb(-2)
+        assert stored == expected, f"{price}: ORM path gave {stored}, COPY path {expected}"
+
+
+if __name__ == "__main__":
+    test_copy_path_matches_orm_path()
+    print("✅ COPY and ORM price scaling agree")
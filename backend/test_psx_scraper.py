@@ -4,6 +4,7 @@ Test script for PSX scraper
 Run this to test fetching real data from dps.psx.com.pk
 """
 import sys
+import asyncio
 import logging
 from app.services.psx_scraper import get_psx_scraper
 
@@ -13,7 +14,7 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-def main():
+async def main():
     print("=" * 60)
     print("PSX Scraper Test")
     print("=" * 60)
@@ -22,16 +23,17 @@ def main():
     
     # Test connection
     print("\n1. Testing connection to PSX portal...")
-    if scraper.test_connection():
+    if await scraper.test_connection():
         print("✅ Connection successful!")
     else:
         print("❌ Connection failed!")
         print("   The PSX portal might be down or blocking requests")
+        await scraper.close()
         return
     
     # Test fetching data
     print("\n2. Fetching KSE100 index data...")
-    data = scraper.fetch_kse100_data()
+    data = await scraper.fetch_kse100_data()
     
     if data:
         print("✅ Data fetched successfully!")
@@ -54,7 +56,9 @@ def main():
         print("- Manually visit: https://dps.psx.com.pk/?page_id=30")
         print("- Inspect the page to find correct CSS selectors")
         print("- Update psx_scraper.py with correct selectors")
+    
+    await scraper.close()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
 
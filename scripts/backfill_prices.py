@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Backfill daily OHLCV bars into stock_prices via COPY
+
+Sources:
+  --csv FILE     rows of symbol,date,open,high,low,close,volume (header required)
+  (default)      synthetic random-walk bars for --years of trading days,
+                 useful for load testing and local development
+
+Usage:
+    python scripts/backfill_prices.py [--csv bars.csv] [--symbols FCCL,HBL]
+        [--years 10] [--batch-size 50000] [--create-missing]
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.db import close_engine
+from app.services.cache_service import close_cache_service, get_cache_service, symbol_tag
+from app.services.price_ingestion import DEFAULT_BATCH_SIZE, ingest_bars, resolve_stock_ids
+
+
+def csv_bars(path, stock_ids, skipped):
+    """Bars from a CSV file; rows for unknown symbols are counted in skipped"""
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            stock_id = stock_ids.get(row["symbol"].upper())
+            if stock_id is None:
+                skipped[row["symbol"]] = skipped.get(row["symbol"], 0) + 1
+                continue
+            volume = row.get("volume")
+            yield (
+                stock_id,
+                datetime.fromisoformat(row["date"]),
+                float(row["open"]),
+                float(row["high"]),
+                float(row["low"]),
+                float(row["close"]),
+                int(float(volume)) if volume else None,
+            )
+
+
+def synthetic_bars(stock_ids, years):
+    """Random-walk daily bars (Mon-Fri) for every symbol"""
+    end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=365 * years)
+    for stock_id in stock_ids.values():
+        rng = random.Random(stock_id)
+        price = rng.uniform(20, 500)
+        day = start
+        while day < end:
+            if day.weekday() < 5:
+                open_ = price
+                price = max(1.0, price * (1 + rng.gauss(0, 0.02)))
+                high = max(open_, price) * (1 + rng.uniform(0, 0.01))
+                low = min(open_, price) * (1 - rng.uniform(0, 0.01))
+                yield (stock_id, day, open_, high, low, price, rng.randint(10_000, 5_000_000))
+            day += timedelta(days=1)
+
+
+def csv_symbols(path):
+    with open(path, newline="") as f:
+        return {row["symbol"].upper() for row in csv.DictReader(f)}
+
+
+async def main(args):
+    if args.symbols:
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    elif args.csv:
+        symbols = sorted(csv_symbols(args.csv))
+    else:
+        from app.mocks.sectors import get_mock_top_companies
+        symbols = [c["symbol"] for c in get_mock_top_companies(limit=100)]
+
+    try:
+        stock_ids = await resolve_stock_ids(symbols, create_missing=args.create_missing)
+        missing = sorted(set(symbols) - set(stock_ids))
+        if missing:
+            print(f"⚠️  {len(missing)} symbols not in stocks table (use --create-missing): {', '.join(missing)}")
+        if not stock_ids:
+            print("❌ Nothing to ingest")
+            return 1
+
+        skipped = {}
+        if args.csv:
+            print(f"📥 Loading {args.csv} for {len(stock_ids)} symbols...")
+            bars = csv_bars(args.csv, stock_ids, skipped)
+        else:
+            print(f"🎲 Generating {args.years}y of daily bars for {len(stock_ids)} symbols...")
+            bars = synthetic_bars(stock_ids, args.years)
+
+        stats = await ingest_bars(bars, batch_size=args.batch_size)
+
+        # Only cached values derived from the backfilled symbols go stale
+        cache = await get_cache_service()
+        invalidated = await cache.invalidate_tags(*(symbol_tag(s) for s in stock_ids))
+    finally:
+        await close_engine()
+        await close_cache_service()
+
+    print()
+    print("=" * 50)
+    print(f"Rows received:   {stats['rows_received']:>14,}")
+    print(f"Rows inserted:   {stats['rows_inserted']:>14,}")
+    print(f"Duplicates:      {stats['rows_received'] - stats['rows_inserted']:>14,}")
+    if skipped:
+        print(f"Unknown symbol:  {sum(skipped.values()):>14,}")
+    print(f"Batches:         {stats['batches']:>14,}")
+    print(f"Elapsed:         {stats['seconds']:>13.2f}s")
+    print(f"Throughput:      {stats['rows_per_sec']:>10,.0f} rows/sec")
+    print(f"Cache keys dropped: {invalidated:>11,}")
+    print("=" * 50)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="CSV file with symbol,date,open,high,low,close,volume")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: CSV symbols or the top-100 universe)")
+    parser.add_argument("--years", type=int, default=10, help="Years of synthetic history")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--create-missing", action="store_true", help="Create stocks rows for unknown symbols")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark the BM25 inverted index: build time and query latency
+
+Synthetic report-like chunks (tickers, fiscal years, line items and a Zipf
+filler vocabulary) with a symbol payload. Reports build/save/load time and
+p50/p95 latency for short ticker+year+line-item queries, unfiltered and
+filtered by symbol, plus the structured statement path for comparison.
+
+Usage:
+    python scripts/benchmarks/bench_lexical_index.py [--count 200000] [--words 150]
+        [--queries 500] [--k 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import numpy as np
+import polars as pl
+
+from app.rag.lexical_index import BM25Index, load_lexical_index
+from app.rag.structured import StructuredAnswerer
+
+SYMBOLS = np.array(["FCCL", "LUCK", "HBL", "MCB", "ENGRO", "OGDC", "PPL", "HUBC", "MARI", "SYS"])
+LINE_ITEMS = ["revenue", "net profit", "gross profit", "earnings per share", "total assets", "finance cost",
+              "dividend", "cash flow", "capital expenditure", "shareholders equity"]
+
+
+def corpus(count, words, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"w{i}" for i in range(20_000)])
+    filler = vocabulary[np.minimum(rng.zipf(1.3, (count, words)) - 1, len(vocabulary) - 1)]
+    symbols = SYMBOLS[rng.integers(0, len(SYMBOLS), count)]
+    years = rng.integers(2014, 2024, count)
+    items = rng.integers(0, len(LINE_ITEMS), count)
+    texts = [
+        f"{symbol} {LINE_ITEMS[item]} for {year} " + " ".join(row)
+        for symbol, year, item, row in zip(symbols, years, items, filler)
+    ]
+    payload = pl.DataFrame({
+        "doc_id": [f"doc{i // 1000}" for i in range(count)],
+        "chunk_index": np.arange(count) % 1000,
+        "symbol": symbols,
+        "document_type": ["annual_report"] * count,
+        "period_end": [date(int(year), 6, 30) for year in years],
+        "page": np.arange(count) % 300 + 1,
+        "page_end": np.arange(count) % 300 + 1,
+    })
+    return texts, payload
+
+
+def timed(fn, inputs):
+    latencies = []
+    for value in inputs:
+        started = time.perf_counter()
+        fn(value)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200_000, help="Chunks in the corpus")
+    parser.add_argument("--words", type=int, default=150, help="Filler words per chunk")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    texts, payload = corpus(args.count, args.words)
+    started = time.perf_counter()
+    index = BM25Index.build(texts, payload)
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        index.save(os.path.join(tmp, "lexical"))
+        save_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        index = load_lexical_index(os.path.join(tmp, "lexical"))
+        load_seconds = time.perf_counter() - started
+
+        rng = np.random.default_rng(1)
+        queries = [
+            f"{SYMBOLS[rng.integers(len(SYMBOLS))]} {LINE_ITEMS[rng.integers(len(LINE_ITEMS))]} {rng.integers(2014, 2024)}"
+            for _ in range(args.queries)
+        ]
+        print(f"{len(index):,} chunks, {len(index.terms):,} terms, {len(index.rows):,} postings")
+        print(f"Build {build_seconds:.2f}s, save {save_seconds:.2f}s, load (mmap) {load_seconds * 1000:.1f}ms")
+        print()
+        print("=" * 50)
+        print(f"{'path':28s} {'p50 ms':>9s} {'p95 ms':>9s}")
+        print("=" * 50)
+        rows = (
+            ("bm25 unfiltered", lambda q: index.search(q, limit=args.k)),
+            ("bm25 symbol=FCCL", lambda q: index.search(q, limit=args.k, symbol="FCCL")),
+            ("structured statements", StructuredAnswerer().answer),
+        )
+        for label, fn in rows:
+            p50, p95 = timed(fn, queries)
+            print(f"{label:28s} {p50:9.3f} {p95:9.3f}")
+        print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
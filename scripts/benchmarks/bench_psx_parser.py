@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark PSX Market Watch parsing: BeautifulSoup vs lxml/XPath
+
+Usage:
+    python scripts/benchmarks/bench_psx_parser.py [saved_page.html ...]
+
+Without arguments a synthetic page mirroring the dps.psx.com.pk structure
+(index slider, per-index stats panels, ~550-row market watch table) is used.
+Peak memory is measured in a child process per parser (ru_maxrss delta),
+since libxml2 allocations are invisible to tracemalloc.
+"""
+import sys
+import os
+import random
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+INDICES = ["KSE100", "KSE30", "KMI30", "ALLSHR", "KMIALLSHR", "BKTI", "OGTI", "PSXDIV20",
+           "UPP9", "NITPGI", "NBPPGI", "MZNPI", "JSMFI", "ACI", "JSGBKTI", "HBLTTI", "MII30"]
+
+
+def generate_fixture(rows: int = 550, seed: int = 42) -> bytes:
+    """Build a synthetic Market Watch page with the PSX class names"""
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>PSX</title></head><body>']
+    parts.append('<div class="topIndices">')
+    for name in INDICES:
+        value = rng.uniform(5_000, 170_000)
+        change = rng.uniform(-2_000, 2_000)
+        parts.append(
+            f'<div class="topIndices__item"><div class="topIndices__item__name">{name}</div>'
+            f'<div class="topIndices__item__val">{value:,.2f}</div>'
+            f'<div class="topIndices__item__change">{change:,.2f}</div>'
+            f'<div class="topIndices__item__changep">({change / value * 100:.2f}%)</div></div>'
+        )
+    parts.append('</div><div class="tabs">')
+    for name in INDICES:
+        low = rng.uniform(5_000, 80_000)
+        stats = [
+            ("High", f"{rng.uniform(5_000, 170_000):,.2f}"),
+            ("Low", f"{rng.uniform(5_000, 170_000):,.2f}"),
+            ("Volume", f"{rng.randint(1_000_000, 900_000_000):,}"),
+            ("Previous Close", f"{rng.uniform(5_000, 170_000):,.2f}"),
+            ("1-Year Change", f"{rng.uniform(-50, 90):.2f}%"),
+            ("YTD Change", f"{rng.uniform(-30, 60):.2f}%"),
+            ("52-Week Range", f"{low:,.2f} — {low * 2:,.2f}"),
+        ]
+        items = "".join(
+            f'<div class="stats_item"><div class="stats_label">{label}</div>'
+            f'<div class="stats_value">{value}</div></div>'
+            for label, value in stats
+        )
+        parts.append(f'<div class="tabs__panel" data-name="{name}"><div class="stats">{items}</div></div>')
+    parts.append('</div><table class="tbl"><thead><tr><th>SYMBOL</th><th>LDCP</th><th>OPEN</th>'
+                 '<th>HIGH</th><th>LOW</th><th>CURRENT</th><th>CHANGE</th><th>VOLUME</th></tr></thead><tbody>')
+    for i in range(rows):
+        price = rng.uniform(5, 2_000)
+        parts.append(
+            f'<tr><td data-search="SYM{i}"><a class="tbl__symbol" href="/company/SYM{i}">'
+            f'<strong>SYM{i}</strong></a></td>'
+            + "".join(f'<td class="right">{price * rng.uniform(0.95, 1.05):,.2f}</td>' for _ in range(6))
+            + f'<td class="right">{rng.randint(0, 50_000_000):,}</td></tr>'
+        )
+    parts.append('</tbody></table></body></html>')
+    return "".join(parts).encode("utf-8")
+
+
+def make_parser(mode: str):
+    """Return a callable(content) for the given parser mode"""
+    from bs4 import BeautifulSoup
+    from app.services.psx_parser import parse_all_indices
+    from app.services.psx_scraper import PSXScraper
+
+    scraper = PSXScraper()
+    if mode == "bs4":
+        return lambda content: scraper._parse_kse100_from_html(BeautifulSoup(content, 'lxml'))
+    if mode == "lxml":
+        return lambda content: parse_all_indices(content, only="KSE100")
+    if mode == "lxml-all":
+        return parse_all_indices
+    raise ValueError(f"Unknown parser mode: {mode}")
+
+
+def run_child(mode: str, path: str, iterations: int) -> None:
+    """Child process: parse repeatedly and print timings and RSS growth"""
+    import logging
+    logging.disable(logging.CRITICAL)
+    parse = make_parser(mode)
+    content = open(path, 'rb').read()
+    parse(content)  # warm-up (also loads lazily imported modules)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = parse(content)
+        timings.append(time.perf_counter() - started)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    count = len(result) if isinstance(result, dict) and "value" not in result else 1
+    print(f"{statistics.median(timings) * 1000:.3f} {min(timings) * 1000:.3f} {peak_kb - baseline_kb} {count}")
+
+
+def main() -> None:
+    if len(sys.argv) >= 2 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        return
+
+    paths = sys.argv[1:]
+    tmp = None
+    if not paths:
+        tmp = tempfile.NamedTemporaryFile(suffix=".html", delete=False)
+        tmp.write(generate_fixture())
+        tmp.close()
+        paths = [tmp.name]
+
+    iterations = int(os.getenv("BENCH_ITERATIONS", "50"))
+    print("=" * 78)
+    print(f"{'fixture':24s} {'parser':10s} {'median ms':>10s} {'min ms':>10s} {'peak +KB':>10s} {'indices':>8s}")
+    print("=" * 78)
+    try:
+        for path in paths:
+            size_kb = os.path.getsize(path) / 1024
+            label = f"{os.path.basename(path)[:14]} ({size_kb:.0f}KB)"
+            for mode in ("bs4", "lxml", "lxml-all"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, path, str(iterations)],
+                    capture_output=True, text=True, check=True,
+                ).stdout.split()
+                median_ms, min_ms, peak_kb, count = out
+                print(f"{label:24s} {mode:10s} {float(median_ms):10.2f} {float(min_ms):10.2f} "
+                      f"{int(peak_kb):10d} {count:>8s}")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark cache/response serialization: stdlib json vs orjson (vs msgpack)
+
+Payloads:
+  companies   /companies/top body (top-companies universe as dicts)
+  index       one KSE100 index snapshot
+  envelope    the all-indices cache envelope written by the poller
+
+Reports encode/decode ops/sec, MB/sec and encoded size per serializer, plus
+FastAPI JSONResponse vs ORJSONResponse render time for the company list.
+
+Usage:
+    python scripts/benchmarks/bench_serializers.py [--seconds 1.0]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.mocks.sectors import MOCK_TOP_COMPANIES
+from app.mocks.stocks import get_mock_index
+from app.services.serializers import MSGPACK_AVAILABLE, get_serializer
+
+
+def payloads():
+    index = get_mock_index()
+    indices = {
+        symbol: {**index, "symbol": symbol}
+        for symbol in ("KSE100", "KSE30", "KMI30", "ALLSHR", "KMIALLSHR", "BKTI", "OGTI", "MII30", "PSXDIV20", "UPP9")
+    }
+    return {
+        "companies": [dict(c) for c in MOCK_TOP_COMPANIES],
+        "index": index,
+        "envelope": {"value": indices, "fresh_until": time.time() + 300},
+    }
+
+
+def rate(fn, seconds):
+    """Calls per second of fn over roughly `seconds`"""
+    calls = 0
+    batch = 100
+    started = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            fn()
+        calls += batch
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time per measurement")
+    args = parser.parse_args()
+
+    names = ["json", "orjson"] + (["msgpack"] if MSGPACK_AVAILABLE else [])
+    serializers = {name: get_serializer(name) for name in names}
+
+    print("=" * 86)
+    print(f"{'payload':10s} {'serializer':10s} {'bytes':>8s} {'encode/s':>12s} {'decode/s':>12s} "
+          f"{'enc MB/s':>10s} {'dec MB/s':>10s}")
+    print("=" * 86)
+    for label, payload in payloads().items():
+        for name, serializer in serializers.items():
+            encoded = serializer.dumps(payload)
+            assert serializer.loads(encoded) is not None
+            encode_rate = rate(lambda: serializer.dumps(payload), args.seconds)
+            decode_rate = rate(lambda: serializer.loads(encoded), args.seconds)
+            size_mb = len(encoded) / 1024 / 1024
+            print(f"{label:10s} {name:10s} {len(encoded):8,d} {encode_rate:12,.0f} {decode_rate:12,.0f} "
+                  f"{encode_rate * size_mb:10.1f} {decode_rate * size_mb:10.1f}")
+    print("=" * 86)
+
+    companies = payloads()["companies"]
+    print()
+    print(f"{'response class (companies)':32s} {'renders/s':>12s}")
+    for response_class in (JSONResponse, ORJSONResponse):
+        render_rate = rate(lambda: response_class(companies), args.seconds)
+        print(f"{response_class.__name__:32s} {render_rate:12,.0f}")
+    if not MSGPACK_AVAILABLE:
+        print("\n(msgpack not installed; skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local vector index: IVF recall/latency against exact search
+
+Synthetic clustered unit vectors (one topic cluster per ~500 chunks) with a
+symbol/period_end payload; queries are perturbed corpus vectors. Reports
+build time, save/load time, p50/p95 query latency and recall@k for the
+exact FlatIndex and IVFIndex at several nprobe values, unfiltered and
+filtered by symbol.
+
+Usage:
+    python scripts/benchmarks/bench_vector_index.py [--count 200000] [--dim 384]
+        [--queries 200] [--k 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import numpy as np
+import polars as pl
+
+from app.rag.vector_index import FlatIndex, IVFIndex, load_index, normalize_rows
+
+
+def corpus(count, dim, queries, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = normalize_rows(rng.standard_normal((max(count // 500, 1), dim), dtype=np.float32))
+    assignment = rng.integers(0, len(topics), count)
+    vectors = normalize_rows(topics[assignment] + 2 * rng.standard_normal((count, dim), dtype=np.float32) / np.sqrt(dim))
+    symbols = np.array(["FCCL", "LUCK", "HBL", "MCB", "ENGRO", "OGDC", "PPL", "HUBC", "MARI", "SYS"])
+    payload = pl.DataFrame({
+        "doc_id": [f"doc{i // 1000}" for i in range(count)],
+        "chunk_index": np.arange(count) % 1000,
+        "symbol": symbols[rng.integers(0, len(symbols), count)],
+        "document_type": ["annual_report"] * count,
+        "period_end": [date(2018 + (i // 1000) % 6, 6, 30) for i in range(count)],
+        "page": np.arange(count) % 300 + 1,
+        "page_end": np.arange(count) % 300 + 1,
+    })
+    noise = 0.05 * rng.standard_normal((queries, dim), dtype=np.float32)
+    return vectors, payload, normalize_rows(vectors[rng.integers(0, count, queries)] + noise)
+
+
+def run(index, queries, k, **options):
+    """(latencies in ms, results as sets of (doc_id, chunk_index))"""
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = index.search(query, limit=k, **options)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append({(h.payload["doc_id"], h.payload["chunk_index"]) for h in hits})
+    return latencies, results
+
+
+def report(label, latencies, results, truth, k):
+    recall = statistics.mean(len(r & t) / max(min(k, len(t)), 1) for r, t in zip(results, truth))
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:34s} {statistics.median(latencies):9.2f} {p95:9.2f} {recall:9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200_000, help="Vectors in the corpus")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors, payload, queries = corpus(args.count, args.dim, args.queries)
+    flat = FlatIndex(vectors, payload)
+    started = time.perf_counter()
+    ivf = IVFIndex.train(vectors, payload)
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        ivf.save(os.path.join(tmp, "index"))
+        save_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        ivf = load_index(os.path.join(tmp, "index"))
+        load_seconds = time.perf_counter() - started
+
+        print(f"{args.count:,} x {args.dim}d vectors, IVF nlist={ivf.nlist} nprobe={ivf.nprobe}")
+        print(f"IVF build {build_seconds:.2f}s, save {save_seconds:.2f}s, load (mmap) {load_seconds * 1000:.1f}ms")
+        print()
+        print("=" * 64)
+        print(f"{'index':34s} {'p50 ms':>9s} {'p95 ms':>9s} {f'recall@{args.k}':>9s}")
+        print("=" * 64)
+        for label, options in (("unfiltered", {}), ("symbol=FCCL", {"symbol": "FCCL"})):
+            latencies, truth = run(flat, queries, args.k, **options)
+            report(f"flat {label}", latencies, truth, truth, args.k)
+            for nprobe in sorted({max(ivf.nprobe // 2, 1), ivf.nprobe, ivf.nprobe * 2, ivf.nprobe * 4}):
+                latencies, results = run(ivf, queries, args.k, nprobe=nprobe, **options)
+                report(f"ivf nprobe={nprobe} {label}", latencies, results, truth, args.k)
+        print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Embed ingested report chunks into the content-addressed embedding store
+
+Reads data/processed/chunks (see scripts/ingest_reports.py) and embeds every
+chunk whose normalized text is not already in data/embeddings/<model>.
+Re-running after new reports only embeds the new text. --build-index then
+(re)builds the local vector index in data/embeddings/index and the BM25
+index used for hybrid retrieval in data/embeddings/lexical.
+
+Backends:
+  openai    OPENAI_EMBEDDING_MODEL (default text-embedding-3-small)
+  hashing   deterministic local embedder, no network (tests/offline)
+
+Usage:
+    python scripts/embed_chunks.py [--backend hashing] [--processed data/processed]
+        [--embeddings data/embeddings] [--batch-size 2048] [--build-index]
+"""
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.rag.embeddings import (
+    DEFAULT_EMBEDDINGS_DIR,
+    CachedEmbedder,
+    EmbeddingStore,
+    embed_corpus,
+    get_embedding_backend,
+)
+from app.rag.ingestion import DEFAULT_PROCESSED_DIR
+from app.rag.lexical_index import DEFAULT_LEXICAL_DIR, build_corpus_lexical_index
+from app.rag.vector_index import DEFAULT_INDEX_DIR, DEFAULT_IVF_THRESHOLD, build_corpus_index
+
+
+def main(args):
+    backend = get_embedding_backend(args.backend)
+    store = EmbeddingStore.for_backend(backend, args.embeddings)
+    embedder = CachedEmbedder(backend, store, batch_size=args.batch_size)
+    print(f"🧮 {backend.model} ({backend.dimension}d), {len(store):,} vectors cached in {store.directory}")
+
+    stats = embed_corpus(embedder, args.processed)
+
+    print()
+    print("=" * 50)
+    print(f"Chunks:            {stats['chunks']:>12,}")
+    print(f"Newly embedded:    {stats['embedded']:>12,}")
+    print(f"Cache hits:        {stats['cached']:>12,}")
+    print(f"Backend calls:     {stats['backend_calls']:>12,}")
+    print(f"Store size:        {len(store):>12,}")
+    print(f"Elapsed:           {stats['seconds']:>11.2f}s")
+    print(f"Throughput:        {stats['chunks_per_sec']:>8,.1f} chunks/sec")
+    print("=" * 50)
+
+    if args.build_index:
+        index = build_corpus_index(embedder, args.processed, args.index_dir, ivf_threshold=args.ivf_threshold)
+        print(f"📇 {index['kind']} index of {index['count']:,} chunks in {index['seconds']:.2f}s -> {args.index_dir}")
+        lexical = build_corpus_lexical_index(args.processed, args.lexical_dir)
+        print(f"🔤 bm25 index of {lexical['count']:,} chunks, {lexical['terms']:,} terms, "
+              f"{lexical['postings']:,} postings in {lexical['seconds']:.2f}s -> {args.lexical_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=None, help="openai or hashing (default: EMBEDDING_BACKEND or openai)")
+    parser.add_argument("--processed", type=Path, default=DEFAULT_PROCESSED_DIR, help="Processed data directory")
+    parser.add_argument("--embeddings", type=Path, default=DEFAULT_EMBEDDINGS_DIR, help="Embedding store root")
+    parser.add_argument("--batch-size", type=int, default=None, help="Texts per backend call (default: backend max)")
+    parser.add_argument("--build-index", action="store_true", help="Build the local vector index afterwards")
+    parser.add_argument("--index-dir", type=Path, default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--lexical-dir", type=Path, default=DEFAULT_LEXICAL_DIR)
+    parser.add_argument("--ivf-threshold", type=int, default=DEFAULT_IVF_THRESHOLD,
+                        help="Chunks at which the index switches from exact to IVF")
+    sys.exit(main(parser.parse_args()))
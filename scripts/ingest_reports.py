@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Ingest PDF annual/quarterly reports into parquet chunks for the RAG corpus
+
+Reads PDFs (default data/raw), extracts text page by page with PyMuPDF across
+a process pool and writes overlapping chunks with symbol/period_end/page
+metadata to data/processed/chunks. Unchanged reports are skipped by content
+hash; --force reprocesses everything. When the whole raw directory is scanned
+(no paths given), reports deleted from it are dropped from the corpus too.
+Cached chat answers for the re-ingested or removed symbols (and unscoped
+answers) are expired; --no-invalidate skips that.
+
+Usage:
+    python scripts/ingest_reports.py [data/raw/FCCL_Annual_2023.pdf ...]
+        [--out data/processed] [--workers 4] [--chunk-size 1000] [--overlap 200]
+        [--fiscal-year-end 06-30] [--force]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.rag.chunking import CHUNK_OVERLAP, CHUNK_SIZE
+from app.rag.ingestion import (
+    DEFAULT_FISCAL_YEAR_END,
+    DEFAULT_PROCESSED_DIR,
+    DEFAULT_RAW_DIR,
+    ReportIngestor,
+    find_reports,
+)
+from app.rag.semantic_cache import invalidate_rag_answers
+from app.services.cache_service import close_cache_service
+
+
+async def invalidate_answers(symbols):
+    """Expire semantic-cache answers that depend on these symbols"""
+    try:
+        return await invalidate_rag_answers(symbols)
+    finally:
+        await close_cache_service()
+
+
+def main(args):
+    reports = find_reports(args.paths or [DEFAULT_RAW_DIR])
+    if not reports:
+        print(f"❌ No PDF reports found in {', '.join(str(p) for p in args.paths or [DEFAULT_RAW_DIR])}")
+        return 1
+
+    ingestor = ReportIngestor(
+        processed_dir=args.out,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        fiscal_year_end=args.fiscal_year_end,
+    )
+    print(f"📄 {len(reports)} reports, {ingestor.workers} workers -> {ingestor.chunks_dir}")
+    totals = ingestor.ingest(reports, force=args.force, prune=not args.paths)
+
+    print()
+    print("=" * 50)
+    print(f"Reports ingested:  {totals['reports']:>12,}")
+    print(f"Unchanged/skipped: {totals['skipped']:>12,}")
+    print(f"Failed:            {totals['failed']:>12,}")
+    print(f"Removed:           {totals['removed']:>12,}")
+    print(f"Pages:             {totals['pages']:>12,}")
+    print(f"Chunks:            {totals['chunks']:>12,}")
+    print(f"Elapsed:           {totals['seconds']:>11.2f}s")
+    print(f"Throughput:        {totals['pages_per_sec']:>8,.1f} pages/sec")
+    print("=" * 50)
+
+    if (totals["reports"] or totals["removed"]) and not args.no_invalidate:
+        expired = asyncio.run(invalidate_answers(totals["symbols"]))
+        print(f"🧹 Expired {expired} cached chat answer sets for {', '.join(totals['symbols']) or 'unscoped questions'}")
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", type=Path, help="PDF files or directories (default: data/raw)")
+    parser.add_argument("--out", type=Path, default=DEFAULT_PROCESSED_DIR, help="Processed data directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Characters per chunk")
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP, help="Characters shared by adjacent chunks")
+    parser.add_argument("--fiscal-year-end", default=DEFAULT_FISCAL_YEAR_END,
+                        help="MM-DD period end for filenames that only give a year")
+    parser.add_argument("--force", action="store_true", help="Reprocess reports even if unchanged")
+    parser.add_argument("--no-invalidate", action="store_true", help="Keep cached chat answers")
+    sys.exit(main(parser.parse_args()))